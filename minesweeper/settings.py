@@ -10,8 +10,11 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import os
 from pathlib import Path
 
+from corsheaders.defaults import default_headers
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -42,12 +45,13 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so its timings cover every other middleware
+    'minesweeper_backend.middleware.TimingMiddleware',
+    'minesweeper_backend.middleware.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
-    'django.middleware.cache.UpdateCacheMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
-    'django.middleware.cache.FetchFromCacheMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
@@ -60,6 +64,10 @@ CORS_ALLOWED_ORIGINS = [
 
 CORS_ALLOW_ALL_ORIGINS = True
 
+# Let browser clients revalidate games with their ETag
+CORS_ALLOW_HEADERS = (*default_headers, 'if-none-match')
+CORS_EXPOSE_HEADERS = ['ETag']
+
 ROOT_URLCONF = 'minesweeper.urls'
 
 TEMPLATES = [
@@ -147,15 +155,21 @@ CACHES = {
     }
 }
 
-# Cache middleware settings
-CACHE_MIDDLEWARE_ALIAS = 'default'
-CACHE_MIDDLEWARE_SECONDS = 300
-CACHE_MIDDLEWARE_KEY_PREFIX = 'minesweeper'
-
 # Logging configuration
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
+    'filters': {
+        # Keep 1 in N of the high-frequency messages (see minesweeper_backend/logs.py)
+        'sampling': {
+            '()': 'minesweeper_backend.logs.SamplingFilter',
+            'rates': {
+                'cache_hit': 100,
+                'reveal': 10,
+                'move': 10,
+            },
+        },
+    },
     'formatters': {
         'verbose': {
             'format': '{levelname} {asctime} {module} {message}',
@@ -177,6 +191,7 @@ LOGGING = {
             'class': 'logging.FileHandler',
             'filename': 'minesweeper.log',
             'formatter': 'verbose',
+            'delay': True,
         },
     },
     'loggers': {
@@ -190,5 +205,122 @@ LOGGING = {
             'level': 'DEBUG',
             'propagate': False,
         },
+        'minesweeper_backend.views': {
+            'filters': ['sampling'],
+        },
+        'minesweeper_backend.async_views': {
+            'filters': ['sampling'],
+        },
     },
 }
+
+# Run the tests with the project's loggers writing to the console only, so a
+# test run doesn't write minesweeper.log
+TEST_RUNNER = 'minesweeper.test_runner.ConsoleLoggingRunner'
+
+# Hand log records to a background thread that does the console and file I/O,
+# so requests never wait on logging. Records are dropped when more than
+# MINESWEEPER_LOG_QUEUE_SIZE are waiting. Started by the WSGI and ASGI entry
+# points only.
+MINESWEEPER_LOG_QUEUE = True
+MINESWEEPER_LOG_QUEUE_SIZE = 10000
+
+# Board engine used for generation and reveal: 'auto', 'numpy' or 'python'.
+# 'auto' picks NumPy when it is installed.
+MINESWEEPER_ENGINE = 'auto'
+
+# Largest number of moves accepted by the batch reveal endpoint
+MINESWEEPER_MAX_BATCH_MOVES = 1000
+
+# Keep the state of games in progress in the cache and write it to the
+# database every MINESWEEPER_FLUSH_INTERVAL seconds and when a game ends,
+# instead of on every move. The cache named by MINESWEEPER_STATE_CACHE must be
+# shared by every worker and must not evict entries, or unflushed moves are
+# lost and the game resumes from its last flush. Idle games are flushed once
+# per interval by a background thread of the server processes (one of them
+# per interval); set MINESWEEPER_BACKGROUND_FLUSH = False to leave that to
+# requests and the flush_games command.
+MINESWEEPER_WRITE_BEHIND = False
+MINESWEEPER_FLUSH_INTERVAL = 5
+MINESWEEPER_STATE_CACHE = 'default'
+MINESWEEPER_BACKGROUND_FLUSH = True
+
+# Serve create_game, reveal and get_game with the async views. Only useful
+# when running under ASGI (e.g. uvicorn minesweeper.asgi:application), so it
+# is chosen per deployment with the environment variable of the same name.
+MINESWEEPER_ASYNC_VIEWS = os.environ.get('MINESWEEPER_ASYNC_VIEWS', '') == '1'
+
+# Threads available to the async views for board generation and cascades
+MINESWEEPER_BOARD_WORKERS = 4
+
+# Live game events: events kept per game for clients resuming a stream, games
+# with a channel in each process, and seconds between keep-alive comments
+MINESWEEPER_EVENT_HISTORY = 64
+MINESWEEPER_EVENT_CHANNELS = 10000
+MINESWEEPER_EVENT_KEEPALIVE = 15
+
+# Time requests into latency histograms, exposed at /api/metrics/, and send
+# each request's phases back in a Server-Timing header
+MINESWEEPER_METRICS = True
+MINESWEEPER_SERVER_TIMING = True
+
+# Gzip responses of at least this many bytes for clients that accept it
+MINESWEEPER_COMPRESS_MIN_SIZE = 1024
+
+# Seconds clients and shared caches may keep a finished game, which never
+# changes again; games in progress are revalidated with their ETag every time
+MINESWEEPER_FINISHED_GAME_MAX_AGE = 60 * 60 * 24 * 365
+
+# Hints: seconds the solver may spend per request, largest group of frontier
+# cells it enumerates, and games whose solver each process keeps for
+# re-solving only what a move changed
+MINESWEEPER_HINT_TIME_BUDGET = 0.03
+MINESWEEPER_SOLVER_ENUMERATION_LIMIT = 18
+MINESWEEPER_SOLVER_CACHE_SIZE = 1000
+
+# Mine probabilities: seconds a request may spend counting layouts, and
+# frontier component shapes whose counts each process keeps
+MINESWEEPER_PROBABILITY_TIME_BUDGET = 1.0
+MINESWEEPER_PROBABILITY_MEMO_SIZE = 10000
+
+# No-guess boards: processes verifying candidates (one per core when None),
+# how they are started ('spawn' or 'forkserver'; 'fork' is unsafe from a
+# process running threads), and seconds a game creation may spend looking
+# for a board
+MINESWEEPER_GENERATION_WORKERS = None
+MINESWEEPER_GENERATION_START_METHOD = 'spawn'
+MINESWEEPER_NO_GUESS_TIME_BUDGET = 5.0
+
+# Board pool: configurations (width, height, mines, 'random') whose boards
+# are generated ahead of game creation, by every server process for itself.
+# Only random boards are pooled; other modes fail the settings check. Each
+# configuration is topped up to the high watermark when the server starts and
+# whenever it drops below the low one; the worker also checks every
+# MINESWEEPER_BOARD_POOL_INTERVAL seconds. An empty list turns the pool off
+MINESWEEPER_BOARD_POOL = [
+    (10, 10, 10, 'random'),
+    (9, 9, 10, 'random'),
+    (16, 16, 40, 'random'),
+    (30, 16, 99, 'random'),
+]
+MINESWEEPER_BOARD_POOL_LOW = 4
+MINESWEEPER_BOARD_POOL_HIGH = 16
+MINESWEEPER_BOARD_POOL_INTERVAL = 5
+
+# Bulk game creation: most games per request, games per insert, and most
+# games generated on the request thread rather than the generation processes
+MINESWEEPER_BULK_MAX_GAMES = 10000
+MINESWEEPER_BULK_CHUNK_SIZE = 500
+MINESWEEPER_BULK_INLINE_GAMES = 200
+
+# Expiry: seconds after their last move that games in progress and finished
+# games are purged, games deleted per transaction, seconds to pause between
+# transactions, and whether a summary of each purged game is archived.
+# MINESWEEPER_PURGE_INTERVAL, in seconds, purges in the server process;
+# leave it None to purge with the purge_games command instead
+MINESWEEPER_IDLE_GAME_TTL = 60 * 60 * 24 * 7
+MINESWEEPER_FINISHED_GAME_TTL = 60 * 60 * 24 * 30
+MINESWEEPER_PURGE_BATCH_SIZE = 500
+MINESWEEPER_PURGE_PAUSE = 0.1
+MINESWEEPER_PURGE_ARCHIVE = True
+MINESWEEPER_PURGE_INTERVAL = None
@@ -0,0 +1,22 @@
+"""
+Test runner for the minesweeper project.
+
+It runs the tests like Django's own runner, with the project's loggers
+writing to the console only, so a test run doesn't write minesweeper.log.
+"""
+
+import logging
+
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+
+
+class ConsoleLoggingRunner(DiscoverRunner):
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        for name in settings.LOGGING.get('loggers', {}):
+            logger = logging.getLogger(name)
+            for handler in list(logger.handlers):
+                if isinstance(handler, logging.FileHandler):
+                    logger.removeHandler(handler)
+                    handler.close()
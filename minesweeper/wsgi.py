@@ -14,3 +14,9 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'minesweeper.settings')
 
 application = get_wsgi_application()
+
+# Start the background work of the server process: queue logging, the
+# generation pool, the board pool, purges and write-behind flushes
+from minesweeper_backend.startup import startup  # noqa: E402
+
+startup()
@@ -1,6 +1,11 @@
 from django.apps import AppConfig
+from django.core import checks
 
 
 class minesweeperBackendConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'minesweeper_backend'
+
+    def ready(self):
+        from .pool import check_board_pool
+        checks.register(check_board_pool)
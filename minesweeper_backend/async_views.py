@@ -0,0 +1,354 @@
+"""
+Async versions of the create_game, reveal and get_game views, and the live
+event stream of a game.
+
+They answer exactly like the views in views.py but never hold a thread while
+waiting on the database or the cache, so an ASGI process can keep many games
+open at once. Board work (generation, cascades, packing) runs in the bounded
+board executor. urls.py routes the game endpoints here when
+MINESWEEPER_ASYNC_VIEWS is set.
+"""
+import asyncio
+import functools
+import json
+import logging
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.conf import settings
+from django.http import Http404, HttpResponse, HttpResponseNotModified, JsonResponse, StreamingHttpResponse
+from django.utils.cache import patch_vary_headers
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+
+from .codec import peek_cell
+from .events import Subscription, publish
+from .executors import run_board_work
+from .generation import GenerationTimeout, agenerate_no_guess_board
+from .metrics import label_board, phase
+from .models import Game
+from .pool import claim_board
+from .renderers import FORMAT_NAMES, JSON, negotiate, render
+from .store import GameLocked, acache_lock, acurrent_game, aupdate_game
+from .views import (
+    board_update, etag_matches, game_etag, get_game_cache_key, parse_cell, parse_game_params, parse_mode,
+    parse_version, serialize_game, set_game_caching
+)
+
+logger = logging.getLogger(__name__)
+
+
+def parse_body(request):
+    """
+    Returns the JSON or form data of a request as a dictionary.
+
+    Raises:
+        ValueError: If the body is not a JSON object
+    """
+    if request.content_type != 'application/json':
+        return request.POST
+    if not request.body:
+        return {}
+    try:
+        data = json.loads(request.body)
+    except ValueError:
+        raise ValueError("Invalid JSON body.")
+    if not isinstance(data, dict):
+        raise ValueError("Invalid JSON body.")
+    return data
+
+
+def error(message, status):
+    return JsonResponse({"error": message}, status=status)
+
+
+def negotiated(view):
+    """
+    Picks the format of a view's response from the request before the view
+    runs (see renderers.py), answering 406 when no supported format is accepted.
+    """
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        request.wire_format = negotiate(request.headers.get('Accept'), request.GET.get('format'))
+        if request.wire_format is None:
+            response = error("Could not satisfy the request Accept header.", 406)
+        else:
+            response = await view(request, *args, **kwargs)
+        patch_vary_headers(response, ['Accept'])
+        return response
+    return wrapper
+
+
+async def acache_game(game, game_data=None):
+    """Async version of views.cache_game."""
+    if game_data is None:
+        game_data = await run_board_work(serialize_game, game)
+    cache_key = get_game_cache_key(game.id)
+    try:
+        async with acache_lock(cache_key):
+            cached = await cache.aget(cache_key)
+            if cached is None or cached['version'] < game_data['version']:
+                await cache.aset(cache_key, game_data, timeout=3600)
+    except GameLocked:
+        logger.warning("Dropped the cached state of game %s, its cache lock is busy", game.id)
+        await cache.adelete(cache_key)
+
+
+async def respond(request, game_data, status=200):
+    """Returns game data in the format picked by negotiated."""
+    if request.wire_format == JSON:
+        return JsonResponse(game_data, status=status)
+    body = await run_board_work(render, game_data, request.wire_format)
+    return HttpResponse(body, content_type=request.wire_format, status=status)
+
+
+@csrf_exempt
+@require_POST
+@negotiated
+async def create_game(request):
+     try:
+         try:
+             data = parse_body(request)
+             width, height, mines = parse_game_params(data)
+             mode = parse_mode(data)
+         except ValueError as e:
+             return error(str(e), 400)
+
+         label_board(width, height)
+         try:
+             game = Game(width=width, height=height, mines=mines, mode=mode)
+             await sync_to_async(game.full_clean)(validate_unique=False)
+             if not claim_board(game):
+                 boards = None
+                 if mode == Game.NO_GUESS:
+                     # Verified in the generation processes, awaited without a thread
+                     boards = await agenerate_no_guess_board(width, height, mines)
+                 await run_board_work(game.initialize_board, save=False, boards=boards)
+             with phase('save'):
+                 await game.asave()
+
+             game_data = await run_board_work(serialize_game, game)
+             await cache.aset(get_game_cache_key(game.id), game_data, timeout=3600)
+
+         except ValidationError as e:
+             return error(str(e), 400)
+         except GenerationTimeout:
+             logger.warning("No no-guess board found for %sx%s with %s mines", width, height, mines)
+             return error("No no-guess board found in time, try again or use fewer mines.", 503)
+
+         logger.info("Created game %s", game.id)
+
+         return await respond(request, game_data, status=201)
+
+     except Exception as e:
+         logger.error("Error in async create_game view: %s", e, exc_info=True)
+         return error(f"An error occurred: {str(e)}", 500)
+
+
+@csrf_exempt
+@require_POST
+@negotiated
+async def reveal(request, game_id):
+     try:
+         game = await acurrent_game(game_id)
+
+         if game.game_over or game.game_won:
+             logger.info("Rejected reveal for finished game %s", game_id, extra={'sample': 'reveal'})
+             return error("Game already finished.", 400)
+
+         try:
+             data = parse_body(request)
+             row, col = parse_cell(data, game)
+             client_version = parse_version(data)
+         except ValueError as e:
+             return error(str(e), 400)
+
+         cell = peek_cell(game.cell_states, row, col)
+         if cell != '':
+             game_data = {
+                 'message': "Cell is flagged" if cell == 'F' else "Cell already revealed",
+                 'game_id': game.id,
+                 'game_over': game.game_over,
+                 'game_won': game.game_won,
+                 'version': game.version
+             }
+             game_data.update(await run_board_work(board_update, game, [], game.version, client_version))
+             logger.info("Cell already revealed for game %s", game_id, extra={'sample': 'reveal'})
+             return await respond(request, game_data)
+
+         def apply_reveal(game, changes):
+             if game.game_over or game.game_won:
+                 return None
+             return game.reveal(row, col, changes)
+
+         game, base_version, revealed_count, changes = await aupdate_game(game_id, apply_reveal)
+
+         if revealed_count is None:
+             return error("Game already finished.", 400)
+
+         await acache_game(game)
+         publish(game, 'reveal', base_version, changes)
+
+         if revealed_count == -1:
+             message = "Game Over! You hit a mine!"
+         else:
+             message = "Cell revealed"
+             if game.game_won:
+                 logger.info("Game %s won!", game_id)
+
+         game_data = {
+             'message': message,
+             'game_id': game.id,
+             'game_over': game.game_over,
+             'game_won': game.game_won,
+             'version': game.version
+         }
+         if revealed_count != -1:
+             game_data['revealed_count'] = revealed_count
+         game_data.update(await run_board_work(board_update, game, changes, base_version, client_version))
+
+         logger.info("Revealed cell (%s, %s) for game %s, revealed %s cells", row, col, game_id, revealed_count, extra={'sample': 'reveal'})
+         return await respond(request, game_data)
+
+     except Http404:
+         return error("Game not found", 404)
+     except GameLocked:
+         return error("Game is busy, try again.", 503)
+     except Exception as e:
+         logger.error("Error in async reveal view: %s", e, exc_info=True)
+         return error(f"An error occurred: {str(e)}", 500)
+
+
+@require_GET
+@negotiated
+async def get_game(request, game_id):
+     try:
+         cache_key = get_game_cache_key(game_id)
+         with phase('cache'):
+             game_data = await cache.aget(cache_key)
+
+         if game_data:
+             label_board(game_data['width'], game_data['height'])
+             logger.info("Retrieved game %s from cache", game_id, extra={'sample': 'cache_hit'})
+         else:
+             game = await acurrent_game(game_id)
+             game_data = await run_board_work(serialize_game, game)
+             await acache_game(game, game_data)
+
+             logger.info("Retrieved game %s from database", game_id)
+
+         etag = game_etag(game_data, FORMAT_NAMES[request.wire_format])
+         finished = game_data['game_over'] or game_data['game_won']
+         if etag_matches(request, etag):
+             return set_game_caching(HttpResponseNotModified(), etag, finished)
+         return set_game_caching(await respond(request, game_data), etag, finished)
+
+     except Http404:
+         logger.info("Game %s not found", game_id)
+         return error("Game not found", 404)
+     except Exception as e:
+         logger.error("Error in async get_game view: %s", e, exc_info=True)
+         return error(f"An error occurred: {str(e)}", 500)
+
+
+def format_event(event, name=None):
+    """Formats an event as a server-sent event whose id is the board version."""
+    return f"id: {event['version']}\nevent: {name or event['type']}\ndata: {json.dumps(event)}\n\n"
+
+
+def snapshot_event(game):
+    """The whole board, sent when a client can't be brought up to date with deltas."""
+    return {
+        'type': 'snapshot',
+        'version': game.version,
+        'board_state': game.player_board,
+        'game_over': game.game_over,
+        'game_won': game.game_won
+    }
+
+
+def parse_since(request):
+    """
+    Reads the version the client's board is at, from the version query
+    parameter or the Last-Event-ID header browsers send when reconnecting.
+
+    Raises:
+        ValueError: If the version is not an integer
+    """
+    since = request.GET.get('version', request.headers.get('Last-Event-ID'))
+    if since is None:
+        return None
+    try:
+        return int(since)
+    except ValueError:
+        raise ValueError("Invalid version.")
+
+
+@require_GET
+async def game_events(request, game_id):
+     """
+     Streams the events of a game as server-sent events until it ends.
+
+     A client that sends the version its board is at first gets the events it
+     missed, or the whole board if they are no longer available; clients
+     without a version start with the whole board. Every subscriber reads from
+     the game's channel, never from the database.
+     """
+     try:
+         since = parse_since(request)
+     except ValueError as e:
+         return error(str(e), 400)
+
+     # Subscribe before reading the game, so no event can fall in between
+     subscription = Subscription(game_id)
+     try:
+         game = await acurrent_game(game_id)
+     except Http404:
+         subscription.close()
+         return error("Game not found", 404)
+
+     keepalive = getattr(settings, 'MINESWEEPER_EVENT_KEEPALIVE', 15)
+
+     async def stream():
+          try:
+              version = since
+              finished = game.game_over or game.game_won
+              backlog = subscription.backlog(since) if since is not None else None
+              if backlog is None or (not backlog and since != game.version):
+                  snapshot = await run_board_work(snapshot_event, game)
+                  yield format_event(snapshot)
+                  version = game.version
+              else:
+                  for event in backlog:
+                      yield format_event(event)
+                      version = event['version']
+                      finished = event['type'] == 'end'
+
+              while not finished:
+                  try:
+                      event = await asyncio.wait_for(subscription.get(), keepalive)
+                  except asyncio.TimeoutError:
+                      yield ": keep-alive\n\n"
+                      continue
+
+                  if event['version'] <= version:
+                      continue
+                  if event['base_version'] != version:
+                      # Events were missed; resynchronise with the whole board
+                      latest = await acurrent_game(game_id)
+                      yield format_event(await run_board_work(snapshot_event, latest))
+                      version = latest.version
+                      finished = latest.game_over or latest.game_won
+                      continue
+
+                  yield format_event(event)
+                  version = event['version']
+                  finished = event['type'] == 'end'
+          finally:
+              subscription.close()
+
+     response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+     response['Cache-Control'] = 'no-cache'
+     response['X-Accel-Buffering'] = 'no'
+     return response
@@ -0,0 +1,285 @@
+"""
+Micro-benchmarks of the board engine.
+
+Every case runs over a grid of board sizes and mine densities and records
+its time per call (the best and the median of several repeats) and the peak
+memory it allocates. Results are plain dictionaries that can be written as
+JSON and compared against a stored baseline; the cases recorded in a
+baseline are the tracked ones.
+
+Cases:
+- generate: generate_minesweeper_board
+- reveal_cascade: reveal_cell on a board without mines, which uncovers every
+  cell (the worst-case cascade); size only
+- flood_cascade: the engine's flood_reveal on the same board, bypassing the
+  zero region index; size only
+- reveal_single: reveal_cell on a numbered cell, read from the packed layout
+- reveal_sweep: reveal_cell on every safe cell in turn, as in a full game;
+  dense boards make it many small reveals
+- count_simple: count_adjacent_mines_simple over every cell of a 2D list
+- count_board: count_adjacent_mines over every cell of a Board, which reads
+  the precomputed counts
+- solve: a full solve for hints, after the cascade of an opening click
+"""
+import platform
+import statistics
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+from .engines import engine_name, get_engine
+from .models import Game
+from .solver import Solver
+from .utils import (
+    count_adjacent_mines, count_adjacent_mines_simple, generate_minesweeper_board, reveal_cell
+)
+
+DEFAULT_SIZES = ((9, 9), (16, 16), (30, 16), (100, 100))
+DEFAULT_DENSITIES = (0.12, 0.2, 0.5)
+
+# Calls of fast cases are timed in batches lasting at least this many seconds
+MIN_BATCH_TIME = 0.005
+MAX_BATCH_CALLS = 1000
+
+
+def make_game(width, height, mines, engine=None):
+    """Returns an unsaved game with a generated board."""
+    boards = generate_minesweeper_board(width, height, mines, engine)
+    game = Game(width=width, height=height, mines=mines)
+    game.internal_board = boards['internal_board']
+    game.player_board = boards['player_board']
+    game.counts = boards['counts']
+    game.region_index = boards['regions']
+    return game
+
+
+def hidden_board(width, height):
+    return [['' for _ in range(width)] for _ in range(height)]
+
+
+def _generate(width, height, mines, engine):
+    return (lambda: None), (lambda _: generate_minesweeper_board(width, height, mines, engine))
+
+
+def _reveal_cascade(width, height, mines, engine):
+    game = make_game(width, height, 0, engine)
+    return (
+        lambda: hidden_board(width, height),
+        lambda board: reveal_cell(board, 0, 0, game=game, engine=engine)
+    )
+
+
+def _flood_cascade(width, height, mines, engine):
+    game = make_game(width, height, 0, engine)
+    internal_board, counts = game.internal_board, game.counts
+    flood_reveal = get_engine(engine).flood_reveal
+    return (
+        lambda: hidden_board(width, height),
+        lambda board: flood_reveal(board, 0, 0, internal_board, counts)
+    )
+
+
+def _reveal_single(width, height, mines, engine):
+    game = make_game(width, height, mines, engine)
+    layout = game.board
+    cells = [
+        (row, col) for row in range(height) for col in range(width)
+        if not layout.is_mine(row, col) and layout.count(row, col)
+    ]
+    if not cells:
+        return None
+    row, col = cells[len(cells) // 2]
+    return (
+        lambda: hidden_board(width, height),
+        lambda board: reveal_cell(board, row, col, game=game, engine=engine)
+    )
+
+
+def _reveal_sweep(width, height, mines, engine):
+    game = make_game(width, height, mines, engine)
+    layout = game.board
+    cells = [
+        (row, col) for row in range(height) for col in range(width)
+        if not layout.is_mine(row, col)
+    ]
+
+    def sweep(board):
+        for row, col in cells:
+            reveal_cell(board, row, col, game=game, engine=engine)
+
+    return (lambda: hidden_board(width, height)), sweep
+
+
+def _count_simple(width, height, mines, engine):
+    internal_board = make_game(width, height, mines, engine).internal_board
+
+    def count(_):
+        for row in range(height):
+            for col in range(width):
+                count_adjacent_mines_simple(internal_board, row, col)
+
+    return (lambda: None), count
+
+
+def _count_board(width, height, mines, engine):
+    layout = make_game(width, height, mines, engine).board
+
+    def count(_):
+        for row in range(height):
+            for col in range(width):
+                count_adjacent_mines(layout, row, col)
+
+    return (lambda: None), count
+
+
+def _solve(width, height, mines, engine):
+    game = make_game(width, height, mines, engine)
+    layout = game.board
+    openings = [
+        (row, col) for row in range(height) for col in range(width)
+        if not layout.is_mine(row, col) and layout.count(row, col) == 0
+    ]
+    if not openings:
+        return None
+    board = hidden_board(width, height)
+    reveal_cell(board, *openings[len(openings) // 2], game=game, engine=engine)
+    return (lambda: None), (lambda _: Solver.from_board(board, mines).solve())
+
+
+# name -> (factory, whether the case depends on the mine density)
+CASES = {
+    'generate': (_generate, True),
+    'reveal_cascade': (_reveal_cascade, False),
+    'flood_cascade': (_flood_cascade, False),
+    'reveal_single': (_reveal_single, True),
+    'reveal_sweep': (_reveal_sweep, True),
+    'count_simple': (_count_simple, True),
+    'count_board': (_count_board, True),
+    'solve': (_solve, True),
+}
+
+
+def case_key(case, engine, width, height, density):
+    key = f"{case}/{engine}/{width}x{height}"
+    return key if density is None else f"{key}/{density:g}"
+
+
+def time_case(setup, run, repeat):
+    """
+    Returns the time per call of each repeat, in seconds.
+
+    Every call gets a fresh state from setup, made before the clock starts.
+    """
+    number = 1
+    while True:
+        elapsed = _time_batch(setup, run, number)
+        if elapsed >= MIN_BATCH_TIME or number >= MAX_BATCH_CALLS:
+            break
+        number *= 10
+
+    timings = [elapsed / number]
+    for _ in range(repeat - 1):
+        timings.append(_time_batch(setup, run, number) / number)
+    return timings, number
+
+
+def _time_batch(setup, run, number):
+    states = [setup() for _ in range(number)]
+    start = time.perf_counter()
+    for state in states:
+        run(state)
+    return time.perf_counter() - start
+
+
+def peak_memory(setup, run):
+    """Returns the peak memory allocated by one call, in bytes."""
+    state = setup()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        run(state)
+        return tracemalloc.get_traced_memory()[1] - before
+    finally:
+        tracemalloc.stop()
+
+
+def run_benchmarks(sizes=DEFAULT_SIZES, densities=DEFAULT_DENSITIES, cases=None, engine=None, repeat=5):
+    """
+    Runs the benchmark cases over every size and density.
+
+    Args:
+        sizes: (width, height) pairs
+        densities: Fractions of the cells that are mines
+        cases: Names of the cases to run; defaults to every case
+        engine: Engine name; defaults to settings.MINESWEEPER_ENGINE
+        repeat: Number of timed repeats per case
+
+    Returns:
+        Dictionary with the environment and a 'results' list holding, per case,
+        its key, parameters, 'min_ms', 'median_ms' and 'peak_kib'
+    """
+    engine = engine_name(engine)
+    results = []
+
+    for case in cases or CASES:
+        factory, by_density = CASES[case]
+        for width, height in sizes:
+            for density in (densities if by_density else (None,)):
+                mines = 0 if density is None else min(int(width * height * density), width * height - 1)
+                bench = factory(width, height, mines, engine)
+                if bench is None:
+                    continue
+                setup, run = bench
+
+                timings, number = time_case(setup, run, repeat)
+                results.append({
+                    'key': case_key(case, engine, width, height, density),
+                    'case': case,
+                    'engine': engine,
+                    'width': width,
+                    'height': height,
+                    'density': density,
+                    'mines': mines,
+                    'number': number,
+                    'repeat': repeat,
+                    'min_ms': min(timings) * 1000,
+                    'median_ms': statistics.median(timings) * 1000,
+                    'peak_kib': peak_memory(setup, run) / 1024,
+                })
+
+    return {
+        'created': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'results': results,
+    }
+
+
+def compare_results(report, baseline, tolerance=0.25, memory_tolerance=0.1, min_delta_ms=0.01, min_delta_kib=1):
+    """
+    Compares a report against a baseline report.
+
+    A case regresses when its best time exceeds the baseline's by more than
+    tolerance, or its peak memory by more than memory_tolerance. Differences
+    under min_delta_ms and min_delta_kib are noise on the smallest cases and
+    never count.
+    Cases missing from the baseline are not tracked.
+
+    Returns:
+        List of (key, metric, baseline value, new value) for every regression
+    """
+    tracked = {result['key']: result for result in baseline['results']}
+    regressions = []
+
+    for result in report['results']:
+        previous = tracked.get(result['key'])
+        if previous is None:
+            continue
+        if (result['min_ms'] > previous['min_ms'] * (1 + tolerance)
+                and result['min_ms'] - previous['min_ms'] >= min_delta_ms):
+            regressions.append((result['key'], 'min_ms', previous['min_ms'], result['min_ms']))
+        if (result['peak_kib'] > previous['peak_kib'] * (1 + memory_tolerance)
+                and result['peak_kib'] - previous['peak_kib'] >= min_delta_kib):
+            regressions.append((result['key'], 'peak_kib', previous['peak_kib'], result['peak_kib']))
+
+    return regressions
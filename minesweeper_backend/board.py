@@ -0,0 +1,77 @@
+"""
+Flat, packed view of a board's mine layout and adjacent mine counts.
+"""
+from . import codec
+
+# Offsets of the eight neighbours of a cell, as (row, col) pairs
+NEIGHBOURS = ((-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1))
+
+
+class Board:
+    """
+    The mine layout and adjacent mine counts of a board.
+
+    Cells are stored row-major in the packed forms the Game model persists:
+    one bit per cell for the mines and one nibble per cell for the counts.
+    A Board over a saved game is a view of those bytes, so it costs nothing
+    to build, and reading a cell is a couple of integer operations that
+    allocate nothing.
+    """
+
+    __slots__ = ('width', 'height', '_mines', '_counts')
+
+    def __init__(self, width, height, mines, counts):
+        """
+        Args:
+            width: Number of columns
+            height: Number of rows
+            mines: Mine bitset, most significant bit first, without header
+            counts: Count nibbles, high nibble first, without header
+        """
+        self.width = width
+        self.height = height
+        self._mines = mines
+        self._counts = counts
+
+    @classmethod
+    def from_packed(cls, mine_bits, count_grid):
+        """
+        Builds a Board over the packed mine_bits and count_grid fields of a game.
+        """
+        height, width = codec.board_dimensions(mine_bits)
+        return cls(
+            width, height,
+            memoryview(mine_bits)[codec.HEADER.size:],
+            memoryview(count_grid)[codec.HEADER.size:]
+        )
+
+    @classmethod
+    def from_rows(cls, internal_board, counts):
+        """
+        Builds a Board from an internal board and its counts given as 2D lists.
+        """
+        return cls.from_packed(codec.encode_mines(internal_board), codec.encode_counts(counts))
+
+    def in_bounds(self, row, col):
+        return 0 <= row < self.height and 0 <= col < self.width
+
+    def is_mine(self, row, col):
+        index = row * self.width + col
+        return bool(self._mines[index >> 3] & (0x80 >> (index & 7)))
+
+    def count(self, row, col):
+        """Returns the number of mines adjacent to the cell."""
+        index = row * self.width + col
+        byte = self._counts[index >> 1]
+        return byte & 0xF if index & 1 else byte >> 4
+
+    def neighbours(self, row, col):
+        """Yields (row, col) for every neighbour of the cell that is on the board."""
+        for dr, dc in NEIGHBOURS:
+            i = row + dr
+            j = col + dc
+            if 0 <= i < self.height and 0 <= j < self.width:
+                yield i, j
+
+    def __repr__(self):
+        return f"<Board {self.width}x{self.height}>"
@@ -0,0 +1,109 @@
+"""
+Bulk game creation, for tournaments and test rigs.
+
+Games are created in chunks of MINESWEEPER_BULK_CHUNK_SIZE: the boards of a
+chunk are generated and packed, the chunk is inserted with a single
+bulk_create, and the new games are put in the cache with a single set_many
+(pipelined by the Redis backend). Up to MINESWEEPER_BULK_INLINE_GAMES random
+games are generated on the calling thread; beyond that, and for no-guess
+games of any count, every chunk is generated in the generation process pool
+and chunks are inserted as their boards come back, so generation runs on
+every core while the database takes inserts.
+"""
+import secrets
+from concurrent.futures import as_completed
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .executors import generation_executor, generation_workers
+from .generation import GenerationTimeout, attempt, no_guess_board
+from .models import Game
+from .pool import build_board
+
+
+def build_boards(width, height, mines, mode, count, time_budget, enumeration_limit):
+    """
+    Generates and packs count boards, returning the Game fields of each.
+    Runs in a generation worker, so no-guess candidates are tried here rather
+    than in more workers. Like generation.attempt, it doesn't read the
+    settings: the solver's enumeration limit is passed in.
+
+    Raises:
+        GenerationTimeout: If a no-guess board isn't found within time_budget seconds
+    """
+    boards = []
+    for _ in range(count):
+        generated = None
+        if mode == Game.NO_GUESS:
+            cells = attempt(width, height, mines, time_budget, enumeration_limit, secrets.randbits(64))
+            if cells is None:
+                raise GenerationTimeout
+            generated = no_guess_board(width, height, cells)
+        boards.append(build_board(width, height, mines, mode, generated))
+    return boards
+
+
+def _chunks(count, chunk_size):
+    while count > 0:
+        yield min(chunk_size, count)
+        count -= chunk_size
+
+
+def _generated_chunks(width, height, mines, mode, count, chunk_size):
+    """Yields the board fields of every chunk, generated inline or in the workers."""
+    # Inline no-guess generation would wait on the workers one board at a time
+    if mode == Game.RANDOM and count <= getattr(settings, 'MINESWEEPER_BULK_INLINE_GAMES', 200):
+        for size in _chunks(count, chunk_size):
+            yield [build_board(width, height, mines, mode) for _ in range(size)]
+        return
+
+    executor = generation_executor()
+    time_budget = getattr(settings, 'MINESWEEPER_NO_GUESS_TIME_BUDGET', 5.0)
+    enumeration_limit = getattr(settings, 'MINESWEEPER_SOLVER_ENUMERATION_LIMIT', 18)
+    # Enough chunks to keep every worker busy
+    chunk_size = min(chunk_size, -(-count // generation_workers()))
+    futures = [
+        executor.submit(build_boards, width, height, mines, mode, size, time_budget, enumeration_limit)
+        for size in _chunks(count, chunk_size)
+    ]
+    try:
+        for future in as_completed(futures):
+            yield future.result()
+    finally:
+        for future in futures:
+            future.cancel()
+
+
+def create_games(width, height, mines, mode=Game.RANDOM, count=1, chunk_size=None):
+    """
+    Creates count games of one configuration, in chunks.
+
+    Args:
+        width: Width of the boards (number of columns)
+        height: Height of the boards (number of rows)
+        mines: Number of mines per board
+        mode: Game.RANDOM or Game.NO_GUESS
+        count: Number of games
+        chunk_size: Games per insert; defaults to settings.MINESWEEPER_BULK_CHUNK_SIZE
+
+    Yields:
+        The saved games of each chunk, as a list, as soon as it is inserted
+
+    Raises:
+        ValidationError: If the configuration is invalid
+        GenerationTimeout: If a no-guess board wasn't found in time; the
+            chunks yielded before stay created
+    """
+    from .views import get_game_cache_key, serialize_game
+
+    if chunk_size is None:
+        chunk_size = getattr(settings, 'MINESWEEPER_BULK_CHUNK_SIZE', 500)
+    Game(width=width, height=height, mines=mines, mode=mode).full_clean(validate_unique=False)
+
+    for chunk in _generated_chunks(width, height, mines, mode, count, chunk_size):
+        games = [Game(width=width, height=height, mines=mines, mode=mode, **fields) for fields in chunk]
+        Game.objects.bulk_create(games)
+        cache.set_many({get_game_cache_key(game.id): serialize_game(game) for game in games}, timeout=3600)
+        yield games
+
@@ -0,0 +1,293 @@
+import hashlib
+import struct
+import sys
+from array import array
+from itertools import chain
+
+from .regions import ZeroRegionIndex
+
+# Every blob starts with the board dimensions so it can be decoded on its own
+HEADER = struct.Struct('>II')
+
+# Zero region blobs also record how many runs and regions follow
+REGION_HEADER = struct.Struct('>IIIII')
+
+# Nibble values used for the player's cell states.
+# 0-8 are revealed cells holding their adjacent mine count.
+MINE = 0x9
+FLAGGED = 0xA
+HIDDEN = 0xF
+
+_STATE_TO_NIBBLE = {str(n): n for n in range(9)}
+_STATE_TO_NIBBLE.update({'M': MINE, 'F': FLAGGED, '': HIDDEN})
+
+_NIBBLE_TO_STATE = ['?'] * 16
+for _state, _nibble in _STATE_TO_NIBBLE.items():
+    _NIBBLE_TO_STATE[_nibble] = _state
+
+# Lookup tables mapping one packed byte to the cell values it holds
+_BYTE_TO_STATES = [(_NIBBLE_TO_STATE[b >> 4], _NIBBLE_TO_STATE[b & 0xF]) for b in range(256)]
+_BYTE_TO_NIBBLES = [(b >> 4, b & 0xF) for b in range(256)]
+_BYTE_TO_MINES = [
+    tuple('M' if b & (0x80 >> bit) else '' for bit in range(8))
+    for b in range(256)
+]
+
+
+def _read_header(blob):
+    height, width = HEADER.unpack_from(blob)
+    return height, width
+
+
+def board_dimensions(blob):
+    """
+    Returns the (height, width) stored in the header of a packed board.
+    """
+    return _read_header(bytes(blob[:HEADER.size]))
+
+
+def encode_mines(internal_board):
+    """
+    Packs an internal board into a bitset with one bit per cell.
+
+    Args:
+        internal_board: 2D list where 'M' marks a mine
+
+    Returns:
+        bytes: header followed by the row-major bitset (most significant bit first)
+
+    Example:
+        encode_mines([['M', '', ''], ['', '', 'M']]) stores the bits 100001
+        in a single byte after the header.
+    """
+    if internal_board is None:
+        return None
+
+    height = len(internal_board)
+    width = len(internal_board[0]) if height > 0 else 0
+
+    bits = bytearray((width * height + 7) // 8)
+    index = 0
+    for row in internal_board:
+        for cell in row:
+            if cell == 'M':
+                bits[index >> 3] |= 0x80 >> (index & 7)
+            index += 1
+
+    return HEADER.pack(height, width) + bytes(bits)
+
+
+def decode_mines(blob):
+    """
+    Unpacks a mine bitset into the 2D list representation.
+
+    Args:
+        blob: bytes produced by encode_mines
+
+    Returns:
+        2D list where 'M' marks a mine and '' an empty cell, or None for a missing blob
+    """
+    if blob is None:
+        return None
+
+    blob = bytes(blob)
+    height, width = _read_header(blob)
+    flat = list(chain.from_iterable(map(_BYTE_TO_MINES.__getitem__, blob[HEADER.size:])))
+    return [flat[r * width:(r + 1) * width] for r in range(height)]
+
+
+def encode_cells(player_board):
+    """
+    Packs a player board into a nibble array with one 4-bit state per cell.
+
+    Args:
+        player_board: 2D list of cell strings ('', '0'-'8', 'M' or 'F')
+
+    Returns:
+        bytes: header followed by the row-major nibble array
+
+    Example:
+        encode_cells([['', '1'], ['0', 'M']]) packs to the bytes 0xF1 0x09
+        after the header.
+    """
+    if player_board is None:
+        return None
+
+    height = len(player_board)
+    width = len(player_board[0]) if height > 0 else 0
+
+    nibbles = [_STATE_TO_NIBBLE[cell] for row in player_board for cell in row]
+    return HEADER.pack(height, width) + _pack_nibbles(nibbles, HIDDEN)
+
+
+def decode_cells(blob):
+    """
+    Unpacks a nibble array into the 2D list representation of the player board.
+
+    Args:
+        blob: bytes produced by encode_cells
+
+    Returns:
+        2D list of cell strings, or None for a missing blob
+    """
+    if blob is None:
+        return None
+
+    blob = bytes(blob)
+    height, width = _read_header(blob)
+    flat = list(chain.from_iterable(map(_BYTE_TO_STATES.__getitem__, blob[HEADER.size:])))
+    return [flat[r * width:(r + 1) * width] for r in range(height)]
+
+
+def encode_counts(counts):
+    """
+    Packs a grid of adjacent mine counts into a nibble array.
+
+    Args:
+        counts: 2D list of integers between 0 and 8
+
+    Returns:
+        bytes: header followed by the row-major nibble array
+    """
+    if counts is None:
+        return None
+
+    height = len(counts)
+    width = len(counts[0]) if height > 0 else 0
+    nibbles = [count for row in counts for count in row]
+    return HEADER.pack(height, width) + _pack_nibbles(nibbles, 0)
+
+
+def decode_counts(blob):
+    """
+    Unpacks a nibble array of adjacent mine counts.
+
+    Args:
+        blob: bytes produced by encode_counts
+
+    Returns:
+        2D list of integers between 0 and 8, or None for a missing blob
+    """
+    if blob is None:
+        return None
+
+    blob = bytes(blob)
+    height, width = _read_header(blob)
+    flat = list(chain.from_iterable(map(_BYTE_TO_NIBBLES.__getitem__, blob[HEADER.size:])))
+    return [flat[r * width:(r + 1) * width] for r in range(height)]
+
+
+def encode_regions(index):
+    """
+    Packs a ZeroRegionIndex into bytes.
+
+    The header holds the board dimensions and the number of zero runs, member
+    runs and regions; the run arrays follow as little-endian 32-bit integers.
+    """
+    if index is None:
+        return None
+
+    header = REGION_HEADER.pack(
+        index.height, index.width,
+        len(index.zero_starts), len(index.member_starts), index.region_count
+    )
+    arrays = (
+        index.zero_starts, index.zero_ends, index.zero_regions,
+        index.member_starts, index.member_ends, index.region_offsets
+    )
+    return header + b''.join(_uint32_bytes(values) for values in arrays)
+
+
+def decode_regions(blob):
+    """
+    Unpacks bytes produced by encode_regions into a ZeroRegionIndex.
+    """
+    if blob is None:
+        return None
+
+    blob = bytes(blob)
+    height, width, zero_runs, member_runs, regions = REGION_HEADER.unpack_from(blob)
+    lengths = (zero_runs, zero_runs, zero_runs, member_runs, member_runs, regions + 1)
+
+    arrays = []
+    offset = REGION_HEADER.size
+    for length in lengths:
+        values = array('I')
+        values.frombytes(blob[offset:offset + 4 * length])
+        if sys.byteorder == 'big':
+            values.byteswap()
+        arrays.append(values)
+        offset += 4 * length
+
+    return ZeroRegionIndex(height, width, *arrays)
+
+
+def _uint32_bytes(values):
+    values = array('I', values)
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values.tobytes()
+
+
+def _pack_nibbles(nibbles, padding):
+    if len(nibbles) % 2:
+        nibbles.append(padding)
+    return bytes(high << 4 | low for high, low in zip(nibbles[0::2], nibbles[1::2]))
+
+
+def board_hash(blob):
+    """
+    Returns a short content hash of a packed board, used to index boards by content.
+
+    Example:
+        board_hash(encode_cells([['']])) -> a 32 character hex digest
+    """
+    if blob is None:
+        return None
+    return hashlib.blake2b(bytes(blob), digest_size=16).hexdigest()
+
+
+def peek_cell(blob, row, col):
+    """
+    Reads a single cell state straight from a packed player board.
+
+    This avoids decoding the whole board when only one cell is needed.
+
+    Args:
+        blob: bytes produced by encode_cells
+        row: Row index of the cell (0-based)
+        col: Column index of the cell (0-based)
+
+    Returns:
+        The cell string ('', '0'-'8', 'M' or 'F')
+    """
+    height, width = board_dimensions(blob)
+    index = row * width + col
+    byte = blob[HEADER.size + (index >> 1)]
+    nibble = byte & 0xF if index & 1 else byte >> 4
+    return _NIBBLE_TO_STATE[nibble]
+
+
+def poke_cell(blob, row, col, state):
+    """
+    Writes a single cell state straight into a packed player board.
+
+    Args:
+        blob: bytes produced by encode_cells
+        row: Row index of the cell (0-based)
+        col: Column index of the cell (0-based)
+        state: The new cell string ('', '0'-'8', 'M' or 'F')
+
+    Returns:
+        bytes: the updated packed board
+    """
+    height, width = board_dimensions(blob)
+    index = row * width + col
+    packed = bytearray(blob)
+    position = HEADER.size + (index >> 1)
+    nibble = _STATE_TO_NIBBLE[state]
+    if index & 1:
+        packed[position] = packed[position] & 0xF0 | nibble
+    else:
+        packed[position] = packed[position] & 0x0F | nibble << 4
+    return bytes(packed)
@@ -0,0 +1,93 @@
+"""
+Board engines implementing generation, neighbour counting and flood-fill reveal.
+
+Every engine module exposes the same five functions:
+- generate_board(width, height, mines)
+- compute_counts(internal_board)
+- index_zero_regions(internal_board, counts)
+- flood_reveal(board, row, col, internal_board, counts, changes=None)
+- flood_reveal_many(board, cells, internal_board, counts, changes=None)
+
+The engine is chosen with the MINESWEEPER_ENGINE setting. 'auto' uses the
+NumPy engine when NumPy is installed and the pure-Python engine otherwise.
+
+Engines work on player boards given as lists of rows. Boards loaded from a
+game are GameBoard handles, which are such lists that also carry the game's id.
+"""
+import logging
+from importlib import import_module
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class GameBoard(list):
+    """
+    A player board (a list of rows) that knows which game it belongs to, so the
+    game never has to be looked up from the board's contents.
+    """
+
+    def __init__(self, rows=(), game_id=None):
+        super().__init__(rows)
+        self.game_id = game_id
+
+
+ENGINES = {
+    'python': 'minesweeper_backend.engines.python_engine',
+    'numpy': 'minesweeper_backend.engines.numpy_engine',
+}
+
+
+def numpy_available():
+    try:
+        import numpy  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def engine_name(name=None):
+    """
+    Resolves an engine name, as given to get_engine, to 'python' or 'numpy'.
+
+    Raises:
+        ValueError: If the engine name is unknown
+    """
+    if name is None:
+        name = getattr(settings, 'MINESWEEPER_ENGINE', 'auto')
+
+    if name == 'auto':
+        name = 'numpy' if numpy_available() else 'python'
+
+    if name not in ENGINES:
+        raise ValueError(f"Unknown board engine: {name}")
+
+    return name
+
+
+def get_engine(name=None):
+    """
+    Returns the engine module for the given name.
+
+    Args:
+        name: 'python', 'numpy' or 'auto'; defaults to settings.MINESWEEPER_ENGINE
+
+    Raises:
+        ValueError: If the engine name is unknown
+    """
+    return import_module(ENGINES[engine_name(name)])
+
+
+def log_engine():
+    """
+    Logs the board engine the settings select. Called by startup.startup(),
+    so a deployment missing NumPy shows up in its logs.
+    """
+    configured = getattr(settings, 'MINESWEEPER_ENGINE', 'auto')
+    name = engine_name(configured)
+    if configured == 'auto' and name == 'python':
+        logger.warning("Board engine 'auto' picked the python engine: NumPy is not installed")
+    else:
+        logger.info("Board engine %r picked the %s engine", configured, name)
+    return name
@@ -0,0 +1,264 @@
+"""
+NumPy board engine.
+
+Mines are placed by sampling without replacement, counts come from summing
+the eight shifted copies of the mine mask (a 3x3 convolution), and cascades
+expand one frontier at a time over flat cell indices instead of one cell at
+a time.
+"""
+from array import array
+
+import numpy as np
+
+from minesweeper_backend.regions import ZeroRegionIndex
+
+_DIGITS = np.array([str(n) for n in range(9)])
+
+# Offsets of the eight neighbours of a cell, as (row, col) pairs
+_NEIGHBOURS = [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)]
+
+
+def generate_board(width, height, mines):
+    """
+    Places mines with a random permutation and computes the neighbour counts.
+
+    There is no retry loop, so dense boards cost the same as sparse ones.
+
+    Returns:
+        Dictionary with 'internal_board', 'player_board', 'counts' and 'regions'
+    """
+    rng = np.random.default_rng()
+    mine_mask = np.zeros(width * height, dtype=bool)
+    mine_mask[rng.permutation(width * height)[:mines]] = True
+    mine_mask = mine_mask.reshape(height, width)
+    counts = _count_mask(mine_mask)
+
+    return {
+        'internal_board': np.where(mine_mask, 'M', '').tolist(),
+        'player_board': [['' for _ in range(width)] for _ in range(height)],
+        'counts': counts.tolist(),
+        'regions': _index_regions(mine_mask, counts)
+    }
+
+
+def compute_counts(internal_board):
+    """
+    Computes the number of adjacent mines for every cell of the board.
+    """
+    if not internal_board or not internal_board[0]:
+        return [[] for _ in internal_board]
+    return _count_mask(np.array(internal_board) == 'M').tolist()
+
+
+def _count_mask(mine_mask):
+    height, width = mine_mask.shape
+    padded = np.pad(mine_mask.astype(np.uint8), 1)
+    counts = np.zeros((height, width), dtype=np.uint8)
+    for dr, dc in _NEIGHBOURS:
+        counts += padded[1 + dr:1 + dr + height, 1 + dc:1 + dc + width]
+    return counts
+
+
+def index_zero_regions(internal_board, counts):
+    """
+    Labels every connected region of empty cells and records the cells each
+    region uncovers, including its ring of numbered cells.
+
+    Returns:
+        ZeroRegionIndex of the board
+    """
+    if not internal_board or not internal_board[0]:
+        return ZeroRegionIndex.empty(len(internal_board), 0)
+    return _index_regions(np.array(internal_board) == 'M', np.asarray(counts, dtype=np.uint8))
+
+
+def _index_regions(mine_mask, count_grid):
+    height, width = count_grid.shape
+    padded_width = width + 2
+
+    zero = np.zeros((height + 2, padded_width), dtype=bool)
+    zero[1:-1, 1:-1] = (count_grid == 0) & ~mine_mask
+    zero = zero.ravel()
+    inside = np.zeros((height + 2, padded_width), dtype=bool)
+    inside[1:-1, 1:-1] = True
+    inside = inside.ravel()
+
+    cells = np.flatnonzero(zero)
+    if cells.size == 0:
+        return ZeroRegionIndex.empty(height, width)
+
+    # Union-find over the positions of the empty cells. Each round hooks the
+    # root of every edge's larger side under the smaller root, then
+    # compresses paths until every cell points straight at its root.
+    position = np.empty(zero.size, dtype=np.int64)
+    position[cells] = np.arange(cells.size)
+    edges_from, edges_to = [], []
+    for offset in (1, padded_width - 1, padded_width, padded_width + 1):
+        neighbours = cells + offset
+        linked = zero[neighbours]
+        edges_from.append(np.flatnonzero(linked))
+        edges_to.append(position[neighbours[linked]])
+    edges_from = np.concatenate(edges_from)
+    edges_to = np.concatenate(edges_to)
+
+    parent = np.arange(cells.size)
+    while True:
+        roots_from = parent[edges_from]
+        roots_to = parent[edges_to]
+        split = roots_from != roots_to
+        if not split.any():
+            break
+        np.minimum.at(
+            parent,
+            np.maximum(roots_from, roots_to)[split],
+            np.minimum(roots_from, roots_to)[split]
+        )
+        while True:
+            grandparent = parent[parent]
+            if np.array_equal(grandparent, parent):
+                break
+            parent = grandparent
+
+    # Number the roots in order; every cell takes the number of its root
+    is_root = parent == np.arange(cells.size)
+    region_count = int(is_root.sum())
+    regions = (np.cumsum(is_root) - 1)[parent]
+
+    # Members are the empty cells plus every numbered cell next to one.
+    # A numbered cell can border a region several times, so only the
+    # border keys need de-duplicating before everything is sorted by region.
+    border_keys = []
+    for dr, dc in _NEIGHBOURS:
+        neighbours = cells + dr * padded_width + dc
+        border = inside[neighbours] & ~zero[neighbours]
+        border_keys.append(regions[border] * zero.size + neighbours[border])
+    border_keys = np.sort(np.concatenate(border_keys))
+    if border_keys.size:
+        border_keys = border_keys[np.append(True, border_keys[1:] != border_keys[:-1])]
+    keys = np.sort(np.concatenate([regions * zero.size + cells, border_keys]))
+    member_regions, member_cells = np.divmod(keys, zero.size)
+
+    zero_starts, zero_ends, zero_regions = _runs(_unpad(cells, padded_width, width), regions, width)
+    member_starts, member_ends, run_regions = _runs(
+        _unpad(member_cells, padded_width, width), member_regions, width)
+    offsets = np.searchsorted(run_regions, np.arange(region_count + 1))
+
+    return ZeroRegionIndex(
+        height, width,
+        _to_array(zero_starts), _to_array(zero_ends), _to_array(zero_regions),
+        _to_array(member_starts), _to_array(member_ends), _to_array(offsets)
+    )
+
+
+def _unpad(cells, padded_width, width):
+    rows, cols = np.divmod(cells, padded_width)
+    return (rows - 1) * width + cols - 1
+
+
+def _runs(cells, labels, width):
+    # A run starts wherever the cell doesn't follow the previous one, a new
+    # row begins or the label changes
+    starts = np.ones(cells.size, dtype=bool)
+    starts[1:] = (np.diff(cells) != 1) | (cells[1:] % width == 0) | (np.diff(labels) != 0)
+    first = np.flatnonzero(starts)
+    last = np.append(first[1:], cells.size) - 1
+    return cells[first], cells[last] + 1, labels[first]
+
+
+def _to_array(values):
+    result = array('I')
+    result.frombytes(np.asarray(values, dtype=np.uint32).tobytes())
+    return result
+
+
+def flood_reveal(board, row, col, internal_board, counts, changes=None):
+    """
+    Reveals a cell and cascades through adjacent empty cells frontier by frontier.
+    Every changed cell is appended to changes as (row, col, value) when given.
+
+    Returns:
+        -1 if a mine was revealed, otherwise the number of cells revealed
+    """
+    return flood_reveal_many(board, [(row, col)], internal_board, counts, changes)
+
+
+def flood_reveal_many(board, cells, internal_board, counts, changes=None):
+    """
+    Reveals several cells at once, expanding every cascade in the same frontiers.
+    If one of the cells is a mine, only that mine is revealed.
+
+    Returns:
+        -1 if a mine was revealed, otherwise the number of cells revealed
+    """
+    cells = [(row, col) for row, col in dict.fromkeys(cells) if board[row][col] == '']
+    if not cells:
+        return 0
+
+    for row, col in cells:
+        if internal_board[row][col] == 'M':
+            board[row][col] = 'M'
+            if changes is not None:
+                changes.append((row, col, 'M'))
+            return -1
+
+    # Numbered cells don't cascade, so skip the array conversion entirely
+    if all(counts[row][col] > 0 for row, col in cells):
+        for row, col in cells:
+            board[row][col] = str(counts[row][col])
+            if changes is not None:
+                changes.append((row, col, board[row][col]))
+        return len(cells)
+
+    player = np.array(board)
+    count_grid = np.asarray(counts, dtype=np.uint8)
+    height, width = count_grid.shape
+
+    # Work on flat indices into a board padded by one cell on every side.
+    # Padding cells are never hidden, so the frontier stops at the edges
+    # without any bounds checks.
+    padded_width = width + 2
+    hidden = np.zeros((height + 2, padded_width), dtype=bool)
+    hidden[1:-1, 1:-1] = player == ''
+    hidden = hidden.ravel()
+    empty = np.zeros((height + 2, padded_width), dtype=bool)
+    empty[1:-1, 1:-1] = count_grid == 0
+    empty = empty.ravel()
+    offsets = np.array([dr * padded_width + dc for dr, dc in _NEIGHBOURS])
+
+    # Scratch space for de-duplicating candidates without sorting: when an
+    # index is written several times the last write wins, so only one copy
+    # of each candidate reads back its own position.
+    owner = np.empty(hidden.size, dtype=np.int64)
+
+    starts = np.array([(row + 1) * padded_width + col + 1 for row, col in cells])
+    hidden[starts] = False
+    frontier = starts[empty[starts]]
+    revealed = [starts]
+
+    # Neighbours of empty cells are never mines, so every hidden neighbour
+    # can be revealed; only the empty ones keep the cascade going.
+    while frontier.size:
+        candidates = (frontier[:, None] + offsets).ravel()
+        candidates = candidates[hidden[candidates]]
+        positions = np.arange(candidates.size)
+        owner[candidates] = positions
+        candidates = candidates[owner[candidates] == positions]
+        hidden[candidates] = False
+        revealed.append(candidates)
+        frontier = candidates[empty[candidates]]
+
+    cells = np.concatenate(revealed)
+    rows, cols = np.divmod(cells, padded_width)
+    rows -= 1
+    cols -= 1
+
+    values = _DIGITS[count_grid[rows, cols]]
+    player[rows, cols] = values
+    if changes is not None:
+        changes.extend(zip(rows.tolist(), cols.tolist(), values.tolist()))
+
+    # Only rows touched by the cascade are converted back to lists
+    for r in np.unique(rows).tolist():
+        board[r] = player[r].tolist()
+
+    return int(cells.size)
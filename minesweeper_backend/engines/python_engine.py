@@ -0,0 +1,195 @@
+"""
+Pure-Python board engine working directly on nested lists.
+
+This is the fallback used when NumPy is not installed.
+"""
+import random
+
+from minesweeper_backend.regions import ZeroRegionIndex, build_runs, region_offsets
+
+
+def generate_board(width, height, mines):
+    """
+    Places mines by rejection sampling and computes the neighbour counts.
+
+    Returns:
+        Dictionary with 'internal_board', 'player_board', 'counts' and 'regions'
+    """
+    internal_board = [['' for _ in range(width)] for _ in range(height)]
+    mines_placed = 0
+
+    while mines_placed < mines:
+        x = random.randint(0, height - 1)
+        y = random.randint(0, width - 1)
+
+        # Only place a mine if the cell doesn't already have one
+        if internal_board[x][y] != 'M':
+            internal_board[x][y] = 'M'
+            mines_placed += 1
+
+    # Create an empty board with the specified dimensions
+    player_board = [
+        ['' for _ in range(width)]
+        for _ in range(height)
+    ]
+
+    counts = compute_counts(internal_board)
+
+    return {
+        'internal_board': internal_board,
+        'player_board': player_board,
+        'counts': counts,
+        'regions': index_zero_regions(internal_board, counts)
+    }
+
+
+def compute_counts(internal_board):
+    """
+    Computes the number of adjacent mines for every cell of the board.
+    """
+    height = len(internal_board)
+    width = len(internal_board[0]) if height > 0 else 0
+    counts = [[0] * width for _ in range(height)]
+
+    # Each mine adds one to its neighbours, which is far cheaper than
+    # scanning the 3x3 block around every cell
+    for row in range(height):
+        for col in range(width):
+            if internal_board[row][col] != 'M':
+                continue
+            for i in range(max(0, row-1), min(height, row+2)):
+                for j in range(max(0, col-1), min(width, col+2)):
+                    if i == row and j == col:
+                        continue
+                    counts[i][j] += 1
+
+    return counts
+
+
+def flood_reveal(board, row, col, internal_board, counts, changes=None):
+    """
+    Reveals a cell and cascades through adjacent empty cells with a stack.
+    Every changed cell is appended to changes as (row, col, value) when given.
+
+    Returns:
+        -1 if a mine was revealed, otherwise the number of cells revealed
+    """
+    return flood_reveal_many(board, [(row, col)], internal_board, counts, changes)
+
+
+def flood_reveal_many(board, cells, internal_board, counts, changes=None):
+    """
+    Reveals several cells at once and cascades through adjacent empty cells.
+    If one of the cells is a mine, only that mine is revealed.
+
+    Returns:
+        -1 if a mine was revealed, otherwise the number of cells revealed
+    """
+    height = len(board)
+    width = len(board[0]) if height > 0 else 0
+
+    # Check if any of the cells is a mine
+    for row, col in cells:
+        if board[row][col] == '' and internal_board[row][col] == 'M':
+            board[row][col] = 'M'
+            if changes is not None:
+                changes.append((row, col, 'M'))
+            return -1  # Game over!
+
+    # Track the number of cells revealed in this operation
+    cells_revealed = 0
+
+    # Use a stack to keep track of cells to process
+    # We start with the cells the player clicked
+    stack = list(cells)
+
+    # Keep track of cells we've already considered to avoid duplicates
+    visited = set()
+
+    # The cascade only ever spreads from cells with no adjacent mines,
+    # so it can never reach a mine
+    while stack:
+        current_row, current_col = stack.pop()
+
+        if (current_row, current_col) in visited:
+            continue
+
+        if board[current_row][current_col] != '':
+            continue
+
+        visited.add((current_row, current_col))
+
+        # Update the player's board with the count (or '0' for empty cells)
+        mine_count = counts[current_row][current_col]
+        board[current_row][current_col] = str(mine_count)
+        cells_revealed += 1
+        if changes is not None:
+            changes.append((current_row, current_col, str(mine_count)))
+
+        # If the current cell has no adjacent mines, reveal all adjacent cells
+        if mine_count == 0:
+            # Check all 8 adjacent cells (horizontally, vertically, and diagonally)
+            for i in range(max(0, current_row-1), min(height, current_row+2)):
+                for j in range(max(0, current_col-1), min(width, current_col+2)):
+
+                    if i == current_row and j == current_col:
+                        continue
+
+                    if board[i][j] != '' or (i, j) in visited:
+                        continue
+
+                    stack.append((i, j))
+
+    return cells_revealed
+
+
+def index_zero_regions(internal_board, counts):
+    """
+    Labels every connected region of empty cells and records the cells each
+    region uncovers, including its ring of numbered cells.
+
+    Returns:
+        ZeroRegionIndex of the board
+    """
+    height = len(counts)
+    width = len(counts[0]) if height > 0 else 0
+    labels = [[-1] * width for _ in range(height)]
+    zero_cells = []
+    member_cells = []
+    region = 0
+
+    for row in range(height):
+        for col in range(width):
+            if labels[row][col] != -1 or counts[row][col] or internal_board[row][col] == 'M':
+                continue
+
+            # Collect the region with a stack, noting the border cells it touches
+            labels[row][col] = region
+            stack = [(row, col)]
+            members = set()
+            while stack:
+                current_row, current_col = stack.pop()
+                members.add(current_row * width + current_col)
+                zero_cells.append((current_row * width + current_col, region))
+
+                for i in range(max(0, current_row-1), min(height, current_row+2)):
+                    for j in range(max(0, current_col-1), min(width, current_col+2)):
+                        if counts[i][j]:
+                            members.add(i * width + j)
+                        elif labels[i][j] == -1:
+                            labels[i][j] = region
+                            stack.append((i, j))
+
+            member_cells.extend((cell, region) for cell in sorted(members))
+            region += 1
+
+    zero_cells.sort()
+    zero_starts, zero_ends, zero_regions = build_runs(
+        [cell for cell, _ in zero_cells], [label for _, label in zero_cells], width)
+    member_starts, member_ends, member_regions = build_runs(
+        [cell for cell, _ in member_cells], [label for _, label in member_cells], width)
+
+    return ZeroRegionIndex(
+        height, width, zero_starts, zero_ends, zero_regions,
+        member_starts, member_ends, region_offsets(member_regions, region)
+    )
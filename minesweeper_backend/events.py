@@ -0,0 +1,166 @@
+"""
+In-process channel layer for live game events.
+
+Every move that changes a board publishes one event to its game's channel.
+A channel fans each event out to the game's subscribers (the event stream
+views) and keeps the most recent events, so a client reconnecting with the
+version it last saw is sent only what it missed.
+
+Events are plain dictionaries:
+
+    {
+        'type': 'reveal' | 'flag' | 'end',
+        'base_version': version the changes apply to,
+        'version': version after the changes,
+        'changes': [[row, col, value], ...],
+        'game_over': bool,
+        'game_won': bool
+    }
+
+'end' is the event of the move that finished the game.
+
+Channels live in the process that published the events; deployments with
+several processes see only the moves made in their own process.
+"""
+import asyncio
+import threading
+from collections import OrderedDict, deque
+
+from django.conf import settings
+
+_channels = OrderedDict()
+_channels_lock = threading.Lock()
+
+
+def history_size():
+    return getattr(settings, 'MINESWEEPER_EVENT_HISTORY', 64)
+
+
+def max_channels():
+    return getattr(settings, 'MINESWEEPER_EVENT_CHANNELS', 10000)
+
+
+class GameChannel:
+    """
+    The single producer of one game's events: fans them out to every
+    subscriber and keeps the last history_size() of them for resuming.
+    """
+
+    def __init__(self):
+        self.history = deque(maxlen=history_size())
+        self.subscribers = set()
+        self.lock = threading.Lock()
+
+    def publish(self, event):
+        with self.lock:
+            self.history.append(event)
+            subscribers = list(self.subscribers)
+        for subscription in subscribers:
+            subscription.deliver(event)
+
+    def backlog(self, since):
+        """
+        Returns the events after version since, or None if the history doesn't
+        reach back far enough to bring a board at that version up to date.
+        """
+        with self.lock:
+            events = [event for event in self.history if event['version'] > since]
+        if events and events[0]['base_version'] != since:
+            return None
+        return events
+
+
+class Subscription:
+    """
+    A subscriber's view of a game channel, used from an event loop.
+
+    Events are handed over thread-safely, since moves are published from
+    request threads as well as from the event loop. A subscriber that falls
+    more than history_size() events behind misses events; the stream notices
+    the gap in versions and sends the whole board instead.
+    """
+
+    def __init__(self, game_id):
+        self.game_id = game_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=history_size())
+        self.channel = get_channel(game_id)
+        with self.channel.lock:
+            self.channel.subscribers.add(self)
+
+    def deliver(self, event):
+        try:
+            self.loop.call_soon_threadsafe(self._put, event)
+        except RuntimeError:
+            # The subscriber's event loop is gone
+            self.close()
+
+    def _put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            pass
+
+    async def get(self):
+        return await self.queue.get()
+
+    def backlog(self, since):
+        return self.channel.backlog(since)
+
+    def close(self):
+        with self.channel.lock:
+            self.channel.subscribers.discard(self)
+
+
+def get_channel(game_id):
+    """
+    Returns the channel of a game, creating it if needed.
+
+    At most max_channels() channels are kept; the least recently used ones
+    without subscribers are dropped first.
+    """
+    key = str(game_id)
+    with _channels_lock:
+        channel = _channels.get(key)
+        if channel is None:
+            channel = _channels[key] = GameChannel()
+            _evict()
+        else:
+            _channels.move_to_end(key)
+        return channel
+
+
+def _evict():
+    excess = len(_channels) - max_channels()
+    if excess <= 0:
+        return
+    for key in [key for key, channel in _channels.items() if not channel.subscribers][:excess]:
+        del _channels[key]
+
+
+def publish(game, kind, base_version, changes):
+    """
+    Publishes the changes a move made to a game.
+
+    Args:
+        game: The game after the move
+        kind: 'reveal' or 'flag'; moves that finish the game are sent as 'end'
+        base_version: Version of the game before the move
+        changes: (row, col, value) for every changed cell
+    """
+    if game.version == base_version:
+        return
+    get_channel(game.id).publish({
+        'type': 'end' if game.game_over or game.game_won else kind,
+        'base_version': base_version,
+        'version': game.version,
+        'changes': [list(change) for change in changes],
+        'game_over': game.game_over,
+        'game_won': game.game_won
+    })
+
+
+def reset():
+    """Drops every channel. Used by the tests."""
+    with _channels_lock:
+        _channels.clear()
@@ -0,0 +1,100 @@
+"""
+Executors for work that shouldn't run on the request thread or event loop.
+"""
+import asyncio
+import contextvars
+import functools
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from django.conf import settings
+
+_board_executor = None
+_creation_executor = None
+_generation_executor = None
+_generation_lock = threading.Lock()
+
+
+def board_executor():
+    """
+    Returns the executor that runs CPU-bound board work (generation, cascades,
+    packing) for the async views. Its size is MINESWEEPER_BOARD_WORKERS, so a
+    burst of huge boards queues up instead of starving everything else.
+    """
+    global _board_executor
+    if _board_executor is None:
+        _board_executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, 'MINESWEEPER_BOARD_WORKERS', 4),
+            thread_name_prefix='board'
+        )
+    return _board_executor
+
+
+async def run_board_work(func, *args, **kwargs):
+    """
+    Runs func(*args, **kwargs) in the board executor and waits for it without
+    blocking the event loop. The work must not touch the database.
+
+    The work runs in a copy of the caller's context, so it is timed as part
+    of the caller's request.
+    """
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(board_executor(), functools.partial(context.run, func, *args, **kwargs))
+
+
+def creation_executor():
+    """
+    Returns the executor that creates no-guess games for the sync views (see
+    views.start_pending_game): its threads wait on the generation processes
+    and save the game, so request threads never do. Work may use the
+    database; it must close its connection when done.
+    """
+    global _creation_executor
+    if _creation_executor is None:
+        _creation_executor = ThreadPoolExecutor(max_workers=generation_workers(), thread_name_prefix='creation')
+    return _creation_executor
+
+
+def generation_workers():
+    """Processes in the generation executor: MINESWEEPER_GENERATION_WORKERS, or one per core."""
+    return getattr(settings, 'MINESWEEPER_GENERATION_WORKERS', None) or os.cpu_count() or 1
+
+
+def _setup_worker():
+    # Spawned workers set up the apps; forked ones inherit them
+    import django
+    from django.apps import apps
+    if not apps.ready:
+        django.setup()
+
+
+def generation_executor():
+    """
+    Returns the process pool that generates boards: candidate no-guess boards
+    (see generation.py) and the boards of bulk game creation (see bulk.py).
+    The work is pure Python and CPU-bound, so it needs processes rather than
+    threads to use more than one core, and it keeps generation off the
+    request threads. Work submitted to it must not touch the database.
+
+    Workers are started with MINESWEEPER_GENERATION_START_METHOD ('spawn' by
+    default) rather than forked, so starting one from a process running
+    other threads is safe. They are started on first use.
+    """
+    global _generation_executor
+    with _generation_lock:
+        if _generation_executor is None:
+            context = multiprocessing.get_context(
+                getattr(settings, 'MINESWEEPER_GENERATION_START_METHOD', 'spawn')
+            )
+            _generation_executor = ProcessPoolExecutor(
+                max_workers=generation_workers(), mp_context=context, initializer=_setup_worker
+            )
+        return _generation_executor
+
+
+def start_generation_executor():
+    """Creates the generation executor. Called by startup.startup(), on the main thread."""
+    generation_executor()
@@ -0,0 +1,202 @@
+"""
+No-guess board generation.
+
+A no-guess board can be played to the end by deduction alone from a start
+cell that is certainly safe. Candidates are generated with no mine in the
+3x3 block around the start cell, so the first click opens a region. Each
+candidate is then played by the solver (solver.py) from there, revealing
+every cell it proves safe, until the board is won or the solver is stuck.
+
+Most candidates fail, and playing one is CPU-bound, so attempts run in the
+generation process pool (executors.generation_executor), one per worker.
+Each attempt tries candidates for a short slice of time and new attempts are
+submitted until one passes or MINESWEEPER_NO_GUESS_TIME_BUDGET runs out, so
+workers stop soon after a board is found. Attempts never read the
+settings: whatever they need is passed in.
+"""
+import asyncio
+import random
+import secrets
+from concurrent.futures import FIRST_COMPLETED, wait
+from time import perf_counter
+
+from django.conf import settings
+
+from .engines import python_engine
+from .executors import generation_executor, generation_workers
+from .solver import Solver
+
+# Seconds each attempt tries candidates for before reporting back
+ATTEMPT_SLICE = 0.25
+
+
+class GenerationTimeout(Exception):
+    """Raised when no candidate board passes within the time budget."""
+
+
+def start_cell(width, height):
+    """The cell a no-guess game opens at: the centre of the board."""
+    return height // 2, width // 2
+
+
+def start_area(width, height):
+    """Indexes of the start cell and its neighbours, which never hold a mine."""
+    row, col = start_cell(width, height)
+    return {
+        r * width + c
+        for r in range(max(0, row - 1), min(height, row + 2))
+        for c in range(max(0, col - 1), min(width, col + 2))
+    }
+
+
+def max_mines(width, height):
+    """The most mines a no-guess board of this size can hold."""
+    return width * height - len(start_area(width, height))
+
+
+def place_mines(width, height, mines, rng=random):
+    """Returns the indexes of mines placed at random outside the start area."""
+    excluded = start_area(width, height)
+    return rng.sample([i for i in range(width * height) if i not in excluded], mines)
+
+
+def mine_rows(width, height, cells):
+    """The internal board of a list of mine indexes."""
+    internal_board = [['' for _ in range(width)] for _ in range(height)]
+    for i in cells:
+        internal_board[i // width][i % width] = 'M'
+    return internal_board
+
+
+def solvable(width, height, mines, cells, enumeration_limit=None):
+    """
+    Plays a board from its start cell, revealing every cell the solver proves
+    safe, and returns whether it is won without guessing.
+
+    The pure-Python engine is used whatever MINESWEEPER_ENGINE says: the
+    boards are plain lists revealed a few cells at a time.
+    """
+    internal_board = mine_rows(width, height, cells)
+    counts = python_engine.compute_counts(internal_board)
+    board = [['' for _ in range(width)] for _ in range(height)]
+    python_engine.flood_reveal(board, *start_cell(width, height), internal_board, counts)
+
+    solver = Solver(width, height, mines, enumeration_limit=enumeration_limit)
+    while True:
+        solver.update(board)
+        solver.solve()
+        cells_to_reveal = [divmod(i, width) for i in solver.safe if board[i // width][i % width] == '']
+        if not cells_to_reveal:
+            break
+        python_engine.flood_reveal_many(board, cells_to_reveal, internal_board, counts)
+
+    return sum(row.count('') for row in board) == mines
+
+
+def attempt(width, height, mines, time_budget, enumeration_limit, seed):
+    """
+    Tries random candidates for up to time_budget seconds. Runs in a worker process.
+
+    Returns:
+        The mine indexes of the first solvable candidate, or None
+    """
+    rng = random.Random(seed)
+    deadline = perf_counter() + time_budget
+    while perf_counter() < deadline:
+        cells = place_mines(width, height, mines, rng)
+        if solvable(width, height, mines, cells, enumeration_limit):
+            return cells
+    return None
+
+
+def no_guess_board(width, height, cells):
+    """The boards of a game from the mine indexes of a verified candidate."""
+    return {
+        'internal_board': mine_rows(width, height, cells),
+        'player_board': [['' for _ in range(width)] for _ in range(height)],
+        'start': start_cell(width, height)
+    }
+
+
+def _submit(width, height, mines, time_budget):
+    return generation_executor().submit(
+        attempt, width, height, mines, min(ATTEMPT_SLICE, time_budget),
+        getattr(settings, 'MINESWEEPER_SOLVER_ENUMERATION_LIMIT', 18), secrets.randbits(64)
+    )
+
+
+def _budget(time_budget):
+    if time_budget is None:
+        time_budget = getattr(settings, 'MINESWEEPER_NO_GUESS_TIME_BUDGET', 5.0)
+    return time_budget
+
+
+def generate_no_guess_board(width, height, mines, time_budget=None):
+    """
+    Generates a board that can be solved without guessing from its start cell,
+    trying candidates in every generation worker at once.
+
+    Args:
+        width: Width of the board (number of columns)
+        height: Height of the board (number of rows)
+        mines: Number of mines, at most max_mines(width, height)
+        time_budget: Seconds to look for; defaults to settings.MINESWEEPER_NO_GUESS_TIME_BUDGET
+
+    Returns:
+        Dictionary with 'internal_board', 'player_board' and 'start', the
+        (row, col) of the start cell
+
+    Raises:
+        GenerationTimeout: If no candidate passed within the time budget
+    """
+    time_budget = _budget(time_budget)
+    deadline = perf_counter() + time_budget
+    pending = {_submit(width, height, mines, time_budget) for _ in range(generation_workers())}
+    try:
+        while pending:
+            done, pending = wait(pending, timeout=max(0, deadline - perf_counter()), return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for future in done:
+                cells = future.result()
+                if cells is not None:
+                    return no_guess_board(width, height, cells)
+            remaining = deadline - perf_counter()
+            if remaining > 0:
+                pending.update(_submit(width, height, mines, remaining) for _ in done)
+    finally:
+        for future in pending:
+            future.cancel()
+    raise GenerationTimeout
+
+
+async def agenerate_no_guess_board(width, height, mines, time_budget=None):
+    """
+    generate_no_guess_board for the async views: waits for the workers
+    without holding a thread.
+    """
+    time_budget = _budget(time_budget)
+    deadline = perf_counter() + time_budget
+    pending = {
+        asyncio.wrap_future(_submit(width, height, mines, time_budget)) for _ in range(generation_workers())
+    }
+    try:
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, timeout=max(0, deadline - perf_counter()), return_when=asyncio.FIRST_COMPLETED
+            )
+            if not done:
+                break
+            for future in done:
+                cells = future.result()
+                if cells is not None:
+                    return no_guess_board(width, height, cells)
+            remaining = deadline - perf_counter()
+            if remaining > 0:
+                pending.update(
+                    asyncio.wrap_future(_submit(width, height, mines, remaining)) for _ in done
+                )
+    finally:
+        for future in pending:
+            future.cancel()
+    raise GenerationTimeout
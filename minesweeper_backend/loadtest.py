@@ -0,0 +1,373 @@
+"""
+HTTP load test of the game endpoints.
+
+A live server runs in this process on a free local port, and simulated
+players hit it with the same requests the frontend makes. Each player
+creates a game, loads it, then reveals random hidden cells until the game
+ends, reloading it every few moves. Players can share games, which makes
+their moves compete for the same rows.
+
+The report gives the throughput, the latency percentiles and status codes of
+each endpoint, the failed requests, and the lock contention seen by the
+server: moves retried after losing the compare-and-swap on the game version
+(the store's move_retries counter), moves rejected as busy (503), and SQLite
+"database is locked" errors.
+
+Everything runs offline: the server uses the project's settings (SQLite
+and the LocMem cache), pointed at a throwaway database unless told
+otherwise.
+"""
+import json
+import logging
+import os
+import queue
+import random
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from urllib.error import HTTPError, URLError
+from urllib.request import Request, urlopen
+
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management import call_command
+from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+from django.db import connections
+
+from . import metrics
+
+# Percentiles reported for every endpoint
+PERCENTILES = (50, 90, 95, 99)
+
+
+class QuietRequestHandler(WSGIRequestHandler):
+    """Request handler that doesn't log every request."""
+
+    def log_message(self, format, *args):
+        pass
+
+
+class LiveServer:
+    """
+    The project served on a local port from a background thread.
+
+    Usable as a context manager; the server stops when the block ends.
+    """
+
+    def __init__(self, host='127.0.0.1', port=0):
+        self.server = ThreadedWSGIServer((host, port), QuietRequestHandler, allow_reuse_address=False)
+        self.server.set_app(WSGIHandler())
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+
+
+@contextmanager
+def use_database(path=None):
+    """
+    Points the default database at a migrated SQLite file while the block runs.
+
+    Without a path a temporary file is used and removed afterwards, so a
+    load test never touches the project's database.
+    """
+    connection = connections['default']
+    original = connection.settings_dict['NAME']
+    temporary = path is None
+    if temporary:
+        handle, path = tempfile.mkstemp(prefix='minesweeper-load-', suffix='.sqlite3')
+        os.close(handle)
+
+    connection.close()
+    connection.settings_dict['NAME'] = str(path)
+    try:
+        call_command('migrate', verbosity=0, interactive=False)
+        yield path
+    finally:
+        connection.close()
+        connection.settings_dict['NAME'] = original
+        if temporary:
+            os.remove(path)
+
+
+class ContentionCounter:
+    """
+    Counts the moves the store retried after another move changed the game,
+    since the counter was created.
+    """
+
+    def __init__(self):
+        self.start = metrics.counter('move_retries')
+
+    @property
+    def retries(self):
+        return metrics.counter('move_retries') - self.start
+
+
+@contextmanager
+def count_contention(quiet=True):
+    """
+    Yields a ContentionCounter of the moves retried while the block runs.
+
+    With quiet, the request logs of the project and of Django are silenced
+    while the block runs.
+    """
+    silenced = [logging.getLogger(name) for name in ('minesweeper_backend', 'django')] if quiet else []
+    saved = [(logger, list(logger.handlers), logger.level) for logger in silenced]
+
+    for logger in silenced:
+        logger.handlers = [logging.NullHandler()]
+        logger.setLevel(logging.WARNING)
+    try:
+        yield ContentionCounter()
+    finally:
+        for logger, handlers, level in saved:
+            logger.handlers = handlers
+            logger.setLevel(level)
+
+
+class Stats:
+    """Latencies and outcomes of the requests made by every player."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = {}
+        self.statuses = {}
+        self.errors = {}
+        self.games = 0
+        self.finished = 0
+
+    def record(self, endpoint, status, latency, error=None):
+        with self.lock:
+            self.latencies.setdefault(endpoint, []).append(latency)
+            statuses = self.statuses.setdefault(endpoint, {})
+            statuses[status] = statuses.get(status, 0) + 1
+            if error:
+                self.errors[error] = self.errors.get(error, 0) + 1
+
+    def game_played(self, finished):
+        with self.lock:
+            self.games += 1
+            self.finished += int(finished)
+
+
+def percentile(values, percent):
+    """Returns the nearest-rank percentile of sorted values."""
+    if not values:
+        return 0.0
+    rank = max(1, -(-len(values) * percent // 100))
+    return values[int(rank) - 1]
+
+
+def summarize(latencies, statuses):
+    """Summarizes the latencies (in seconds) and status codes of one endpoint."""
+    values = sorted(latencies)
+    summary = {
+        'requests': len(values),
+        'statuses': {str(code): count for code, count in sorted(statuses.items(), key=lambda item: str(item[0]))},
+        'mean_ms': sum(values) / len(values) * 1000 if values else 0.0,
+        'max_ms': values[-1] * 1000 if values else 0.0,
+    }
+    for percent in PERCENTILES:
+        summary[f"p{percent}_ms"] = percentile(values, percent) * 1000
+    return summary
+
+
+class Player:
+    """
+    A simulated player making requests with its own random generator.
+
+    The player keeps its own copy of the board, sends its version with every
+    reveal and applies the changes it gets back, as the frontend does.
+    """
+
+    def __init__(self, base_url, stats, rng, timeout=30):
+        self.base_url = base_url
+        self.stats = stats
+        self.rng = rng
+        self.timeout = timeout
+
+    def request(self, endpoint, method, path, data=None):
+        """
+        Makes a request and records it under endpoint.
+
+        Returns:
+            Tuple (status, decoded JSON body or None); status is 0 when the
+            server couldn't be reached
+        """
+        body = json.dumps(data).encode() if data is not None else None
+        request = Request(
+            self.base_url + path, data=body, method=method,
+            headers={'Content-Type': 'application/json', 'Accept': 'application/json'}
+        )
+        start = time.perf_counter()
+        try:
+            with urlopen(request, timeout=self.timeout) as response:
+                status, content = response.status, response.read()
+        except HTTPError as e:
+            status, content = e.code, e.read()
+        except (URLError, OSError) as e:
+            self.stats.record(endpoint, 0, time.perf_counter() - start, f"{endpoint}: {e}")
+            return 0, None
+        latency = time.perf_counter() - start
+
+        try:
+            payload = json.loads(content) if content else None
+        except ValueError:
+            payload = None
+
+        error = None
+        if status >= 500:
+            message = payload.get('error', '') if isinstance(payload, dict) else ''
+            error = f"{endpoint} {status}: {'database is locked' if 'locked' in message else message[:80]}"
+        self.stats.record(endpoint, status, latency, error)
+        return status, payload
+
+    def create(self, width, height, mines):
+        status, payload = self.request('create', 'POST', '/api/games/', {'width': width, 'height': height, 'mines': mines})
+        return payload['game_id'] if status == 201 else None
+
+    def play(self, game_id, max_moves, get_every):
+        """
+        Reveals random hidden cells until the game ends or max_moves is reached.
+
+        Returns:
+            True if the game finished
+        """
+        status, payload = self.request('get', 'GET', f"/api/games/{game_id}/")
+        if status != 200:
+            return False
+        board = payload['board_state']
+        version = payload.get('version')
+        moves = 0
+
+        while moves < max_moves:
+            hidden = [(row, col) for row, cells in enumerate(board) for col, cell in enumerate(cells) if cell == '']
+            if not hidden:
+                return True
+            row, col = self.rng.choice(hidden)
+            status, payload = self.request(
+                'reveal', 'POST', f"/api/games/{game_id}/reveal/", {'row': row, 'col': col, 'version': version}
+            )
+            moves += 1
+            if status == 400:
+                # Another player finished the game
+                return True
+            if status != 200:
+                continue
+
+            if 'changes' in payload:
+                for change_row, change_col, value in payload['changes']:
+                    board[change_row][change_col] = value
+            elif 'board_state' in payload:
+                board = payload['board_state']
+            version = payload.get('version', version)
+            if payload.get('game_over') or payload.get('game_won'):
+                return True
+
+            if get_every and moves % get_every == 0:
+                self.request('get', 'GET', f"/api/games/{game_id}/")
+        return False
+
+
+def run_load_test(base_url, players=10, games=3, sizes=((9, 9),), density=0.15, players_per_game=1,
+                  max_moves=500, get_every=5, seed=None, timeout=30):
+    """
+    Runs the simulated players against a server and reports the results.
+
+    Args:
+        base_url: URL of the server, without a trailing slash
+        players: Number of concurrent players
+        games: Number of games each player plays
+        sizes: (width, height) board sizes, used in turn
+        density: Fraction of the cells that are mines
+        players_per_game: Players sharing every game; the first of each group creates it
+        max_moves: Reveals after which a player gives up on a game
+        get_every: Moves between reloads of the game; 0 never reloads
+        seed: Seed of the players' random generators
+        timeout: Seconds before a request is abandoned
+
+    Returns:
+        Dictionary with the totals, 'throughput' in requests per second,
+        'endpoints' summaries, the 'errors' by kind and the 'busy' (503)
+        and 'database_locked' counts
+    """
+    stats = Stats()
+    master = random.Random(seed)
+    groups = [list(range(start, min(start + players_per_game, players))) for start in range(0, players, players_per_game)]
+    handoffs = {group[0]: queue.Queue() for group in groups}
+
+    def leader_of(index):
+        return index - index % players_per_game
+
+    def run_player(index, rng):
+        player = Player(base_url, stats, rng, timeout)
+        leader = leader_of(index)
+        group_size = len(next(group for group in groups if group[0] == leader))
+
+        for round_number in range(games):
+            width, height = sizes[(index // players_per_game + round_number) % len(sizes)]
+            if index == leader:
+                mines = max(1, min(int(width * height * density), width * height - 1))
+                game_id = player.create(width, height, mines)
+                for _ in range(group_size - 1):
+                    handoffs[leader].put(game_id)
+            else:
+                try:
+                    game_id = handoffs[leader].get(timeout=timeout)
+                except queue.Empty:
+                    game_id = None
+            if game_id is None:
+                continue
+            stats.game_played(player.play(game_id, max_moves, get_every))
+
+    threads = [
+        threading.Thread(target=run_player, args=(index, random.Random(master.random())), daemon=True)
+        for index in range(players)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    total = sum(len(latencies) for latencies in stats.latencies.values())
+    every_latency = [latency for latencies in stats.latencies.values() for latency in latencies]
+    every_status = {}
+    for statuses in stats.statuses.values():
+        for code, count in statuses.items():
+            every_status[code] = every_status.get(code, 0) + count
+    failed = sum(count for code, count in every_status.items() if code == 0 or code >= 500)
+
+    return {
+        'players': players,
+        'players_per_game': players_per_game,
+        'sizes': [f"{width}x{height}" for width, height in sizes],
+        'density': density,
+        'games': stats.games,
+        'finished_games': stats.finished,
+        'elapsed_s': elapsed,
+        'requests': total,
+        'throughput': total / elapsed if elapsed else 0.0,
+        'error_rate': failed / total if total else 0.0,
+        'overall': summarize(every_latency, every_status),
+        'endpoints': {
+            endpoint: summarize(latencies, stats.statuses[endpoint])
+            for endpoint, latencies in sorted(stats.latencies.items())
+        },
+        'errors': dict(sorted(stats.errors.items(), key=lambda item: -item[1])),
+        'busy': every_status.get(503, 0),
+        'database_locked': sum(count for error, count in stats.errors.items() if 'database is locked' in error),
+    }
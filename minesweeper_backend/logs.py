@@ -0,0 +1,122 @@
+"""
+Logging that stays off the request path.
+
+With MINESWEEPER_LOG_QUEUE set, the handlers of the project's loggers are
+moved behind a queue when the app starts: a request only puts the record on
+the queue, and a listener thread formats it and does the console and file
+I/O. The queue is bounded; when it is full, records are dropped rather than
+blocking the request.
+
+High-frequency messages are tagged with a sample type, e.g.
+
+    logger.info("Revealed cell (%s, %s)", row, col, extra={'sample': 'reveal'})
+
+and SamplingFilter keeps one in every N of them, N being the rate configured
+for the type. Untagged records always pass.
+"""
+import atexit
+import itertools
+import logging
+import queue
+import threading
+from logging.handlers import QueueHandler, QueueListener
+
+from django.conf import settings
+
+_listeners = []
+_lock = threading.Lock()
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps one in every rates[type] records tagged with extra={'sample': type}.
+
+    Every message of a type is sampled on its own, so messages that always
+    come together are not kept in lockstep.
+    """
+
+    def __init__(self, rates=None):
+        super().__init__()
+        self.rates = dict(rates or {})
+        self.counters = {}
+
+    def filter(self, record):
+        sample = getattr(record, 'sample', None)
+        rate = self.rates.get(sample, 1) if sample else 1
+        if rate <= 1:
+            return True
+        key = (sample, record.msg)
+        counter = self.counters.get(key)
+        if counter is None:
+            counter = self.counters.setdefault(key, itertools.count())
+        return next(counter) % rate == 0
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    Puts records on a bounded queue, dropping them when it is full.
+
+    Records are handed over unformatted, so the listener thread does the
+    formatting; loggers using it must not mutate the arguments of a call
+    after logging them.
+    """
+
+    def __init__(self, queue):
+        super().__init__(queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def start_queue_logging(logger_names, maxsize=10000):
+    """
+    Moves the handlers of the given loggers behind queues served by
+    background threads. Loggers sharing the same handlers share a queue.
+
+    Returns:
+        The queue handlers that were installed
+    """
+    installed = []
+    with _lock:
+        groups = {}
+        for name in logger_names:
+            logger = logging.getLogger(name)
+            handlers = tuple(handler for handler in logger.handlers if not isinstance(handler, QueueHandler))
+            if handlers:
+                groups.setdefault(handlers, []).append(logger)
+
+        for handlers, loggers in groups.items():
+            records = queue.Queue(maxsize)
+            handler = NonBlockingQueueHandler(records)
+            listener = QueueListener(records, *handlers, respect_handler_level=True)
+            listener.start()
+            _listeners.append(listener)
+            for logger in loggers:
+                logger.handlers = [handler]
+            installed.append(handler)
+    return installed
+
+
+def stop_queue_logging():
+    """Writes out the queued records and stops the listener threads."""
+    with _lock:
+        while _listeners:
+            _listeners.pop().stop()
+
+
+def configure():
+    """Starts queue logging for the project's loggers if MINESWEEPER_LOG_QUEUE is set."""
+    if not getattr(settings, 'MINESWEEPER_LOG_QUEUE', False):
+        return
+    start_queue_logging(
+        getattr(settings, 'MINESWEEPER_LOG_QUEUE_LOGGERS', ('minesweeper_backend', 'django')),
+        getattr(settings, 'MINESWEEPER_LOG_QUEUE_SIZE', 10000)
+    )
+    atexit.register(stop_queue_logging)
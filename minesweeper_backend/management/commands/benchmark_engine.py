@@ -0,0 +1,110 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from minesweeper_backend.benchmarks import (
+    CASES, DEFAULT_DENSITIES, DEFAULT_SIZES, compare_results, run_benchmarks
+)
+
+
+def parse_size(value):
+    try:
+        width, height = (int(part) for part in value.lower().split('x'))
+    except ValueError:
+        raise CommandError(f"Invalid size {value!r}, expected WIDTHxHEIGHT")
+    return width, height
+
+
+class Command(BaseCommand):
+    help = (
+        "Times the board engine over a grid of board sizes and mine densities, "
+        "and fails when a case tracked in a baseline has regressed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', default=','.join(f"{width}x{height}" for width, height in DEFAULT_SIZES),
+            help="Comma-separated board sizes as WIDTHxHEIGHT."
+        )
+        parser.add_argument(
+            '--densities', default=','.join(str(density) for density in DEFAULT_DENSITIES),
+            help="Comma-separated fractions of the cells that are mines."
+        )
+        parser.add_argument(
+            '--cases', default=','.join(CASES),
+            help=f"Comma-separated cases to run, out of: {', '.join(CASES)}."
+        )
+        parser.add_argument('--engine', help="Board engine; defaults to MINESWEEPER_ENGINE.")
+        parser.add_argument('--repeat', type=int, default=5, help="Timed repeats per case.")
+        parser.add_argument('--output', help="Write the results to this JSON file.")
+        parser.add_argument(
+            '--baseline',
+            help="JSON results to compare against; the cases they hold are tracked."
+        )
+        parser.add_argument(
+            '--save-baseline', action='store_true',
+            help="Write the results to the --baseline file instead of comparing."
+        )
+        parser.add_argument(
+            '--tolerance', type=float, default=0.25,
+            help="Allowed slowdown of a tracked case, as a fraction of its baseline time."
+        )
+        parser.add_argument(
+            '--memory-tolerance', type=float, default=0.1,
+            help="Allowed growth of a tracked case's peak memory, as a fraction."
+        )
+
+    def handle(self, *args, **options):
+        sizes = [parse_size(size) for size in options['sizes'].split(',')]
+        try:
+            densities = [float(density) for density in options['densities'].split(',')]
+        except ValueError:
+            raise CommandError("Densities must be numbers.")
+        cases = options['cases'].split(',')
+        unknown = set(cases) - set(CASES)
+        if unknown:
+            raise CommandError(f"Unknown cases: {', '.join(sorted(unknown))}")
+        if options['save_baseline'] and not options['baseline']:
+            raise CommandError("--save-baseline needs --baseline.")
+
+        try:
+            report = run_benchmarks(sizes, densities, cases, options['engine'], options['repeat'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        for result in report['results']:
+            self.stdout.write(
+                f"{result['key']:<36} {result['min_ms']:>10.3f} ms  "
+                f"{result['median_ms']:>10.3f} ms median  {result['peak_kib']:>10.1f} KiB"
+            )
+
+        if options['output']:
+            self._write(options['output'], report)
+
+        if not options['baseline']:
+            return
+        if options['save_baseline']:
+            self._write(options['baseline'], report)
+            self.stdout.write(f"Saved baseline to {options['baseline']}")
+            return
+
+        try:
+            with open(options['baseline']) as f:
+                baseline = json.load(f)
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Cannot read baseline {options['baseline']}: {e}")
+
+        regressions = compare_results(
+            report, baseline, tolerance=options['tolerance'], memory_tolerance=options['memory_tolerance']
+        )
+        if regressions:
+            lines = [
+                f"{key}: {metric} {previous:.3f} -> {current:.3f}"
+                for key, metric, previous, current in regressions
+            ]
+            raise CommandError("Regressed against the baseline:\n" + "\n".join(lines))
+        self.stdout.write("No regressions against the baseline")
+
+    def _write(self, path, report):
+        with open(path, 'w') as f:
+            json.dump(report, f, indent=2)
@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from minesweeper_backend.store import flush_dirty_games, flush_interval
+
+
+class Command(BaseCommand):
+    help = "Writes the cached state of games with unflushed moves to the database (write-behind mode)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true',
+            help="Flush every game with unflushed moves, not only those older than the flush interval."
+        )
+        parser.add_argument(
+            '--loop', action='store_true',
+            help="Keep flushing once per flush interval until interrupted."
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            flushed = flush_dirty_games(force=options['all'])
+            self.stdout.write(f"Flushed {flushed} games")
+            if not options['loop']:
+                return
+            time.sleep(flush_interval())
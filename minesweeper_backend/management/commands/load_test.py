@@ -0,0 +1,99 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from minesweeper_backend.loadtest import (
+    PERCENTILES, LiveServer, count_contention, run_load_test, use_database
+)
+
+
+def parse_size(value):
+    try:
+        width, height = (int(part) for part in value.lower().split('x'))
+    except ValueError:
+        raise CommandError(f"Invalid size {value!r}, expected WIDTHxHEIGHT")
+    return width, height
+
+
+class Command(BaseCommand):
+    help = (
+        "Starts a local server and load tests the game endpoints with simulated players, "
+        "reporting throughput, latency percentiles, errors and lock contention."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--players', type=int, default=10, help="Concurrent players.")
+        parser.add_argument('--games', type=int, default=3, help="Games played by each player.")
+        parser.add_argument(
+            '--sizes', default='9x9,16x16,30x16',
+            help="Comma-separated board sizes as WIDTHxHEIGHT, used in turn."
+        )
+        parser.add_argument('--density', type=float, default=0.15, help="Fraction of the cells that are mines.")
+        parser.add_argument(
+            '--players-per-game', type=int, default=1,
+            help="Players sharing each game, to load test concurrent moves on one game."
+        )
+        parser.add_argument('--max-moves', type=int, default=500, help="Reveals after which a player gives up on a game.")
+        parser.add_argument('--get-every', type=int, default=5, help="Moves between reloads of the game; 0 never reloads.")
+        parser.add_argument('--seed', type=int, help="Seed of the players' moves.")
+        parser.add_argument('--timeout', type=float, default=30, help="Seconds before a request is abandoned.")
+        parser.add_argument('--port', type=int, default=0, help="Port of the server; a free one by default.")
+        parser.add_argument(
+            '--database',
+            help="SQLite file to run against; a throwaway database by default."
+        )
+        parser.add_argument('--output', help="Write the report to this JSON file.")
+
+    def handle(self, *args, **options):
+        sizes = [parse_size(size) for size in options['sizes'].split(',')]
+        if options['players'] < 1 or options['games'] < 1 or options['players_per_game'] < 1:
+            raise CommandError("--players, --games and --players-per-game must be at least 1.")
+        if settings.DATABASES['default']['ENGINE'] != 'django.db.backends.sqlite3':
+            raise CommandError("The load test runs against SQLite only.")
+
+        with use_database(options['database']), count_contention(quiet=options['verbosity'] < 2) as contention:
+            with LiveServer(port=options['port']) as server:
+                self.stdout.write(
+                    f"Load testing {server.url} with {options['players']} players, "
+                    f"{options['games']} games each"
+                )
+                report = run_load_test(
+                    server.url,
+                    players=options['players'],
+                    games=options['games'],
+                    sizes=sizes,
+                    density=options['density'],
+                    players_per_game=options['players_per_game'],
+                    max_moves=options['max_moves'],
+                    get_every=options['get_every'],
+                    seed=options['seed'],
+                    timeout=options['timeout'],
+                )
+            report['retried_moves'] = contention.retries
+
+        self.print_report(report)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, indent=2)
+
+    def print_report(self, report):
+        self.stdout.write(
+            f"{report['requests']} requests in {report['elapsed_s']:.2f} s "
+            f"({report['throughput']:.1f} requests/s), {report['games']} games, "
+            f"{report['finished_games']} finished"
+        )
+        header = f"{'endpoint':<10}{'requests':>10}{'mean':>10}" + ''.join(f"{f'p{p}':>10}" for p in PERCENTILES) + f"{'max':>10}"
+        self.stdout.write(header + "   (ms)")
+        for endpoint, summary in list(report['endpoints'].items()) + [('all', report['overall'])]:
+            self.stdout.write(
+                f"{endpoint:<10}{summary['requests']:>10}{summary['mean_ms']:>10.2f}"
+                + ''.join(f"{summary[f'p{p}_ms']:>10.2f}" for p in PERCENTILES)
+                + f"{summary['max_ms']:>10.2f}   statuses {summary['statuses']}"
+            )
+        self.stdout.write(
+            f"Error rate {report['error_rate']:.2%}; lock contention: {report['retried_moves']} moves retried, "
+            f"{report['busy']} rejected as busy, {report['database_locked']} database locked errors"
+        )
+        for error, count in report['errors'].items():
+            self.stdout.write(f"  {count} x {error}")
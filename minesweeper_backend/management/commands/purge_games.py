@@ -0,0 +1,46 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from minesweeper_backend.purge import count_expired, purge_games, purge_interval
+
+
+class Command(BaseCommand):
+    help = "Deletes games idle or finished for longer than their time to live, in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=None,
+            help="Games deleted per transaction (default: MINESWEEPER_PURGE_BATCH_SIZE)."
+        )
+        parser.add_argument(
+            '--limit', type=int, default=None,
+            help="Delete at most this many games."
+        )
+        parser.add_argument(
+            '--no-archive', action='store_true',
+            help="Delete the games without keeping an archived summary of each."
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help="Only count the expired games."
+        )
+        parser.add_argument(
+            '--loop', action='store_true',
+            help="Keep purging once per purge interval until interrupted."
+        )
+
+    def handle(self, *args, **options):
+        if options['dry_run']:
+            self.stdout.write(f"{count_expired()} games expired")
+            return
+        while True:
+            purged = purge_games(
+                batch_size=options['batch_size'],
+                archived=False if options['no_archive'] else None,
+                limit=options['limit']
+            )
+            self.stdout.write(f"Purged {purged} games")
+            if not options['loop']:
+                return
+            time.sleep(purge_interval() or 3600)
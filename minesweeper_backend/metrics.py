@@ -0,0 +1,232 @@
+"""
+Request timing and in-process latency histograms.
+
+TimingMiddleware gives every request a RequestTimer. Code on the request's
+path times its phases with phase(), which adds the elapsed time to the
+timer and costs nothing outside a request:
+
+    with phase('engine'):
+        game.reveal(row, col)
+
+Phases:
+- cache: reading game state from the cache
+- lock: waiting for a game's lock
+- engine: board work (generation, reveals, flags, chords)
+- serialize: building response bodies
+- save: writing game state (database or write-behind cache)
+- compress: gzipping the response body
+
+When a request ends, its phases are sent back as a Server-Timing header and
+recorded in histograms labelled by endpoint (the URL name) and board size
+bucket, which render_metrics() exposes in the Prometheus text format.
+
+Events that aren't requests are counted with increment(name) and exposed as
+minesweeper_<name>_total counters, e.g. moves the store retried.
+"""
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+
+# Upper bounds of the histogram buckets, in seconds
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Board size buckets as (largest number of cells, label); bigger boards are 'huge'
+BOARD_SIZES = ((100, 'small'), (500, 'medium'), (2500, 'large'))
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+_current = ContextVar('minesweeper_request_timer', default=None)
+
+_lock = threading.Lock()
+_requests = {}
+_phases = {}
+_responses = {}
+_counters = {}
+
+# Help text of the counters passed to increment()
+COUNTERS = {
+    'move_retries': "Moves retried after another move changed the game first.",
+}
+
+
+class RequestTimer:
+    """The phase durations and board size of the current request."""
+
+    __slots__ = ('phases', 'active', 'board')
+
+    def __init__(self):
+        self.phases = {}
+        self.active = set()
+        self.board = 'none'
+
+    def server_timing(self, total):
+        """Returns the Server-Timing header value, in milliseconds."""
+        entries = [f"{name};dur={elapsed * 1000:.3f}" for name, elapsed in self.phases.items()]
+        entries.append(f"total;dur={total * 1000:.3f}")
+        return ', '.join(entries)
+
+
+class Histogram:
+    __slots__ = ('buckets', 'sum', 'count')
+
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.buckets[bisect_left(BUCKETS, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+def board_size(width, height):
+    """Returns the size bucket of a board."""
+    cells = width * height
+    for limit, label in BOARD_SIZES:
+        if cells <= limit:
+            return label
+    return 'huge'
+
+
+def current_timer():
+    return _current.get()
+
+
+def start_request():
+    """Starts timing a request; returns the token to pass to end_request."""
+    return _current.set(RequestTimer())
+
+
+def end_request(token):
+    timer = _current.get()
+    _current.reset(token)
+    return timer
+
+
+@contextmanager
+def phase(name):
+    """
+    Adds the time spent in the block to phase name of the current request.
+
+    Nested blocks of the same phase are only counted once. Usable as a
+    decorator too.
+    """
+    timer = _current.get()
+    if timer is None or name in timer.active:
+        yield
+        return
+
+    timer.active.add(name)
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        timer.phases[name] = timer.phases.get(name, 0.0) + perf_counter() - start
+        timer.active.discard(name)
+
+
+def label_board(width, height):
+    """Labels the current request with the size bucket of the board it works on."""
+    timer = _current.get()
+    if timer is not None:
+        timer.board = board_size(width, height)
+
+
+def record(endpoint, timer, total, status):
+    """Adds a finished request to the histograms."""
+    with _lock:
+        key = (endpoint, timer.board)
+        histogram = _requests.get(key)
+        if histogram is None:
+            histogram = _requests[key] = Histogram()
+        histogram.observe(total)
+
+        for name, elapsed in timer.phases.items():
+            key = (endpoint, timer.board, name)
+            histogram = _phases.get(key)
+            if histogram is None:
+                histogram = _phases[key] = Histogram()
+            histogram.observe(elapsed)
+
+        key = (endpoint, str(status))
+        _responses[key] = _responses.get(key, 0) + 1
+
+
+def increment(name, amount=1):
+    """Adds amount to the counter name, one of COUNTERS."""
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + amount
+
+
+def counter(name):
+    """Returns the current value of the counter name."""
+    with _lock:
+        return _counters.get(name, 0)
+
+
+def _labels(names, values, **extra):
+    pairs = list(zip(names, values)) + list(extra.items())
+    return '{' + ','.join(f'{name}="{value}"' for name, value in pairs) + '}'
+
+
+def _render_histograms(lines, name, help_text, histograms, label_names):
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} histogram")
+    for values, histogram in sorted(histograms.items()):
+        cumulative = 0
+        for bound, count in zip(BUCKETS, histogram.buckets):
+            cumulative += count
+            lines.append(f"{name}_bucket{_labels(label_names, values, le=bound)} {cumulative}")
+        lines.append(f"{name}_bucket{_labels(label_names, values, le='+Inf')} {histogram.count}")
+        lines.append(f"{name}_sum{_labels(label_names, values)} {histogram.sum}")
+        lines.append(f"{name}_count{_labels(label_names, values)} {histogram.count}")
+
+
+def render_metrics():
+    """Returns every histogram and counter in the Prometheus text format."""
+    with _lock:
+        requests = {key: _copy(histogram) for key, histogram in _requests.items()}
+        phases = {key: _copy(histogram) for key, histogram in _phases.items()}
+        responses = dict(_responses)
+        counters = dict(_counters)
+
+    lines = []
+    _render_histograms(
+        lines, 'minesweeper_request_duration_seconds',
+        "Time to answer a request, by endpoint and board size.",
+        requests, ('endpoint', 'board')
+    )
+    _render_histograms(
+        lines, 'minesweeper_request_phase_duration_seconds',
+        "Time spent in each phase of a request, by endpoint and board size.",
+        phases, ('endpoint', 'board', 'phase')
+    )
+    lines.append("# HELP minesweeper_responses_total Responses sent, by endpoint and status code.")
+    lines.append("# TYPE minesweeper_responses_total counter")
+    for values, count in sorted(responses.items()):
+        lines.append(f"minesweeper_responses_total{_labels(('endpoint', 'status'), values)} {count}")
+    for name, help_text in COUNTERS.items():
+        lines.append(f"# HELP minesweeper_{name}_total {help_text}")
+        lines.append(f"# TYPE minesweeper_{name}_total counter")
+        lines.append(f"minesweeper_{name}_total {counters.get(name, 0)}")
+    return '\n'.join(lines) + '\n'
+
+
+def _copy(histogram):
+    copy = Histogram()
+    copy.buckets = list(histogram.buckets)
+    copy.sum = histogram.sum
+    copy.count = histogram.count
+    return copy
+
+
+def reset():
+    """Drops every recorded measurement. Used by the tests."""
+    with _lock:
+        _requests.clear()
+        _phases.clear()
+        _responses.clear()
+        _counters.clear()
@@ -0,0 +1,93 @@
+"""
+Middleware timing every request (see metrics.py) and compressing large responses.
+"""
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.middleware.gzip import GZipMiddleware
+from django.urls import Resolver404, resolve
+from time import perf_counter
+
+from . import metrics
+
+
+def endpoint_name(request):
+    """
+    Returns the URL name of the view a request is for. Requests answered
+    before URL resolution (e.g. by another middleware) are resolved here.
+    """
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        try:
+            match = resolve(request.path_info)
+        except Resolver404:
+            return 'unmatched'
+    return match.url_name or 'unnamed'
+
+
+class TimingMiddleware:
+    """
+    Times requests and their phases, records them in the metrics histograms
+    and sends the phases back in a Server-Timing header.
+
+    It should come first in MIDDLEWARE, so that its timings include the other
+    middleware.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'MINESWEEPER_METRICS', True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.server_timing = getattr(settings, 'MINESWEEPER_SERVER_TIMING', True)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        token = metrics.start_request()
+        start = perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            timer = metrics.end_request(token)
+        return self.finish(request, response, timer, perf_counter() - start)
+
+    async def __acall__(self, request):
+        token = metrics.start_request()
+        start = perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            timer = metrics.end_request(token)
+        return self.finish(request, response, timer, perf_counter() - start)
+
+    def finish(self, request, response, timer, total):
+        metrics.record(endpoint_name(request), timer, total, response.status_code)
+        if self.server_timing:
+            response['Server-Timing'] = timer.server_timing(total)
+        return response
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """
+    Gzips responses of at least MINESWEEPER_COMPRESS_MIN_SIZE bytes for
+    clients that accept it; smaller ones aren't worth the CPU time.
+
+    Streaming responses (the live event stream) are sent as they are, so
+    every event reaches the client as soon as it is written.
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.min_size = getattr(settings, 'MINESWEEPER_COMPRESS_MIN_SIZE', 1024)
+
+    def process_response(self, request, response):
+        if response.streaming or len(response.content) < self.min_size:
+            return response
+        with metrics.phase('compress'):
+            return super().process_response(request, response)
@@ -0,0 +1,105 @@
+import struct
+
+from django.db import migrations, models
+
+# Frozen copies of the codec as of this migration, so later changes to the
+# app can't change what it does. Blobs are a '>II' (height, width) header
+# followed by a bitset of mines, or a nibble per cell for the player board.
+HEADER = struct.Struct('>II')
+
+_STATE_TO_NIBBLE = {str(n): n for n in range(9)}
+_STATE_TO_NIBBLE.update({'M': 0x9, 'F': 0xA, '': 0xF})
+_NIBBLE_TO_STATE = {nibble: state for state, nibble in _STATE_TO_NIBBLE.items()}
+
+
+def encode_mines(internal_board):
+    if internal_board is None:
+        return None
+    height = len(internal_board)
+    width = len(internal_board[0]) if height > 0 else 0
+    bits = bytearray((width * height + 7) // 8)
+    index = 0
+    for row in internal_board:
+        for cell in row:
+            if cell == 'M':
+                bits[index >> 3] |= 0x80 >> (index & 7)
+            index += 1
+    return HEADER.pack(height, width) + bytes(bits)
+
+
+def decode_mines(blob):
+    if blob is None:
+        return None
+    blob = bytes(blob)
+    height, width = HEADER.unpack_from(blob)
+    bits = blob[HEADER.size:]
+    return [
+        ['M' if bits[index >> 3] & (0x80 >> (index & 7)) else '' for index in range(r * width, (r + 1) * width)]
+        for r in range(height)
+    ]
+
+
+def encode_cells(player_board):
+    if player_board is None:
+        return None
+    height = len(player_board)
+    width = len(player_board[0]) if height > 0 else 0
+    nibbles = [_STATE_TO_NIBBLE[cell] for row in player_board for cell in row]
+    if len(nibbles) % 2:
+        nibbles.append(0xF)
+    return HEADER.pack(height, width) + bytes(high << 4 | low for high, low in zip(nibbles[0::2], nibbles[1::2]))
+
+
+def decode_cells(blob):
+    if blob is None:
+        return None
+    blob = bytes(blob)
+    height, width = HEADER.unpack_from(blob)
+    packed = blob[HEADER.size:]
+    flat = [_NIBBLE_TO_STATE[byte >> shift & 0xF] for byte in packed for shift in (4, 0)]
+    return [flat[r * width:(r + 1) * width] for r in range(height)]
+
+
+def pack_boards(apps, schema_editor):
+    Game = apps.get_model('minesweeper_backend', 'Game')
+    for game in Game.objects.all().iterator():
+        game.mine_bits = encode_mines(game.internal_board)
+        game.cell_states = encode_cells(game.player_board)
+        game.save(update_fields=['mine_bits', 'cell_states'])
+
+
+def unpack_boards(apps, schema_editor):
+    Game = apps.get_model('minesweeper_backend', 'Game')
+    for game in Game.objects.all().iterator():
+        game.internal_board = decode_mines(game.mine_bits)
+        game.player_board = decode_cells(game.cell_states)
+        game.save(update_fields=['internal_board', 'player_board'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('minesweeper_backend', '0002_rename_board_state_game_internal_board_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='game',
+            name='mine_bits',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='game',
+            name='cell_states',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+        migrations.RunPython(pack_boards, unpack_boards),
+        migrations.RemoveField(
+            model_name='game',
+            name='internal_board',
+        ),
+        migrations.RemoveField(
+            model_name='game',
+            name='player_board',
+        ),
+    ]
@@ -0,0 +1,66 @@
+import struct
+
+from django.db import migrations, models
+
+# Frozen copies of the codec and count helpers as of this migration, so later
+# changes to the app can't change what it does. Blobs are a '>II'
+# (height, width) header followed by a bitset of mines, or a nibble per count.
+HEADER = struct.Struct('>II')
+
+
+def decode_mines(blob):
+    blob = bytes(blob)
+    height, width = HEADER.unpack_from(blob)
+    bits = blob[HEADER.size:]
+    return [
+        ['M' if bits[index >> 3] & (0x80 >> (index & 7)) else '' for index in range(r * width, (r + 1) * width)]
+        for r in range(height)
+    ]
+
+
+def encode_counts(counts):
+    height = len(counts)
+    width = len(counts[0]) if height > 0 else 0
+    nibbles = [count for row in counts for count in row]
+    if len(nibbles) % 2:
+        nibbles.append(0)
+    return HEADER.pack(height, width) + bytes(high << 4 | low for high, low in zip(nibbles[0::2], nibbles[1::2]))
+
+
+def compute_neighbor_counts(internal_board):
+    height = len(internal_board)
+    width = len(internal_board[0]) if height > 0 else 0
+    counts = [[0] * width for _ in range(height)]
+    for row in range(height):
+        for col in range(width):
+            if internal_board[row][col] != 'M':
+                continue
+            for i in range(max(0, row-1), min(height, row+2)):
+                for j in range(max(0, col-1), min(width, col+2)):
+                    if i != row or j != col:
+                        counts[i][j] += 1
+    return counts
+
+
+def compute_count_grids(apps, schema_editor):
+    Game = apps.get_model('minesweeper_backend', 'Game')
+    for game in Game.objects.filter(mine_bits__isnull=False).iterator():
+        internal_board = decode_mines(game.mine_bits)
+        game.count_grid = encode_counts(compute_neighbor_counts(internal_board))
+        game.save(update_fields=['count_grid'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('minesweeper_backend', '0003_pack_boards'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='game',
+            name='count_grid',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+        migrations.RunPython(compute_count_grids, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,110 @@
+import struct
+
+from django.db import migrations, models
+
+# Frozen copies of the codec and region indexing as of this migration, so
+# later changes to the app can't change what it does. Board blobs are a
+# '>II' (height, width) header followed by a bitset of mines or a nibble per
+# count. Region blobs are a '>IIIII' header (height, width, zero runs,
+# member runs, regions) followed by the run arrays as little-endian uint32s.
+HEADER = struct.Struct('>II')
+REGION_HEADER = struct.Struct('>IIIII')
+
+
+def decode_mines(blob):
+    blob = bytes(blob)
+    height, width = HEADER.unpack_from(blob)
+    bits = blob[HEADER.size:]
+    return [
+        ['M' if bits[index >> 3] & (0x80 >> (index & 7)) else '' for index in range(r * width, (r + 1) * width)]
+        for r in range(height)
+    ]
+
+
+def decode_counts(blob):
+    blob = bytes(blob)
+    height, width = HEADER.unpack_from(blob)
+    flat = [byte >> shift & 0xF for byte in blob[HEADER.size:] for shift in (4, 0)]
+    return [flat[r * width:(r + 1) * width] for r in range(height)]
+
+
+def build_runs(cells, width):
+    """Groups (cell, label) pairs into row runs of consecutive cells sharing a label."""
+    starts, ends, labels = [], [], []
+    previous_cell = previous_label = None
+    for cell, label in cells:
+        if previous_cell is not None and cell == previous_cell + 1 and label == previous_label and cell % width:
+            ends[-1] = cell + 1
+        else:
+            starts.append(cell)
+            ends.append(cell + 1)
+            labels.append(label)
+        previous_cell, previous_label = cell, label
+    return starts, ends, labels
+
+
+def encode_zero_regions(internal_board, counts):
+    """Labels the connected regions of empty cells and packs the cells each one uncovers."""
+    height = len(counts)
+    width = len(counts[0]) if height > 0 else 0
+    labels = [[-1] * width for _ in range(height)]
+    zero_cells = []
+    member_cells = []
+    region = 0
+
+    for row in range(height):
+        for col in range(width):
+            if labels[row][col] != -1 or counts[row][col] or internal_board[row][col] == 'M':
+                continue
+            labels[row][col] = region
+            stack = [(row, col)]
+            members = set()
+            while stack:
+                current_row, current_col = stack.pop()
+                members.add(current_row * width + current_col)
+                zero_cells.append((current_row * width + current_col, region))
+                for i in range(max(0, current_row-1), min(height, current_row+2)):
+                    for j in range(max(0, current_col-1), min(width, current_col+2)):
+                        if counts[i][j]:
+                            members.add(i * width + j)
+                        elif labels[i][j] == -1:
+                            labels[i][j] = region
+                            stack.append((i, j))
+            member_cells.extend((cell, region) for cell in sorted(members))
+            region += 1
+
+    zero_cells.sort()
+    zero_starts, zero_ends, zero_regions = build_runs(zero_cells, width)
+    member_starts, member_ends, member_regions = build_runs(member_cells, width)
+    offsets = [0] * (region + 1)
+    for label in member_regions:
+        offsets[label + 1] += 1
+    for label in range(region):
+        offsets[label + 1] += offsets[label]
+
+    header = REGION_HEADER.pack(height, width, len(zero_starts), len(member_starts), region)
+    arrays = (zero_starts, zero_ends, zero_regions, member_starts, member_ends, offsets)
+    return header + b''.join(struct.pack(f'<{len(values)}I', *values) for values in arrays)
+
+
+def index_regions(apps, schema_editor):
+    Game = apps.get_model('minesweeper_backend', 'Game')
+    for game in Game.objects.filter(mine_bits__isnull=False, count_grid__isnull=False).iterator():
+        game.zero_regions = encode_zero_regions(decode_mines(game.mine_bits), decode_counts(game.count_grid))
+        game.save(update_fields=['zero_regions'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('minesweeper_backend', '0004_game_count_grid'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='game',
+            name='zero_regions',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+        migrations.RunPython(index_regions, migrations.RunPython.noop),
+    ]
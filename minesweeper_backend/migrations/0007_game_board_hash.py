@@ -0,0 +1,31 @@
+import hashlib
+
+from django.db import migrations, models
+
+
+def board_hash(blob):
+    # Frozen copy of codec.board_hash as of this migration
+    return hashlib.blake2b(bytes(blob), digest_size=16).hexdigest()
+
+
+def hash_boards(apps, schema_editor):
+    Game = apps.get_model('minesweeper_backend', 'Game')
+    for game in Game.objects.filter(cell_states__isnull=False).iterator():
+        game.board_hash = board_hash(game.cell_states)
+        game.save(update_fields=['board_hash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('minesweeper_backend', '0006_game_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='game',
+            name='board_hash',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=32, null=True),
+        ),
+        migrations.RunPython(hash_boards, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('minesweeper_backend', '0007_game_board_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='game',
+            name='mode',
+            field=models.CharField(choices=[('random', 'Random'), ('no_guess', 'No guessing')], default='random', max_length=16),
+        ),
+    ]
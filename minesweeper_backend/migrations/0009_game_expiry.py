@@ -0,0 +1,48 @@
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def last_move_from_creation(apps, schema_editor):
+    # Existing games have no record of their moves; they expire from their creation
+    Game = apps.get_model('minesweeper_backend', 'Game')
+    Game.objects.update(last_move_at=models.F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('minesweeper_backend', '0008_game_mode'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='game',
+            name='last_move_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.RunPython(last_move_from_creation, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='game',
+            index=models.Index(fields=['game_over', 'game_won', 'last_move_at'], name='game_expiry_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='game',
+            index=models.Index(fields=['created_at'], name='game_created_idx'),
+        ),
+        migrations.CreateModel(
+            name='ArchivedGame',
+            fields=[
+                ('id', models.UUIDField(editable=False, primary_key=True, serialize=False)),
+                ('width', models.IntegerField()),
+                ('height', models.IntegerField()),
+                ('mines', models.IntegerField()),
+                ('mode', models.CharField(choices=[('random', 'Random'), ('no_guess', 'No guessing')], default='random', max_length=16)),
+                ('result', models.CharField(choices=[('won', 'Won'), ('lost', 'Lost'), ('abandoned', 'Abandoned')], max_length=16)),
+                ('revealed_cells', models.IntegerField(default=0)),
+                ('moves', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField()),
+                ('last_move_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
@@ -2,48 +2,370 @@ from django.db import models
 import uuid
 from django.core.exceptions import ValidationError
 from django.core.cache import cache
+from django.utils import timezone
+
+from . import codec
+from .board import Board
+from .engines import GameBoard
+from .metrics import phase
+
+class GameManager(models.Manager):
+    def create_games(self, width, height, mines, mode='random', count=1, chunk_size=None):
+        """
+        Creates count games of one configuration with bulk_create, in chunks.
+        Yields the games of each chunk once it is inserted; see bulk.py.
+        """
+        from .bulk import create_games
+        return create_games(width, height, mines, mode, count, chunk_size)
+
 
 class Game(models.Model):
+    # How the mines are placed: at random, or so the game can be won without guessing
+    RANDOM = 'random'
+    NO_GUESS = 'no_guess'
+    MODE_CHOICES = [
+        (RANDOM, 'Random'),
+        (NO_GUESS, 'No guessing'),
+    ]
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     width = models.IntegerField()
     height = models.IntegerField()
     mines = models.IntegerField()
-    internal_board = models.JSONField(
+    mode = models.CharField(max_length=16, choices=MODE_CHOICES, default=RANDOM)
+    # Boards are stored packed: a bitset of mines and a nibble per player cell
+    mine_bits = models.BinaryField(
+        null=True,
+        blank=True
+    )
+    cell_states = models.BinaryField(
         null=True,
         blank=True
     )
-    player_board = models.JSONField(
+    # Adjacent mine count for every cell, computed once when the board is generated
+    count_grid = models.BinaryField(
         null=True,
         blank=True
     )
+    # Row runs of every connected zero region, so cascades are a single lookup
+    zero_regions = models.BinaryField(
+        null=True,
+        blank=True
+    )
+    # Content hash of cell_states, so a game can be found from its board with an index lookup
+    board_hash = models.CharField(
+        max_length=32,
+        null=True,
+        blank=True,
+        editable=False,
+        db_index=True
+    )
     revealed_cells = models.IntegerField(default=0)
+    # Bumped on every change to the player board so clients can apply deltas
+    version = models.PositiveIntegerField(default=0)
     game_over = models.BooleanField(default=False)
     game_won = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Time of the last move, or of creation until the first one; games expire from it
+    last_move_at = models.DateTimeField(default=timezone.now)
+
+    objects = GameManager()
+
+    class Meta:
+        indexes = [
+            # Expiry scans: idle games in progress and finished games, by last move
+            models.Index(fields=['game_over', 'game_won', 'last_move_at'], name='game_expiry_idx'),
+            models.Index(fields=['created_at'], name='game_created_idx'),
+        ]
+
+    # Decoded boards, kept so in-place edits are written back on save()
+    _internal_rows = None
+    _player_rows = None
+    _count_rows = None
+    _region_index = None
+    _board = None
+
+    # Write-behind bookkeeping, see store.py: the version last written to the
+    # database and when the first move after it was made
+    flushed_version = None
+    dirty_since = None
+
+    @property
+    def internal_board(self):
+        """The mine layout as a 2D list, decoded from mine_bits on first access."""
+        if self._internal_rows is None and self.mine_bits is not None:
+            self._internal_rows = codec.decode_mines(self.mine_bits)
+        return self._internal_rows
+
+    @internal_board.setter
+    def internal_board(self, value):
+        self._internal_rows = value
+        self._board = None
+        self.mine_bits = codec.encode_mines(value)
+
+    @property
+    def board(self):
+        """
+        The mines and counts as a Board, read straight from the packed fields.
+        """
+        if self._board is None and self.mine_bits is not None:
+            if self.count_grid is None:
+                self.counts  # computes and packs the missing count grid
+            self._board = Board.from_packed(self.mine_bits, self.count_grid)
+        return self._board
+
+    @property
+    def counts(self):
+        """
+        The adjacent mine counts as a 2D list of integers.
+        Boards saved without a count grid have it computed from the mines on first access.
+        """
+        if self._count_rows is None:
+            if self.count_grid is not None:
+                self._count_rows = codec.decode_counts(self.count_grid)
+            elif self.internal_board is not None:
+                from .utils import compute_neighbor_counts
+                self.counts = compute_neighbor_counts(self.internal_board)
+        return self._count_rows
+
+    @counts.setter
+    def counts(self, value):
+        self._count_rows = value
+        self._board = None
+        self.count_grid = codec.encode_counts(value)
+
+    @property
+    def region_index(self):
+        """
+        The ZeroRegionIndex of the board.
+        Boards saved without one have it computed on first access.
+        """
+        if self._region_index is None:
+            if self.zero_regions is not None:
+                self._region_index = codec.decode_regions(self.zero_regions)
+            elif self.counts is not None:
+                from .utils import index_zero_regions
+                self.region_index = index_zero_regions(self.internal_board, self.counts)
+        return self._region_index
+
+    @region_index.setter
+    def region_index(self, value):
+        self._region_index = value
+        self.zero_regions = codec.encode_regions(value)
+
+    @property
+    def player_board(self):
+        """
+        The player's view as a 2D list, decoded from cell_states on first access.
+        The decoded board is a GameBoard carrying this game's id.
+        """
+        if self._player_rows is None and self.cell_states is not None:
+            self._player_rows = GameBoard(codec.decode_cells(self.cell_states), game_id=self.id)
+        return self._player_rows
+
+    @player_board.setter
+    def player_board(self, value):
+        self._player_rows = value
+        self.cell_states = codec.encode_cells(value)
 
     def clean(self):
          if self.mines >= self.width * self.height:
              raise ValidationError("Too many mines for the given board size.")
+         if self.mode == self.NO_GUESS:
+             from .generation import max_mines
+             if self.mines > max_mines(self.width, self.height):
+                 raise ValidationError("Too many mines for a no-guess board.")
+
+    @phase('engine')
+    def initialize_board(self, save=True, boards=None):
+        """
+        Generates the boards of the game, or takes in ones generated already
+        (as returned by generate_minesweeper_board or generate_no_guess_board).
+        No-guess games start with the opening at their start cell revealed.
 
-    def initialize_board(self):
-        from .utils import generate_minesweeper_board
+        Raises:
+            ValidationError: If the game already has boards
+            GenerationTimeout: If no no-guess board was found in time
+        """
+        from .utils import generate_minesweeper_board, compute_neighbor_counts, index_zero_regions
         if self.internal_board is not None or self.player_board is not None:
             raise ValidationError("Board already initialized")
         
-        boards = generate_minesweeper_board(self.width, self.height, self.mines)
+        if boards is None:
+            if self.mode == self.NO_GUESS:
+                from .generation import generate_no_guess_board
+                boards = generate_no_guess_board(self.width, self.height, self.mines)
+            else:
+                boards = generate_minesweeper_board(self.width, self.height, self.mines)
         self.internal_board = boards['internal_board']
         self.player_board = boards['player_board']
-        self.save()
+        counts = boards.get('counts')
+        self.counts = counts if counts is not None else compute_neighbor_counts(self.internal_board)
+        regions = boards.get('regions')
+        self.region_index = regions if regions is not None else index_zero_regions(self.internal_board, self.counts)
+        start = boards.get('start')
+        if start is not None:
+            # The opening is part of the board as created, which is version 0
+            self.reveal(*start)
+            self.version = 0
+        if save:
+            self.save()
     
+    @phase('engine')
+    def reveal(self, row, col, changes=None):
+        """
+        Reveals a cell and updates the game's progress (revealed count, finished
+        flags and version) in memory. The caller is responsible for saving.
+        
+        Returns:
+            The reveal_cell result: -1 for a mine, otherwise the number of cells revealed
+        """
+        from .utils import reveal_cell
+        # Only what the reveal needs is decoded from the game
+        revealed_count = reveal_cell(
+            self.player_board, row, col,
+            game=self,
+            changes=changes
+        )
+        return self._record_reveal(revealed_count)
+
+    @phase('engine')
+    def chord(self, row, col, changes=None):
+        """
+        Chords a satisfied number, revealing its unflagged neighbours, and updates
+        the game's progress in memory. The caller is responsible for saving.
+        
+        Returns:
+            The chord_cell result: -1 for a mine, otherwise the number of cells revealed
+        """
+        from .utils import chord_cell
+        revealed_count = chord_cell(
+            self.player_board, row, col,
+            self.internal_board,
+            self.counts,
+            changes=changes,
+            layout=self.board
+        )
+        return self._record_reveal(revealed_count)
+
+    def _record_move(self):
+        # Every change to the player board is a new version
+        self.version += 1
+        self.last_move_at = timezone.now()
+
+    def _record_reveal(self, revealed_count):
+        if revealed_count != 0:
+            self._record_move()
+
+        if revealed_count == -1:
+            self.game_over = True
+            return revealed_count
+
+        if revealed_count > 0:
+            self.revealed_cells += revealed_count
+
+        if self.revealed_cells >= self.width * self.height - self.mines:
+            self.game_won = True
+
+        return revealed_count
+
+    @phase('engine')
+    def flag(self, row, col, flagged=None, changes=None):
+        """
+        Places or removes a flag on a hidden cell; toggles it when flagged is None.
+        Flags are stored in the packed cell states, so the board isn't decoded.
+        
+        Returns:
+            True if the cell changed, False otherwise (revealed cell or no-op)
+        """
+        if self._player_rows is not None:
+            cell = self._player_rows[row][col]
+        else:
+            cell = codec.peek_cell(self.cell_states, row, col)
+
+        if cell not in ('', 'F'):
+            return False
+
+        if flagged is None:
+            flagged = cell == ''
+        new_cell = 'F' if flagged else ''
+        if new_cell == cell:
+            return False
+
+        if self._player_rows is not None:
+            self._player_rows[row][col] = new_cell
+        else:
+            self.cell_states = codec.poke_cell(self.cell_states, row, col, new_cell)
+
+        self._record_move()
+        if changes is not None:
+            changes.append((row, col, new_cell))
+        return True
+
+    def pack_player_board(self):
+        """
+        Re-encodes cell_states from the decoded player board, which moves change
+        in place, and updates the board hash to match.
+        """
+        if self._player_rows is not None:
+            self.cell_states = codec.encode_cells(self._player_rows)
+        self.board_hash = codec.board_hash(self.cell_states)
+
+    @phase('save')
     def save(self, *args, **kwargs):
+        # The decoded player board may have been changed in place by reveal_cell
+        self.pack_player_board()
         super().save(*args, **kwargs)
         
         self.invalidate_cache()
     
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self._internal_rows = None
+        self._player_rows = None
+        self._count_rows = None
+        self._region_index = None
+        self._board = None
+
     def invalidate_cache(self):
         """Invalidate the cache for this game."""
         cache_key = f"game_{self.id}"
         cache.delete(cache_key)
+
+        # A direct save replaces whatever state the write-behind cache holds
+        from .store import state_cache, state_key
+        state_cache().delete(state_key(self.id))
     
     def __str__(self):
         return f"Game {self.id} - {self.width}x{self.height} with {self.mines} mines"
+
+
+class ArchivedGame(models.Model):
+    """
+    What is kept of a game once it is purged (see purge.py): its settings and
+    outcome, without the boards.
+    """
+    WON = 'won'
+    LOST = 'lost'
+    ABANDONED = 'abandoned'
+    RESULT_CHOICES = [
+        (WON, 'Won'),
+        (LOST, 'Lost'),
+        (ABANDONED, 'Abandoned'),
+    ]
+
+    # The id the game had
+    id = models.UUIDField(primary_key=True, editable=False)
+    width = models.IntegerField()
+    height = models.IntegerField()
+    mines = models.IntegerField()
+    mode = models.CharField(max_length=16, choices=Game.MODE_CHOICES, default=Game.RANDOM)
+    result = models.CharField(max_length=16, choices=RESULT_CHOICES)
+    revealed_cells = models.IntegerField(default=0)
+    moves = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField()
+    last_move_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Archived game {self.id} - {self.width}x{self.height} with {self.mines} mines, {self.result}"
@@ -0,0 +1,191 @@
+"""
+Pool of pre-generated boards, so creating a game is a single insert.
+
+Boards are kept per configuration (width, height, mines, mode) listed in
+MINESWEEPER_BOARD_POOL, fully prepared: mines, counts, zero regions and the
+player board are packed. A background thread fills every configuration up to
+MINESWEEPER_BOARD_POOL_HIGH boards when the server starts, then tops a
+configuration back up to it whenever claims take it below
+MINESWEEPER_BOARD_POOL_LOW. Games of other configurations, or created while
+their configuration has run out, are generated inline as before.
+
+The pool is per process and only lives in memory. Only random boards are
+pooled: no-guess boards take the generation processes, which every server
+process warming its own pool would keep busy. check_board_pool rejects other
+modes when the settings are checked, and BoardPool when the server starts.
+"""
+import logging
+import threading
+from collections import deque
+
+from django.conf import settings
+from django.core import checks
+from django.core.exceptions import ImproperlyConfigured
+
+from .models import Game
+
+logger = logging.getLogger(__name__)
+
+# The Game fields a pooled board sets
+BOARD_FIELDS = (
+    'mine_bits', 'count_grid', 'zero_regions', 'cell_states', 'board_hash', 'revealed_cells', 'game_won'
+)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def build_board(width, height, mines, mode, boards=None):
+    """
+    Generates and packs a board, or packs one generated already (see
+    Game.initialize_board), returning the Game fields it sets.
+    """
+    game = Game(width=width, height=height, mines=mines, mode=mode)
+    game.initialize_board(save=False, boards=boards)
+    game.pack_player_board()
+    return {name: getattr(game, name) for name in BOARD_FIELDS}
+
+
+def unpooled(configs):
+    """The configurations of a MINESWEEPER_BOARD_POOL that can't be pooled."""
+    return [config for config in configs if len(config) != 4 or config[3] != Game.RANDOM]
+
+
+def check_board_pool(app_configs=None, **kwargs):
+    """System check rejecting MINESWEEPER_BOARD_POOL configurations that aren't random."""
+    return [
+        checks.Error(
+            f"Board pool configuration {config!r} is not (width, height, mines, 'random').",
+            hint="Only random boards are pooled; no-guess games are generated when created.",
+            obj='MINESWEEPER_BOARD_POOL',
+            id='minesweeper_backend.E001',
+        )
+        for config in unpooled(getattr(settings, 'MINESWEEPER_BOARD_POOL', ()))
+    ]
+
+
+class BoardPool:
+    """
+    Ready boards by configuration, and the thread that keeps them topped up.
+    """
+
+    def __init__(self, configs, low, high):
+        """
+        Raises:
+            ImproperlyConfigured: If a configuration isn't random
+        """
+        rejected = unpooled(configs)
+        if rejected:
+            raise ImproperlyConfigured(f"Only random boards are pooled, not {rejected}")
+        self.boards = {tuple(config): deque() for config in configs}
+        self.low = low
+        self.high = high
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def take(self, config):
+        """
+        Removes a ready board of a configuration and returns its fields, or
+        None if the configuration isn't pooled or has run out.
+        """
+        boards = self.boards.get(config)
+        if boards is None:
+            return None
+        try:
+            fields = boards.popleft()
+        except IndexError:
+            fields = None
+        if len(boards) < self.low:
+            self._wake.set()
+        return fields
+
+    def fill(self, configs):
+        """
+        Generates boards for the configurations, one at a time round-robin,
+        until each has the high watermark or the pool is stopped.
+        """
+        configs = list(configs)
+        while configs and not self._stop.is_set():
+            for config in list(configs):
+                if len(self.boards[config]) >= self.high:
+                    configs.remove(config)
+                    continue
+                try:
+                    self.boards[config].append(build_board(*config))
+                except Exception as e:
+                    logger.error("Error filling the board pool for %s: %s", config, e, exc_info=True)
+                    configs.remove(config)
+
+    def refill(self):
+        """Tops up the configurations below the low watermark."""
+        self.fill(config for config, boards in self.boards.items() if len(boards) < self.low)
+
+    def run(self):
+        self.fill(self.boards)
+        logger.info("Board pool warmed: %s configurations", len(self.boards))
+        while not self._stop.is_set():
+            self._wake.wait(timeout=getattr(settings, 'MINESWEEPER_BOARD_POOL_INTERVAL', 5))
+            self._wake.clear()
+            self.refill()
+
+    def start(self):
+        """Starts the thread that warms and refills the pool."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self.run, name='board-pool', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def sizes(self):
+        """Ready boards by configuration."""
+        return {config: len(boards) for config, boards in self.boards.items()}
+
+
+def board_pool():
+    """Returns the process's board pool, configured from the settings."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = BoardPool(
+                getattr(settings, 'MINESWEEPER_BOARD_POOL', ()),
+                getattr(settings, 'MINESWEEPER_BOARD_POOL_LOW', 4),
+                getattr(settings, 'MINESWEEPER_BOARD_POOL_HIGH', 16)
+            )
+        return _pool
+
+
+def start_board_pool():
+    """Warms the board pool in the background. Called by startup.startup()."""
+    pool = board_pool()
+    if pool.boards:
+        pool.start()
+
+
+def claim_board(game):
+    """
+    Gives an unsaved game a ready board from the pool.
+
+    Returns:
+        True if the game got a board, False if it must be generated
+    """
+    fields = board_pool().take((game.width, game.height, game.mines, game.mode))
+    if fields is None:
+        return False
+    for name, value in fields.items():
+        setattr(game, name, value)
+    return True
+
+
+def reset():
+    """Stops and drops the board pool. Used by the tests."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.stop()
@@ -0,0 +1,368 @@
+"""
+Exact mine probabilities of the hidden cells of a board.
+
+Every layout of mines consistent with the revealed numbers and the total
+mine count is equally likely, so the probability that a cell is a mine is
+the share of those layouts that put a mine there. Counting them:
+
+1. The solver's deductions (solver.py) fix the cells that are certainly
+   safe or mines.
+2. The other hidden cells next to a number form the frontier, which splits
+   into components that share no number. The layouts of each component
+   are counted by number of mines, with a dynamic program over its cells
+   memoized on the mines each open number still needs, so long chains of
+   numbers don't blow up the way trying every layout does. Results are
+   memoized by the shape of the component, so a component a move didn't
+   touch is not counted again.
+3. The hidden cells no number touches (the interior) are unconstrained:
+   with k mines on the frontier, they hold the other mines in any of
+   C(interior, mines left - k) ways. The components are combined by that
+   binomial weighting.
+
+Counts get far too large for floats on big boards; the weights are scaled
+as they are combined, and every scale cancels out of the probabilities.
+"""
+import threading
+from collections import OrderedDict
+from math import exp, lgamma
+from time import perf_counter
+
+from django.conf import settings
+
+from .solver import OutOfTime, solve_game
+
+_memo = OrderedDict()
+_memo_lock = threading.Lock()
+
+
+def _add(polynomial, other, shift=0):
+    """Adds other * x**shift to polynomial in place; polynomials are lists of coefficients."""
+    needed = len(other) + shift
+    if len(polynomial) < needed:
+        polynomial.extend([0] * (needed - len(polynomial)))
+    for i, value in enumerate(other):
+        polynomial[i + shift] += value
+    return polynomial
+
+
+def _multiply(left, right):
+    product = [0] * (len(left) + len(right) - 1)
+    for i, a in enumerate(left):
+        if a:
+            for j, b in enumerate(right):
+                product[i + j] += a * b
+    return product
+
+
+def count_layouts(cells, constraints, deadline=None):
+    """
+    Counts the mine layouts of a group of hidden cells that satisfy the
+    constraints on them, by number of mines.
+
+    Cells are assigned in order, and the counts are kept per state: the
+    mines still needed by every constraint with cells on both sides of the
+    cell being assigned. A forward and a backward pass over the states give
+    the layouts through each cell without listing them.
+
+    Args:
+        cells: Cell indexes of the group, ideally in an order where each
+            constraint's cells are close together (as solver.component gives)
+        constraints: (cells, mines) pairs; the cells of each are in the group
+        deadline: Optional perf_counter() time to give up at
+
+    Returns:
+        The same as solver.enumerate_layouts: a dictionary mapping a number
+        of mines to (layouts, per_cell)
+
+    Raises:
+        OutOfTime: If the deadline passed
+
+    Example:
+        count_layouts([1, 2], [([1, 2], 1)]) -> {1: (2, [1, 1])}
+    """
+    size = len(cells)
+    position = {cell: i for i, cell in enumerate(cells)}
+    members = [sorted(position[cell] for cell in constraint_cells) for constraint_cells, _ in constraints]
+    needs = [mines for _, mines in constraints]
+
+    touching = [[] for _ in range(size)]
+    # Cells of each constraint after each of its cells
+    after = {}
+    for k, positions in enumerate(members):
+        for rank, i in enumerate(positions):
+            touching[i].append(k)
+            after[k, i] = len(positions) - rank - 1
+    # Constraints with cells on both sides of each boundary between cells
+    active = [[] for _ in range(size + 1)]
+    for k, positions in enumerate(members):
+        for i in range(positions[0] + 1, positions[-1] + 1):
+            active[i].append(k)
+
+    def step(i, state, bit):
+        current = dict(zip(active[i], state))
+        for k in touching[i]:
+            need = current.get(k, needs[k]) - bit
+            if need < 0 or need > after[k, i]:
+                return None
+            current[k] = need
+        return tuple(current[k] for k in active[i + 1])
+
+    def check():
+        if deadline is not None and perf_counter() > deadline:
+            raise OutOfTime
+
+    forward = [{(): [1]}]
+    moves = []
+    for i in range(size):
+        check()
+        layer = {}
+        transitions = {}
+        for state, polynomial in forward[i].items():
+            targets = []
+            for bit in (0, 1):
+                target = step(i, state, bit)
+                if target is not None:
+                    targets.append((bit, target))
+                    _add(layer.setdefault(target, []), polynomial, bit)
+            transitions[state] = targets
+        forward.append(layer)
+        moves.append(transitions)
+
+    totals = forward[size].get(())
+    if not totals:
+        return {}
+
+    backward = [None] * size + [{(): [1]}]
+    for i in reversed(range(size)):
+        check()
+        layer = {}
+        following = backward[i + 1]
+        for state, targets in moves[i].items():
+            polynomial = []
+            for bit, target in targets:
+                if target in following:
+                    _add(polynomial, following[target], bit)
+            if polynomial:
+                layer[state] = polynomial
+        backward[i] = layer
+
+    per_cell = []
+    for i in range(size):
+        check()
+        polynomial = []
+        following = backward[i + 1]
+        for state, targets in moves[i].items():
+            for bit, target in targets:
+                if bit and target in following:
+                    _add(polynomial, _multiply(forward[i][state], following[target]), 1)
+        per_cell.append(polynomial)
+
+    return {
+        mines: (count, [polynomial[mines] if mines < len(polynomial) else 0 for polynomial in per_cell])
+        for mines, count in enumerate(totals) if count
+    }
+
+
+def component_signature(cells, constraints):
+    """The shape of a component: its constraints over the positions of its cells."""
+    position = {cell: i for i, cell in enumerate(cells)}
+    return (len(cells), tuple(sorted(
+        (tuple(sorted(position[cell] for cell in constraint_cells)), mines)
+        for constraint_cells, mines in constraints
+    )))
+
+
+def component_layouts(cells, constraints, deadline=None):
+    """
+    count_layouts, memoized by the shape of the component in the last
+    MINESWEEPER_PROBABILITY_MEMO_SIZE components counted in this process.
+    """
+    key = component_signature(cells, constraints)
+    with _memo_lock:
+        layouts = _memo.get(key)
+        if layouts is not None:
+            _memo.move_to_end(key)
+            return layouts
+
+    layouts = count_layouts(cells, constraints, deadline)
+    with _memo_lock:
+        _memo[key] = layouts
+        while len(_memo) > getattr(settings, 'MINESWEEPER_PROBABILITY_MEMO_SIZE', 10000):
+            _memo.popitem(last=False)
+    return layouts
+
+
+def _normalized(values):
+    top = max(values, default=0)
+    return [value / top for value in values] if top else values
+
+
+def interior_weights(interior, mines_left, most):
+    """
+    Returns, for k from 0 to most frontier mines, C(interior, mines_left - k)
+    scaled so the largest is 1.
+    """
+    logs = []
+    for k in range(most + 1):
+        rest = mines_left - k
+        if 0 <= rest <= interior:
+            logs.append(lgamma(interior + 1) - lgamma(rest + 1) - lgamma(interior - rest + 1))
+        else:
+            logs.append(None)
+    top = max((value for value in logs if value is not None), default=None)
+    if top is None:
+        return None
+    return [0.0 if value is None else exp(value - top) for value in logs]
+
+
+def combine(components, interior, mines_left):
+    """
+    Combines the layouts of independent frontier components with the ways
+    of placing the remaining mines in the interior.
+
+    Args:
+        components: Layout counts of each component, as count_layouts returns them
+        interior: Number of unconstrained hidden cells
+        mines_left: Mines not known to be anywhere yet
+
+    Returns:
+        Tuple (per_component, interior_probability): the mine probability of
+        every cell of each component, in the component's order, and of any
+        interior cell (None without interior cells). None if no layout fits.
+    """
+    count = len(components)
+    distributions = []
+    for layouts in components:
+        top = max(layouts_count for layouts_count, _ in layouts.values())
+        distribution = [0.0] * (max(layouts) + 1)
+        for mines, (layouts_count, _) in layouts.items():
+            distribution[mines] = layouts_count / top
+        distributions.append((distribution, top))
+
+    most = sum(len(distribution) - 1 for distribution, _ in distributions)
+    weights = interior_weights(interior, mines_left, most)
+    if weights is None:
+        return None
+
+    # suffix[c][k]: weight of the layouts of components c.. given k mines before them
+    suffix = [None] * count + [weights]
+    for c in reversed(range(count)):
+        distribution = distributions[c][0]
+        following = suffix[c + 1]
+        suffix[c] = _normalized([
+            sum(share * following[k + mines] for mines, share in enumerate(distribution) if k + mines <= most)
+            for k in range(most + 1)
+        ])
+
+    # prefix[c][k]: layouts of the components before c with k mines
+    prefix = [[1.0]]
+    for distribution, _ in distributions:
+        prefix.append(_normalized(_multiply(prefix[-1], distribution)))
+
+    per_component = []
+    for c, layouts in enumerate(components):
+        distribution, top = distributions[c]
+        before = prefix[c]
+        following = suffix[c + 1]
+        weight = [
+            sum(share * following[k + mines] for k, share in enumerate(before) if k + mines <= most)
+            for mines in range(len(distribution))
+        ]
+        total = sum(share * weight[mines] for mines, share in enumerate(distribution))
+        if not total:
+            return None
+        size = len(next(iter(layouts.values()))[1])
+        probabilities = [0.0] * size
+        for mines, (_, per_cell) in layouts.items():
+            for i, cell_count in enumerate(per_cell):
+                if cell_count:
+                    probabilities[i] += cell_count / top * weight[mines]
+        per_component.append([probability / total for probability in probabilities])
+
+    interior_probability = None
+    if interior:
+        layouts_by_mines = prefix[count]
+        total = sum(share * weights[k] for k, share in enumerate(layouts_by_mines))
+        if not total:
+            return None
+        interior_probability = sum(
+            share * weights[k] * (mines_left - k) for k, share in enumerate(layouts_by_mines)
+        ) / (total * interior)
+
+    return per_component, interior_probability
+
+
+def mine_probabilities(solver, deadline=None):
+    """
+    Returns the mine probability of every hidden cell of a solved board, as
+    a dictionary mapping cell indexes to probabilities, or None if no
+    layout of the mines fits the board.
+
+    Raises:
+        OutOfTime: If the deadline passed
+    """
+    values = solver.values
+    probabilities = dict.fromkeys(solver.safe, 0.0)
+    probabilities.update(dict.fromkeys(solver.mines, 1.0))
+
+    components = []
+    frontier = 0
+    seen = set()
+    for number, value in enumerate(values):
+        if not 0 <= value <= 8 or number in seen:
+            continue
+        if not solver.constraint(number)[0]:
+            continue
+        cells, constraints, members = solver.component(number)
+        seen.update(members)
+        frontier += len(cells)
+        components.append((cells, component_layouts(cells, constraints, deadline)))
+
+    interior = solver.hidden - len(solver.safe) - len(solver.mines) - frontier
+    mines_left = solver.total_mines - solver.revealed_mines - len(solver.mines)
+    combined = combine([layouts for _, layouts in components], interior, mines_left)
+    if combined is None:
+        return None
+
+    per_component, interior_probability = combined
+    for (cells, _), cell_probabilities in zip(components, per_component):
+        probabilities.update(zip(cells, cell_probabilities))
+    if interior:
+        for i, value in enumerate(values):
+            if value == -1 and i not in probabilities:
+                probabilities[i] = interior_probability
+    return probabilities
+
+
+def game_probabilities(game, time_budget=None):
+    """
+    Returns the mine probabilities of a game's board as a grid with None for
+    revealed cells, or None if they couldn't be computed within the time
+    budget (settings.MINESWEEPER_PROBABILITY_TIME_BUDGET, in seconds).
+    Components counted before the deadline stay memoized for the next call.
+    """
+    if time_budget is None:
+        time_budget = getattr(settings, 'MINESWEEPER_PROBABILITY_TIME_BUDGET', 1.0)
+    deadline = perf_counter() + time_budget
+    solver = solve_game(game)
+    try:
+        probabilities = mine_probabilities(solver, deadline)
+    except OutOfTime:
+        return None
+    if probabilities is None:
+        return None
+
+    width = game.width
+    return [
+        [
+            round(probabilities[row * width + col], 6) if row * width + col in probabilities else None
+            for col in range(width)
+        ]
+        for row in range(game.height)
+    ]
+
+
+def reset():
+    """Drops every memoized component. Used by the tests."""
+    with _memo_lock:
+        _memo.clear()
@@ -0,0 +1,211 @@
+"""
+Expiry of abandoned and finished games.
+
+A game expires MINESWEEPER_IDLE_GAME_TTL seconds after its last move while
+in progress, and MINESWEEPER_FINISHED_GAME_TTL seconds after its last move
+once finished. purge_games deletes expired games in batches of
+MINESWEEPER_PURGE_BATCH_SIZE, each in its own short transaction, pausing
+MINESWEEPER_PURGE_PAUSE seconds between batches, so live moves never wait
+long on its locks. In write-behind mode unflushed moves are flushed first,
+so a game is never purged for moves only the cache has seen. With
+MINESWEEPER_PURGE_ARCHIVE an ArchivedGame with the game's settings and
+outcome is kept for every deleted game.
+
+Purges run from the purge_games management command, or every
+MINESWEEPER_PURGE_INTERVAL seconds in a background thread of the server
+process when that setting is set. At most one purge starts per interval
+across the processes sharing the cache.
+"""
+import logging
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import ArchivedGame, Game
+from .store import flush_dirty_games, state_cache, state_key, write_behind_enabled
+
+logger = logging.getLogger(__name__)
+
+# Added with the purge interval as timeout, so at most one purge runs per interval
+PURGE_KEY = 'game_purge'
+
+# Game fields copied to the archive
+ARCHIVED_FIELDS = (
+    'id', 'width', 'height', 'mines', 'mode', 'revealed_cells', 'version', 'game_over', 'game_won',
+    'created_at', 'last_move_at'
+)
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def expired(now=None):
+    """The condition matching expired games, as of now."""
+    if now is None:
+        now = timezone.now()
+    idle = now - timedelta(seconds=getattr(settings, 'MINESWEEPER_IDLE_GAME_TTL', 60 * 60 * 24 * 7))
+    finished = now - timedelta(seconds=getattr(settings, 'MINESWEEPER_FINISHED_GAME_TTL', 60 * 60 * 24 * 30))
+    return (
+        Q(game_over=False, game_won=False, last_move_at__lt=idle)
+        | Q(game_over=True, last_move_at__lt=finished)
+        | Q(game_won=True, last_move_at__lt=finished)
+    )
+
+
+def archive(row):
+    """The ArchivedGame of a game's archived fields."""
+    if row['game_won']:
+        result = ArchivedGame.WON
+    elif row['game_over']:
+        result = ArchivedGame.LOST
+    else:
+        result = ArchivedGame.ABANDONED
+    return ArchivedGame(
+        id=row['id'], width=row['width'], height=row['height'], mines=row['mines'], mode=row['mode'],
+        result=result, revealed_cells=row['revealed_cells'], moves=row['version'],
+        created_at=row['created_at'], last_move_at=row['last_move_at']
+    )
+
+
+def purge_batch(condition, batch_size, archived):
+    """
+    Deletes one batch of games matching the condition, archiving them first
+    if archived. Rows another transaction holds are left for a later batch.
+
+    Returns:
+        The ids of the deleted games
+    """
+    skip_locked = connection.features.has_select_for_update_skip_locked
+    with transaction.atomic():
+        rows = list(
+            Game.objects.filter(condition).select_for_update(skip_locked=skip_locked)
+            .values(*ARCHIVED_FIELDS)[:batch_size]
+        )
+        ids = [row['id'] for row in rows]
+        if not ids:
+            return ids
+        if archived:
+            ArchivedGame.objects.bulk_create([archive(row) for row in rows], ignore_conflicts=True)
+        Game.objects.filter(pk__in=ids).delete()
+
+    cache.delete_many([f"game_{game_id}" for game_id in ids])
+    state_cache().delete_many([state_key(game_id) for game_id in ids])
+    return ids
+
+
+def purge_games(now=None, batch_size=None, archived=None, limit=None, pause=None):
+    """
+    Deletes the games expired as of now, batch by batch.
+
+    Args:
+        now: Time to expire from; defaults to the current time
+        batch_size: Games per transaction; defaults to settings.MINESWEEPER_PURGE_BATCH_SIZE
+        archived: Whether to archive the games; defaults to settings.MINESWEEPER_PURGE_ARCHIVE
+        limit: Optional most games to delete
+        pause: Seconds between batches; defaults to settings.MINESWEEPER_PURGE_PAUSE
+
+    Returns:
+        Number of games deleted
+    """
+    if batch_size is None:
+        batch_size = getattr(settings, 'MINESWEEPER_PURGE_BATCH_SIZE', 500)
+    if archived is None:
+        archived = getattr(settings, 'MINESWEEPER_PURGE_ARCHIVE', True)
+    if pause is None:
+        pause = getattr(settings, 'MINESWEEPER_PURGE_PAUSE', 0.1)
+    if write_behind_enabled():
+        flush_dirty_games(force=True)
+    condition = expired(now)
+
+    purged = 0
+    while limit is None or purged < limit:
+        size = batch_size if limit is None else min(batch_size, limit - purged)
+        ids = purge_batch(condition, size, archived)
+        purged += len(ids)
+        if len(ids) < size:
+            break
+        if pause:
+            time.sleep(pause)
+
+    if purged:
+        logger.info("Purged %s expired games", purged)
+    return purged
+
+
+def count_expired(now=None):
+    """Number of games expired as of now."""
+    return Game.objects.filter(expired(now)).count()
+
+
+def purge_interval():
+    return getattr(settings, 'MINESWEEPER_PURGE_INTERVAL', None)
+
+
+def scheduled_purge():
+    """
+    Purges expired games unless another process started a purge less than
+    a purge interval ago.
+
+    Returns:
+        Number of games deleted, or None if the purge was skipped
+    """
+    if not cache.add(PURGE_KEY, True, timeout=purge_interval()):
+        return None
+    return purge_games()
+
+
+class PurgeScheduler:
+    """The background thread that purges expired games once per interval."""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                scheduled_purge()
+            except Exception as e:
+                logger.error("Error purging expired games: %s", e, exc_info=True)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self.run, name='game-purge', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+def start_purge_scheduler():
+    """
+    Starts purging expired games in the background if MINESWEEPER_PURGE_INTERVAL
+    is set. Called by startup.startup().
+    """
+    global _scheduler
+    interval = purge_interval()
+    if not interval:
+        return
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = PurgeScheduler(interval)
+            _scheduler.start()
+
+
+def reset():
+    """Stops the scheduler. Used by the tests."""
+    global _scheduler
+    with _scheduler_lock:
+        scheduler, _scheduler = _scheduler, None
+    if scheduler is not None:
+        scheduler.stop()
@@ -0,0 +1,137 @@
+"""
+Precomputed index of the connected zero regions of a board.
+
+Revealing a cell with no adjacent mines uncovers its whole connected region
+of empty cells plus the ring of numbered cells around it. That set is fixed
+once the mines are placed, so it is computed when the board is created and
+stored as row runs (half-open column ranges within one row):
+
+- zero runs: runs of empty cells tagged with their region, sorted by
+  position, used to find which region a clicked cell belongs to
+- member runs: runs of every cell a region uncovers, grouped by region
+"""
+from array import array
+from bisect import bisect_right
+
+_DIGITS = tuple(str(n) for n in range(9))
+
+
+class ZeroRegionIndex:
+    """
+    Row-run index of every connected zero region of a board.
+
+    All positions are flat row-major cell indices. Runs are stored as
+    parallel arrays of starts and (exclusive) ends.
+    """
+
+    def __init__(self, height, width, zero_starts, zero_ends, zero_regions,
+                 member_starts, member_ends, region_offsets):
+        self.height = height
+        self.width = width
+        self.zero_starts = zero_starts
+        self.zero_ends = zero_ends
+        self.zero_regions = zero_regions
+        self.member_starts = member_starts
+        self.member_ends = member_ends
+        self.region_offsets = region_offsets
+
+    @classmethod
+    def empty(cls, height, width):
+        return cls(height, width, array('I'), array('I'), array('I'),
+                   array('I'), array('I'), array('I', [0]))
+
+    @property
+    def region_count(self):
+        return len(self.region_offsets) - 1
+
+    def region_at(self, row, col):
+        """
+        Returns the region containing the given empty cell, or None if the cell
+        is not an empty cell.
+        """
+        index = row * self.width + col
+        run = bisect_right(self.zero_starts, index) - 1
+        if run >= 0 and index < self.zero_ends[run]:
+            return self.zero_regions[run]
+        return None
+
+    def member_runs(self, region):
+        """
+        Yields (row, start_col, end_col) for every run of cells the region uncovers.
+        """
+        width = self.width
+        for run in range(self.region_offsets[region], self.region_offsets[region + 1]):
+            row, start = divmod(self.member_starts[run], width)
+            yield row, start, start + self.member_ends[run] - self.member_starts[run]
+
+
+def build_runs(cells, labels, width):
+    """
+    Groups sorted cells into row runs of consecutive cells sharing a label.
+
+    Args:
+        cells: Flat cell indices, sorted by (label, index) or by index alone
+        labels: Label of each cell
+        width: Board width, used to break runs at row boundaries
+
+    Returns:
+        Tuple of arrays (starts, ends, run_labels)
+    """
+    starts, ends, run_labels = array('I'), array('I'), array('I')
+    previous_cell = previous_label = None
+
+    for cell, label in zip(cells, labels):
+        # Extend the current run unless the label changes or a new row starts
+        if (previous_cell is not None and cell == previous_cell + 1
+                and label == previous_label and cell % width):
+            ends[-1] = cell + 1
+            previous_cell = cell
+            continue
+        starts.append(cell)
+        ends.append(cell + 1)
+        run_labels.append(label)
+        previous_cell, previous_label = cell, label
+
+    return starts, ends, run_labels
+
+
+def region_offsets(run_labels, region_count):
+    """
+    Returns the offset of the first run of every region, plus the total run count.
+    """
+    offsets = array('I', [0] * (region_count + 1))
+    for label in run_labels:
+        offsets[label + 1] += 1
+    for region in range(region_count):
+        offsets[region + 1] += offsets[region]
+    return offsets
+
+
+def reveal_region(board, counts, index, region, changes=None):
+    """
+    Reveals every hidden cell of a precomputed zero region in one pass.
+
+    Cells that are already revealed or flagged are left as they are.
+
+    Args:
+        board: The player's visible board to update
+        counts: Adjacent mine counts of the board
+        index: ZeroRegionIndex of the board
+        region: Region to reveal, as returned by index.region_at
+        changes: Optional list to which (row, col, value) is appended per revealed cell
+
+    Returns:
+        Number of cells revealed
+    """
+    revealed = 0
+    for row, start, end in index.member_runs(region):
+        board_row = board[row]
+        count_row = counts[row]
+        for col in range(start, end):
+            if board_row[col] == '':
+                value = _DIGITS[count_row[col]]
+                board_row[col] = value
+                revealed += 1
+                if changes is not None:
+                    changes.append((row, col, value))
+    return revealed
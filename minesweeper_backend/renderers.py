@@ -0,0 +1,206 @@
+"""
+Compact wire formats for game responses.
+
+JSON with board_state as an array of arrays of cell strings stays the
+default. Clients that want smaller payloads ask for one of these media types
+in the Accept header (or with ?format=<name>):
+
+- rows   application/vnd.minesweeper.rows+json
+         board_state is one string per row, hidden cells written as '.':
+         ["..12F", "..1M."]
+- rle    application/vnd.minesweeper.rle+json
+         board_state is one run-length encoded row per row, as alternating
+         cells and run lengths: [[".", 12, "1", 2, ".", 16], ...]
+- sparse application/vnd.minesweeper.sparse+json
+         board_state lists only the cells that aren't hidden, as the
+         [row, col, value] triples used for deltas
+- board  application/vnd.minesweeper.board
+         binary: the length of the JSON part as a 32-bit big-endian integer,
+         the JSON part (the response without board_state), then, when the
+         response has a board, the packed cell states of codec.encode_cells
+
+Only board_state changes between formats; the other fields, including the
+[row, col, value] changes of delta responses, are the same in all of them.
+"""
+import json
+import struct
+
+from django.core.serializers.json import DjangoJSONEncoder
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.settings import api_settings
+
+from .codec import encode_cells
+from .metrics import phase
+
+JSON = 'application/json'
+ROWS = 'application/vnd.minesweeper.rows+json'
+RLE = 'application/vnd.minesweeper.rle+json'
+SPARSE = 'application/vnd.minesweeper.sparse+json'
+BOARD = 'application/vnd.minesweeper.board'
+
+# Length prefix of the JSON part of a binary response
+JSON_LENGTH = struct.Struct('>I')
+
+HIDDEN = '.'
+
+
+def encode_rows(board):
+    return [''.join(cell or HIDDEN for cell in row) for row in board]
+
+
+def encode_rle(board):
+    encoded = []
+    for row in board:
+        runs = []
+        previous = None
+        for cell in row:
+            if cell == previous:
+                runs[-1] += 1
+            else:
+                runs.append(cell or HIDDEN)
+                runs.append(1)
+                previous = cell
+        encoded.append(runs)
+    return encoded
+
+
+def encode_sparse(board):
+    return [
+        [r, c, cell]
+        for r, row in enumerate(board)
+        for c, cell in enumerate(row)
+        if cell
+    ]
+
+
+BOARD_ENCODERS = {
+    ROWS: encode_rows,
+    RLE: encode_rle,
+    SPARSE: encode_sparse,
+}
+
+FORMATS = {
+    'json': JSON,
+    'rows': ROWS,
+    'rle': RLE,
+    'sparse': SPARSE,
+    'board': BOARD,
+}
+
+FORMAT_NAMES = {media_type: name for name, media_type in FORMATS.items()}
+
+
+def compact_board(data, media_type):
+    """
+    Returns the response data with its board_state in the given JSON format.
+    """
+    encoder = BOARD_ENCODERS.get(media_type)
+    if encoder is None or not isinstance(data, dict) or data.get('board_state') is None:
+        return data
+    data = dict(data)
+    data['board_state'] = encoder(data['board_state'])
+    return data
+
+
+def encode_binary(data):
+    """
+    Returns a response in the binary format: the length prefixed JSON part,
+    followed by the packed board if the response has one.
+    """
+    data = dict(data)
+    board = data.pop('board_state', None)
+    meta = json.dumps(data, cls=DjangoJSONEncoder, separators=(',', ':')).encode()
+    packed = encode_cells(board) if board is not None else b''
+    return JSON_LENGTH.pack(len(meta)) + meta + packed
+
+
+@phase('serialize')
+def render(data, media_type):
+    """
+    Returns the body of a response in one of the compact formats.
+    """
+    if media_type == BOARD:
+        return encode_binary(data)
+    return json.dumps(compact_board(data, media_type), cls=DjangoJSONEncoder, separators=(',', ':')).encode()
+
+
+def negotiate(accept, format=None):
+    """
+    Picks the media type of a response from the Accept header, or from the
+    format query parameter, which takes precedence.
+
+    Returns:
+        The media type, or None when none of the accepted types is supported
+
+    Example:
+        negotiate('application/vnd.minesweeper.rle+json, */*;q=0.1')
+        -> 'application/vnd.minesweeper.rle+json'
+    """
+    if format:
+        return FORMATS.get(format)
+    if not accept:
+        return JSON
+
+    ranked = []
+    for position, part in enumerate(accept.split(',')):
+        media_type, _, params = part.partition(';')
+        quality = 1.0
+        for param in params.split(';'):
+            name, _, value = param.partition('=')
+            if name.strip() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            ranked.append((-quality, position, media_type.strip().lower()))
+
+    for _, _, media_type in sorted(ranked):
+        if media_type in FORMATS.values():
+            return media_type
+        if media_type in ('*/*', 'application/*'):
+            return JSON
+    return None
+
+
+class CompactBoardRenderer(JSONRenderer):
+    """JSON renderer writing board_state in a compact format."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        with phase('serialize'):
+            return super().render(compact_board(data, self.media_type), accepted_media_type, renderer_context)
+
+
+class RowsRenderer(CompactBoardRenderer):
+    media_type = ROWS
+    format = 'rows'
+
+
+class RunLengthRenderer(CompactBoardRenderer):
+    media_type = RLE
+    format = 'rle'
+
+
+class SparseRenderer(CompactBoardRenderer):
+    media_type = SPARSE
+    format = 'sparse'
+
+
+class BinaryBoardRenderer(BaseRenderer):
+    media_type = BOARD
+    format = 'board'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        with phase('serialize'):
+            return encode_binary(data)
+
+
+# Renderers of the views returning boards; the default ones come first so
+# clients that don't ask for a format keep getting JSON
+GAME_RENDERERS = list(api_settings.DEFAULT_RENDERER_CLASSES) + [
+    RowsRenderer, RunLengthRenderer, SparseRenderer, BinaryBoardRenderer
+]
@@ -0,0 +1,433 @@
+"""
+Constraint-propagation solver for the player's view of a board.
+
+Every revealed number is a constraint: its hidden neighbours hold exactly
+its value, less the neighbours already known to be mines. The solver only
+reads the player board, flags included as hidden cells since players can
+place them wrongly, and deduces the hidden cells that are certainly safe or
+certainly mines with, in order of cost:
+
+1. single-point rules: a number whose mines are all known makes its other
+   hidden neighbours safe; one with as many hidden neighbours as missing
+   mines makes them all mines;
+2. subset reduction: two numbers sharing hidden cells, where the cells only
+   one of them sees must all be mines (and the other's all safe) for both
+   to hold;
+3. enumeration: every mine layout of a small group of frontier cells is
+   tried as a bitmask, and cells that are safe (or a mine) in every layout
+   satisfying the group's numbers are deduced. Groups are the connected
+   components of the frontier when they are small enough, otherwise the
+   numbers around each unresolved number;
+4. the mine count: when the mines left are all known, or fill every cell
+   still unknown.
+
+A Solver keeps what it deduced. After a move, update() compares the new
+board with the one it solved, and solve() only re-examines the numbers
+around the cells that changed. solve_game() keeps the solvers of recently
+hinted games for that.
+"""
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from time import perf_counter
+
+from django.conf import settings
+
+from .board import NEIGHBOURS
+from .metrics import phase
+
+# Cell values; 0-8 are revealed numbers
+HIDDEN = -1
+MINE = 9
+
+_VALUES = {str(n): n for n in range(9)}
+_VALUES.update({'': HIDDEN, 'F': HIDDEN, 'M': MINE})
+
+_solvers = OrderedDict()
+_solvers_lock = threading.Lock()
+
+
+class OutOfTime(Exception):
+    pass
+
+
+@lru_cache(maxsize=32)
+def neighbour_table(width, height):
+    """
+    Returns, for every cell index of a board, the indexes of its neighbours.
+    Shared by every board of the same size.
+    """
+    table = []
+    for row in range(height):
+        for col in range(width):
+            table.append(tuple(
+                (row + dr) * width + col + dc
+                for dr, dc in NEIGHBOURS
+                if 0 <= row + dr < height and 0 <= col + dc < width
+            ))
+    return tuple(table)
+
+
+def enumerate_layouts(cells, constraints, deadline=None):
+    """
+    Enumerates the mine layouts of a group of hidden cells that satisfy the
+    constraints on them, one bit per cell.
+
+    Args:
+        cells: Cell indexes of the group
+        constraints: (cells, mines) pairs; the cells of each are in the group
+        deadline: Optional perf_counter() time to give up at
+
+    Returns:
+        Dictionary mapping a number of mines to a pair (layouts, per_cell):
+        how many layouts place that many mines, and in how many of them each
+        cell, in the order of cells, is a mine
+
+    Raises:
+        OutOfTime: If the deadline passed
+
+    Example:
+        enumerate_layouts([1, 2], [([1, 2], 1)]) -> {1: (2, [1, 1])}
+    """
+    size = len(cells)
+    position = {cell: i for i, cell in enumerate(cells)}
+    # Constraints to check once each cell is assigned, as (mask, mines) pairs
+    checks = [[] for _ in range(size)]
+    for constraint_cells, mines in constraints:
+        mask = 0
+        for cell in constraint_cells:
+            mask |= 1 << position[cell]
+        for i in range(size):
+            if mask >> i & 1:
+                checks[i].append((mask, mines))
+
+    results = {}
+    visited = [0]
+
+    def visit(i, layout):
+        if i == size:
+            mines = layout.bit_count()
+            entry = results.get(mines)
+            if entry is None:
+                entry = results[mines] = [0, [0] * size]
+            entry[0] += 1
+            per_cell = entry[1]
+            while layout:
+                low = layout & -layout
+                per_cell[low.bit_length() - 1] += 1
+                layout ^= low
+            return
+
+        visited[0] += 1
+        if deadline is not None and not visited[0] & 0x3FF and perf_counter() > deadline:
+            raise OutOfTime
+
+        unassigned = ~((2 << i) - 1)
+        for candidate in (layout, layout | 1 << i):
+            for mask, mines in checks[i]:
+                placed = (candidate & mask).bit_count()
+                if placed > mines or placed + (mask & unassigned).bit_count() < mines:
+                    break
+            else:
+                visit(i + 1, candidate)
+
+    visit(0, 0)
+    return {mines: (layouts, per_cell) for mines, (layouts, per_cell) in results.items()}
+
+
+class Solver:
+    """
+    The cells of one board deduced safe or mines, kept across moves.
+
+    Cells are row-major indexes (row * width + col).
+    """
+
+    def __init__(self, width, height, mines=None, enumeration_limit=None):
+        """
+        Args:
+            width: Number of columns
+            height: Number of rows
+            mines: Optional total number of mines, for the mine count rule
+            enumeration_limit: Largest group of cells to enumerate; defaults
+                to settings.MINESWEEPER_SOLVER_ENUMERATION_LIMIT
+        """
+        self.width = width
+        self.height = height
+        self.total_mines = mines
+        if enumeration_limit is None:
+            enumeration_limit = getattr(settings, 'MINESWEEPER_SOLVER_ENUMERATION_LIMIT', 18)
+        self.enumeration_limit = enumeration_limit
+        self.neighbours = neighbour_table(width, height)
+        self.values = [HIDDEN] * (width * height)
+        self.version = None
+        self.safe = set()
+        self.mines = set()
+        # Flagged cells, which are solved as hidden ones
+        self.flagged = set()
+        self.complete = True
+        self.hidden = width * height
+        self.revealed_mines = 0
+        # Numbers whose constraint changed, unresolved numbers to enumerate
+        # around, and numbers whose group was too large to enumerate
+        self._pending = set()
+        self._unresolved = set()
+        self._skipped = set()
+
+    @classmethod
+    def from_board(cls, player_board, mines=None, **kwargs):
+        height = len(player_board)
+        width = len(player_board[0]) if height else 0
+        solver = cls(width, height, mines, **kwargs)
+        solver.update(player_board)
+        return solver
+
+    def update(self, player_board, version=None):
+        """
+        Takes in the current player board. Only the numbers around the cells
+        that changed since the last update are re-examined by solve().
+        """
+        cells = [cell for row in player_board for cell in row]
+        values = [_VALUES[cell] for cell in cells]
+        old = self.values
+        neighbours = self.neighbours
+        for i, value in enumerate(values):
+            if value == old[i]:
+                continue
+            self.safe.discard(i)
+            self.mines.discard(i)
+            if 0 <= value <= 8:
+                self._pending.add(i)
+            for n in neighbours[i]:
+                if 0 <= values[n] <= 8:
+                    self._pending.add(n)
+
+        self.values = values
+        self.flagged = {i for i, cell in enumerate(cells) if cell == 'F'}
+        self.hidden = values.count(HIDDEN)
+        self.revealed_mines = values.count(MINE)
+        self.version = version
+
+    @phase('engine')
+    def solve(self, deadline=None):
+        """
+        Deduces what the board allows, stopping at the deadline.
+
+        Sets complete to False if the deadline passed or a group was too
+        large to enumerate; a later solve() carries on from there.
+        """
+        try:
+            while True:
+                self._propagate(deadline)
+                self._count_mines()
+                if self._pending:
+                    continue
+                if not self._unresolved:
+                    break
+                self._enumerate(deadline)
+                if not self._pending:
+                    break
+        except OutOfTime:
+            self.complete = False
+        else:
+            self.complete = not self._skipped
+        return self
+
+    def constraint(self, number):
+        """Returns the unknown hidden neighbours of a number and how many of them are mines."""
+        values = self.values
+        mines = self.mines
+        cells = []
+        need = values[number]
+        for cell in self.neighbours[number]:
+            value = values[cell]
+            if value == HIDDEN:
+                if cell in mines:
+                    need -= 1
+                elif cell not in self.safe:
+                    cells.append(cell)
+            elif value == MINE:
+                need -= 1
+        return cells, need
+
+    def _mark(self, cells, mine):
+        known = self.mines if mine else self.safe
+        values = self.values
+        for cell in cells:
+            known.add(cell)
+            for n in self.neighbours[cell]:
+                if 0 <= values[n] <= 8:
+                    self._pending.add(n)
+
+    def _propagate(self, deadline):
+        pending = self._pending
+        values = self.values
+        neighbours = self.neighbours
+        steps = 0
+        while pending:
+            steps += 1
+            if deadline is not None and not steps & 0xFF and perf_counter() > deadline:
+                raise OutOfTime
+
+            number = pending.pop()
+            self._skipped.discard(number)
+            cells, need = self.constraint(number)
+            if not cells:
+                self._unresolved.discard(number)
+                continue
+            if need == 0 or need == len(cells):
+                self._unresolved.discard(number)
+                self._mark(cells, need > 0)
+                continue
+
+            self._unresolved.add(number)
+            cell_set = set(cells)
+            others = {n for cell in cells for n in neighbours[cell] if n != number and 0 <= values[n] <= 8}
+            for other in others:
+                other_cells, other_need = self.constraint(other)
+                only_mine = cell_set.difference(other_cells)
+                only_other = set(other_cells).difference(cell_set)
+                if need - other_need == len(only_mine):
+                    mines, safe = only_mine, only_other
+                elif other_need - need == len(only_other):
+                    mines, safe = only_other, only_mine
+                else:
+                    continue
+                if mines or safe:
+                    self._mark(mines, True)
+                    self._mark(safe, False)
+                    break
+
+    def _count_mines(self):
+        if self.total_mines is None:
+            return
+        unknown = self.hidden - len(self.safe) - len(self.mines)
+        if not unknown:
+            return
+        left = self.total_mines - self.revealed_mines - len(self.mines)
+        if left != 0 and left != unknown:
+            return
+        cells = [
+            i for i, value in enumerate(self.values)
+            if value == HIDDEN and i not in self.safe and i not in self.mines
+        ]
+        self._mark(cells, left > 0)
+
+    def component(self, number):
+        """
+        Returns the frontier component of an unresolved number: its unknown
+        cells, the constraints over them and the numbers they come from.
+        """
+        neighbours = self.neighbours
+        values = self.values
+        constraints = {}
+        cells = []
+        seen = set()
+        queue = [number]
+        while queue:
+            current = queue.pop()
+            if current in constraints:
+                continue
+            constraint_cells, need = self.constraint(current)
+            constraints[current] = (constraint_cells, need)
+            for cell in constraint_cells:
+                if cell in seen:
+                    continue
+                seen.add(cell)
+                cells.append(cell)
+                for n in neighbours[cell]:
+                    if n not in constraints and 0 <= values[n] <= 8:
+                        queue.append(n)
+        return cells, list(constraints.values()), constraints.keys()
+
+    def _local_group(self, number):
+        """The cells and constraints of a number and the numbers sharing cells with it."""
+        cells, need = self.constraint(number)
+        values = self.values
+        group = dict.fromkeys(cells)
+        constraints = [(cells, need)]
+        others = {n for cell in cells for n in self.neighbours[cell] if n != number and 0 <= values[n] <= 8}
+        for other in others:
+            other_cells, other_need = self.constraint(other)
+            group.update(dict.fromkeys(other_cells))
+            constraints.append((other_cells, other_need))
+        return list(group), constraints
+
+    def _enumerate(self, deadline):
+        numbers = list(self._unresolved)
+        self._unresolved = set()
+        done = set()
+        large = set()
+        try:
+            while numbers:
+                number = numbers[-1]
+                if number not in done and number not in large:
+                    cells, constraints, members = self.component(number)
+                    if len(cells) <= self.enumeration_limit:
+                        done.update(members)
+                        self._deduce(cells, constraints, deadline)
+                    else:
+                        large.update(members)
+                if number not in done:
+                    # Too large a component: enumerate around each of its numbers
+                    cells, constraints = self._local_group(number)
+                    if len(cells) <= self.enumeration_limit:
+                        self._deduce(cells, constraints, deadline)
+                    else:
+                        self._skipped.add(number)
+                    done.add(number)
+                numbers.pop()
+        except OutOfTime:
+            # Carry on with the numbers left at the next solve
+            self._unresolved.update(numbers)
+            raise
+
+    def _deduce(self, cells, constraints, deadline):
+        if not cells:
+            return
+        layouts = enumerate_layouts(cells, constraints, deadline)
+        total = sum(count for count, _ in layouts.values())
+        if not total:
+            return
+        per_cell = [sum(counts[i] for _, counts in layouts.values()) for i in range(len(cells))]
+        self._mark([cell for cell, mines in zip(cells, per_cell) if mines == 0], False)
+        self._mark([cell for cell, mines in zip(cells, per_cell) if mines == total], True)
+
+    def cells(self, indexes):
+        """Returns cell indexes as sorted [row, col] pairs."""
+        return [list(divmod(i, self.width)) for i in sorted(indexes)]
+
+
+def solve_game(game, time_budget=None):
+    """
+    Returns the solver of a game, solved for its current board within the
+    time budget (settings.MINESWEEPER_HINT_TIME_BUDGET, in seconds).
+
+    The solvers of the last MINESWEEPER_SOLVER_CACHE_SIZE games solved in
+    this process are kept, so solving a game again only re-examines the
+    cells its moves changed.
+    """
+    if time_budget is None:
+        time_budget = getattr(settings, 'MINESWEEPER_HINT_TIME_BUDGET', 0.03)
+    deadline = perf_counter() + time_budget
+    key = str(game.id)
+
+    with _solvers_lock:
+        solver = _solvers.pop(key, None)
+    if solver is None or solver.version is None or solver.version > game.version:
+        solver = Solver(game.width, game.height, game.mines)
+    if solver.version != game.version:
+        with phase('engine'):
+            solver.update(game.player_board, game.version)
+    solver.solve(deadline)
+
+    with _solvers_lock:
+        _solvers[key] = solver
+        while len(_solvers) > getattr(settings, 'MINESWEEPER_SOLVER_CACHE_SIZE', 1000):
+            _solvers.popitem(last=False)
+    return solver
+
+
+def reset():
+    """Drops every kept solver. Used by the tests."""
+    with _solvers_lock:
+        _solvers.clear()
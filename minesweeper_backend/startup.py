@@ -0,0 +1,33 @@
+"""
+Startup of a server process.
+
+The WSGI and ASGI entry points call startup() once the application is
+loaded, so both servers start the same background work. Management
+commands, the tests and the generation processes never call it.
+"""
+from .engines import log_engine
+from .executors import start_generation_executor
+from .logs import configure as configure_logging
+from .pool import start_board_pool
+from .purge import start_purge_scheduler
+from .store import start_flusher
+
+
+def startup():
+    """
+    Starts the background work of a server process, in order:
+
+    1. queue logging, if MINESWEEPER_LOG_QUEUE is set, so every later step
+       logs off the request path;
+    2. reports the board engine MINESWEEPER_ENGINE picked;
+    3. creates the generation process pool, on the main thread;
+    4. pre-generates boards if MINESWEEPER_BOARD_POOL is set;
+    5. purges expired games if MINESWEEPER_PURGE_INTERVAL is set;
+    6. flushes idle games in write-behind mode.
+    """
+    configure_logging()
+    log_engine()
+    start_generation_executor()
+    start_board_pool()
+    start_purge_scheduler()
+    start_flusher()
@@ -0,0 +1,579 @@
+"""
+Cache-resident state of games in progress.
+
+By default every move locks the Game row and writes it back. With the
+MINESWEEPER_WRITE_BEHIND setting the authoritative state of a game lives in
+the cache instead: moves lock the cache entry, mutate it and put it back, and
+the Game row is only written every MINESWEEPER_FLUSH_INTERVAL seconds and when
+the game ends. Requests flush idle games once per interval, and so does a
+background thread of every server process (see start_flusher), so moves are
+flushed without traffic too. If the cache entry is lost (a restart of a
+local-memory cache, an eviction) the game is reloaded from its last flush.
+
+In both modes the cache entry holds everything needed to validate and apply a
+move, so reads never go to the database while the entry is cached. Reveals
+don't lock anything: update_game applies the move to the cached state and
+keeps the result with a compare-and-swap on the game version, retrying on a
+conflict.
+
+The views only use current_game, update_game, locked_game and save_game, so
+they behave the same in both modes. The async views use acurrent_game and
+aupdate_game, which do their I/O through the async cache and ORM APIs and run
+the moves themselves in the board executor.
+"""
+import asyncio
+import logging
+import threading
+import time
+import uuid
+from contextlib import ExitStack, asynccontextmanager, contextmanager
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.http import Http404
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+
+from .executors import run_board_work
+from .metrics import increment, label_board, phase
+from .models import Game
+
+logger = logging.getLogger(__name__)
+
+# Fields a move can change, written back on every flush
+MUTABLE_FIELDS = (
+    'cell_states', 'board_hash', 'revealed_cells', 'version', 'game_over', 'game_won', 'last_move_at'
+)
+
+# Fields added since states were first cached, and the value to assume when a
+# state cached before a deploy lacks them
+STATE_DEFAULTS = {'last_move_at': timezone.now, 'mode': lambda: Game.RANDOM}
+
+# Fields fixed when the board is generated
+BOARD_FIELDS = ('width', 'height', 'mines', 'mode', 'mine_bits', 'count_grid', 'zero_regions')
+
+# Games with unflushed moves, as {game_id: time the first unflushed move was made}
+DIRTY_KEY = 'game_state_dirty'
+
+# Added with the flush interval as timeout, so at most one sweep runs per interval
+SWEEP_KEY = 'game_state_sweep'
+
+STATE_TIMEOUT = 3600
+
+# How long a lock is held at most, and how long to wait for one
+LOCK_TIMEOUT = 10
+LOCK_WAIT = 5
+
+# Times update_game retries a move that lost a compare-and-swap
+MAX_ATTEMPTS = 5
+
+
+class GameLocked(Exception):
+    """
+    Raised when a game's state stays locked for longer than LOCK_WAIT seconds,
+    or keeps changing under a move for MAX_ATTEMPTS attempts.
+    """
+
+
+def write_behind_enabled():
+    return getattr(settings, 'MINESWEEPER_WRITE_BEHIND', False)
+
+
+def flush_interval():
+    return getattr(settings, 'MINESWEEPER_FLUSH_INTERVAL', 5)
+
+
+def state_cache():
+    return caches[getattr(settings, 'MINESWEEPER_STATE_CACHE', 'default')]
+
+
+def state_key(game_id):
+    return f"game_state_{game_id}"
+
+
+def pack_state(game):
+    """
+    Returns the cached state of a game: its packed boards and progress.
+
+    flushed_version is the version last written to the database and
+    dirty_since the time of the first move made after it (None when clean).
+    """
+    game.pack_player_board()
+    state = {field: getattr(game, field) for field in BOARD_FIELDS + MUTABLE_FIELDS}
+    for field in ('mine_bits', 'count_grid', 'zero_regions', 'cell_states'):
+        if state[field] is not None:
+            state[field] = bytes(state[field])
+    state['flushed_version'] = game.flushed_version
+    state['dirty_since'] = game.dirty_since
+    return state
+
+
+def state_field(state, field):
+    """Reads a field of a cached state, defaulting fields older states lack."""
+    if field not in state and field in STATE_DEFAULTS:
+        return STATE_DEFAULTS[field]()
+    return state[field]
+
+
+def unpack_state(game_id, state):
+    """
+    Builds a Game from a cached state without touching the database.
+    """
+    game = Game(id=game_id, **{field: state_field(state, field) for field in BOARD_FIELDS + MUTABLE_FIELDS})
+    game._state.adding = False
+    game._state.db = 'default'
+    game.flushed_version = state['flushed_version']
+    game.dirty_since = state['dirty_since']
+    return game
+
+
+@contextmanager
+def cache_lock(name):
+    """
+    Holds a lock shared by every process using the state cache.
+
+    The lock is a cache entry created with add(), which only succeeds when the
+    entry doesn't exist yet. It expires after LOCK_TIMEOUT seconds so a crashed
+    process can't hold it forever.
+
+    Raises:
+        GameLocked: If the lock can't be taken within LOCK_WAIT seconds
+    """
+    store = state_cache()
+    key = f"{name}_lock"
+    token = uuid.uuid4().hex
+    deadline = time.monotonic() + LOCK_WAIT
+    while not store.add(key, token, timeout=LOCK_TIMEOUT):
+        if time.monotonic() > deadline:
+            raise GameLocked(f"Timed out waiting for {name}")
+        time.sleep(0.002)
+    try:
+        yield
+    finally:
+        if store.get(key) == token:
+            store.delete(key)
+
+
+def _load_state(game_id):
+    """
+    Returns the cached state of a game, reloading it from the database on a miss.
+
+    Raises:
+        Http404: If the game doesn't exist
+    """
+    store = state_cache()
+    state = store.get(state_key(game_id))
+    if state is not None:
+        return state
+
+    game = get_object_or_404(Game, pk=game_id)
+    if write_behind_enabled() and str(game_id) in (store.get(DIRTY_KEY) or {}):
+        logger.warning("State of game %s was lost from the cache, recovered version %s from the database", game_id, game.version)
+    game.flushed_version = game.version
+    game.dirty_since = None
+    state = pack_state(game)
+    # add() so a slow reload never replaces a newer state
+    if not store.add(state_key(game_id), state, timeout=STATE_TIMEOUT):
+        state = store.get(state_key(game_id)) or state
+    return state
+
+
+@contextmanager
+def locked_game(game_id):
+    """
+    Yields the game with its state locked against concurrent moves.
+
+    In write-behind mode the lock is on the cache entry; otherwise the Game row
+    is locked with select_for_update inside a transaction. Changes are kept
+    with save_game before the block ends.
+
+    Raises:
+        Http404: If the game doesn't exist
+        GameLocked: If the cache lock can't be taken
+    """
+    with ExitStack() as stack:
+        with phase('lock'):
+            if not write_behind_enabled():
+                stack.enter_context(transaction.atomic())
+                game = get_object_or_404(Game.objects.select_for_update(), pk=game_id)
+            else:
+                stack.enter_context(cache_lock(state_key(game_id)))
+                game = unpack_state(game_id, _load_state(game_id))
+        label_board(game.width, game.height)
+        yield game
+
+
+@phase('save')
+def save_game(game):
+    """
+    Keeps the changes made to a game yielded by locked_game.
+
+    In write-behind mode the state goes back to the cache and is written to the
+    database once the flush interval has passed since its first unflushed
+    move, or straight away when the game has ended.
+    """
+    if not write_behind_enabled():
+        game.save()
+        return
+
+    _keep_state(game)
+    _sweep(game.id)
+
+
+def _keep_state(game):
+    # Puts a changed state back in the cache, flushing it when it is due.
+    # The caller must hold the game's lock.
+    now = time.time()
+    if game.dirty_since is None and game.version != game.flushed_version:
+        game.dirty_since = now
+        _mark_dirty(game.id, now)
+
+    if game.dirty_since is not None and (
+            game.game_over or game.game_won or now - game.dirty_since >= flush_interval()):
+        _write_state(game.id, pack_state(game))
+        game.flushed_version = game.version
+        game.dirty_since = None
+
+    state_cache().set(state_key(game.id), pack_state(game), timeout=STATE_TIMEOUT)
+
+
+def _sweep(game_id):
+    # Games nobody is playing any more are flushed by whichever request or
+    # flusher comes first once per interval
+    if state_cache().add(SWEEP_KEY, time.time(), timeout=flush_interval()):
+        return flush_dirty_games(skip=game_id)
+    return None
+
+
+class Flusher:
+    """The background thread that flushes idle games once per flush interval."""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                _sweep(None)
+            except Exception as e:
+                logger.error("Error flushing games: %s", e, exc_info=True)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self.run, name='game-flush', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+_flusher = None
+_flusher_lock = threading.Lock()
+
+
+def start_flusher():
+    """
+    Starts flushing idle games in the background in write-behind mode, unless
+    MINESWEEPER_BACKGROUND_FLUSH is off. Called by startup.startup(). At
+    most one flush starts per interval across the processes sharing the
+    state cache.
+    """
+    global _flusher
+    if not write_behind_enabled() or not getattr(settings, 'MINESWEEPER_BACKGROUND_FLUSH', True):
+        return
+    with _flusher_lock:
+        if _flusher is None:
+            _flusher = Flusher(flush_interval())
+            _flusher.start()
+
+
+def stop_flusher():
+    """Stops the background flusher. Used by the tests."""
+    global _flusher
+    with _flusher_lock:
+        flusher, _flusher = _flusher, None
+    if flusher is not None:
+        flusher.stop()
+
+
+def current_game(game_id):
+    """
+    Returns the latest state of a game for reading, from the cache when it is
+    there and from the database otherwise.
+
+    Raises:
+        Http404: If the game doesn't exist
+    """
+    with phase('cache'):
+        state = state_cache().get(state_key(game_id))
+        if state is None:
+            if write_behind_enabled():
+                with cache_lock(state_key(game_id)):
+                    state = _load_state(game_id)
+            else:
+                state = _load_state(game_id)
+        game = unpack_state(game_id, state)
+    label_board(game.width, game.height)
+    return game
+
+
+def update_game(game_id, move):
+    """
+    Applies a move to the latest state of a game without holding a lock while
+    it runs.
+
+    The move is applied to the cached state and kept only if the game is still
+    at the version the move started from: in write-behind mode by swapping the
+    cache entry, otherwise by an UPDATE of the Game row filtered on that
+    version. When another move got there first, the move is applied again to
+    the newer state.
+
+    Args:
+        game_id: Id of the game
+        move: Function called with (game, changes) that changes the game in
+            place, appends every changed cell to changes and returns a result
+
+    Returns:
+        Tuple (game, base_version, result, changes)
+
+    Raises:
+        Http404: If the game doesn't exist
+        GameLocked: If the move lost the compare-and-swap MAX_ATTEMPTS times
+    """
+    for attempt in range(MAX_ATTEMPTS):
+        game = current_game(game_id)
+        base_version = game.version
+        changes = []
+        result = move(game, changes)
+        if game.version == base_version or _compare_and_swap(game, base_version):
+            return game, base_version, result, changes
+        increment('move_retries')
+        logger.debug("Game %s changed during a move (attempt %s), retrying", game_id, attempt + 1)
+
+    raise GameLocked(f"Game {game_id} kept changing during a move")
+
+
+@phase('save')
+def _compare_and_swap(game, base_version):
+    store = state_cache()
+    key = state_key(game.id)
+
+    if write_behind_enabled():
+        with cache_lock(key):
+            state = store.get(key)
+            if state is None or state['version'] != base_version:
+                return False
+            _keep_state(game)
+        _sweep(game.id)
+        return True
+
+    game.flushed_version = game.version
+    new_state = pack_state(game)
+    updated = Game.objects.filter(pk=game.id, version=base_version).update(
+        **{field: new_state[field] for field in MUTABLE_FIELDS}
+    )
+    if not updated:
+        # The cached state is stale; the retry reloads it from the database
+        store.delete(key)
+        return False
+
+    with cache_lock(key):
+        state = store.get(key)
+        if state is not None and state['version'] == base_version:
+            store.set(key, new_state, timeout=STATE_TIMEOUT)
+        else:
+            store.delete(key)
+    return True
+
+
+def _mark_dirty(game_id, since):
+    store = state_cache()
+    with cache_lock(DIRTY_KEY):
+        dirty = store.get(DIRTY_KEY) or {}
+        dirty[str(game_id)] = since
+        store.set(DIRTY_KEY, dirty, timeout=None)
+
+
+def _write_state(game_id, state):
+    # Never let a late flush overwrite a newer version
+    Game.objects.filter(pk=game_id, version__lt=state['version']).update(
+        **{field: state_field(state, field) for field in MUTABLE_FIELDS}
+    )
+
+
+def flush_game(game_id):
+    """
+    Writes the cached state of a game to the database if it has unflushed moves.
+
+    Returns:
+        True if the game was written, False otherwise
+    """
+    store = state_cache()
+    with cache_lock(state_key(game_id)):
+        state = store.get(state_key(game_id))
+        if state is None or state['dirty_since'] is None:
+            return False
+        _write_state(game_id, state)
+        state['flushed_version'] = state['version']
+        state['dirty_since'] = None
+        store.set(state_key(game_id), state, timeout=STATE_TIMEOUT)
+    return True
+
+
+def flush_dirty_games(force=False, skip=None):
+    """
+    Flushes every game whose oldest unflushed move is older than the flush interval.
+
+    Args:
+        force: Flush every game with unflushed moves regardless of age
+        skip: Optional game id to leave alone, e.g. one whose lock the caller holds
+
+    Returns:
+        Number of games written to the database
+    """
+    store = state_cache()
+    now = time.time()
+    dirty = store.get(DIRTY_KEY) or {}
+
+    done = {}
+    flushed = 0
+    for game_id, since in dirty.items():
+        if game_id == str(skip) or (not force and now - since < flush_interval()):
+            continue
+        try:
+            flushed += flush_game(game_id)
+        except GameLocked:
+            continue
+        done[game_id] = since
+
+    if done:
+        with cache_lock(DIRTY_KEY):
+            dirty = store.get(DIRTY_KEY) or {}
+            for game_id, since in done.items():
+                # A game that was flushed and played again has a newer entry
+                if dirty.get(game_id) == since:
+                    del dirty[game_id]
+            store.set(DIRTY_KEY, dirty, timeout=None)
+
+    if flushed:
+        logger.info("Flushed %s games to the database", flushed)
+    return flushed
+
+
+@asynccontextmanager
+async def acache_lock(name):
+    """
+    Async version of cache_lock, waiting without blocking the event loop.
+    """
+    store = state_cache()
+    key = f"{name}_lock"
+    token = uuid.uuid4().hex
+    deadline = time.monotonic() + LOCK_WAIT
+    while not await store.aadd(key, token, timeout=LOCK_TIMEOUT):
+        if time.monotonic() > deadline:
+            raise GameLocked(f"Timed out waiting for {name}")
+        await asyncio.sleep(0.002)
+    try:
+        yield
+    finally:
+        if await store.aget(key) == token:
+            await store.adelete(key)
+
+
+async def _aload_state(game_id):
+    store = state_cache()
+    state = await store.aget(state_key(game_id))
+    if state is not None:
+        return state
+
+    try:
+        game = await Game.objects.aget(pk=game_id)
+    except Game.DoesNotExist:
+        raise Http404(f"Game {game_id} not found")
+    if write_behind_enabled() and str(game_id) in (await store.aget(DIRTY_KEY) or {}):
+        logger.warning("State of game %s was lost from the cache, recovered version %s from the database", game_id, game.version)
+    game.flushed_version = game.version
+    game.dirty_since = None
+    state = pack_state(game)
+    if not await store.aadd(state_key(game_id), state, timeout=STATE_TIMEOUT):
+        state = await store.aget(state_key(game_id)) or state
+    return state
+
+
+async def acurrent_game(game_id):
+    """
+    Async version of current_game.
+
+    Raises:
+        Http404: If the game doesn't exist
+    """
+    with phase('cache'):
+        state = await state_cache().aget(state_key(game_id))
+        if state is None:
+            if write_behind_enabled():
+                async with acache_lock(state_key(game_id)):
+                    state = await _aload_state(game_id)
+            else:
+                state = await _aload_state(game_id)
+        game = unpack_state(game_id, state)
+    label_board(game.width, game.height)
+    return game
+
+
+async def aupdate_game(game_id, move):
+    """
+    Async version of update_game. The move runs in the board executor, so a
+    large cascade never blocks the event loop.
+
+    Raises:
+        Http404: If the game doesn't exist
+        GameLocked: If the move lost the compare-and-swap MAX_ATTEMPTS times
+    """
+    for attempt in range(MAX_ATTEMPTS):
+        game = await acurrent_game(game_id)
+        base_version = game.version
+        changes = []
+        result = await run_board_work(move, game, changes)
+        if game.version == base_version:
+            return game, base_version, result, changes
+        with phase('save'):
+            swapped = await _acompare_and_swap(game, base_version)
+        if swapped:
+            return game, base_version, result, changes
+        increment('move_retries')
+        logger.debug("Game %s changed during a move (attempt %s), retrying", game_id, attempt + 1)
+
+    raise GameLocked(f"Game {game_id} kept changing during a move")
+
+
+async def _acompare_and_swap(game, base_version):
+    if write_behind_enabled():
+        # Flushes and the dirty registry are kept on the sync path
+        return await sync_to_async(_compare_and_swap)(game, base_version)
+
+    store = state_cache()
+    key = state_key(game.id)
+
+    game.flushed_version = game.version
+    new_state = await run_board_work(pack_state, game)
+    updated = await Game.objects.filter(pk=game.id, version=base_version).aupdate(
+        **{field: new_state[field] for field in MUTABLE_FIELDS}
+    )
+    if not updated:
+        await store.adelete(key)
+        return False
+
+    async with acache_lock(key):
+        state = await store.aget(key)
+        if state is not None and state['version'] == base_version:
+            await store.aset(key, new_state, timeout=STATE_TIMEOUT)
+        else:
+            await store.adelete(key)
+    return True
@@ -0,0 +1,113 @@
+import json
+import uuid
+
+from django.core.cache import cache
+from django.test import AsyncRequestFactory, TestCase
+
+from minesweeper_backend import async_views
+from minesweeper_backend.models import Game
+
+
+class AsyncViewsTest(TestCase):
+    """Test cases for the async game views"""
+
+    def setUp(self):
+        """Set up a game whose second row is all mines"""
+        cache.clear()
+        self.factory = AsyncRequestFactory()
+        self.game = Game.objects.create(width=5, height=5, mines=5)
+        self.game.internal_board = [['M' if row == 1 else '' for _ in range(5)] for row in range(5)]
+        self.game.player_board = [['' for _ in range(5)] for _ in range(5)]
+        self.game.save()
+
+    def _post(self, data):
+        """Helper method that builds a JSON POST request"""
+        return self.factory.post('/', json.dumps(data), content_type='application/json')
+
+    async def _reveal(self, data, game_id=None):
+        """Helper method that calls the async reveal view and decodes the response"""
+        response = await async_views.reveal(self._post(data), game_id or self.game.id)
+        return response.status_code, json.loads(response.content)
+
+    async def test_create_game(self):
+        """Test that a game is generated and saved"""
+        response = await async_views.create_game(self._post({'width': 8, 'height': 6, 'mines': 7}))
+        data = json.loads(response.content)
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(data['board_state']), 6)
+        game = await Game.objects.aget(pk=data['game_id'])
+        self.assertEqual(sum(row.count('M') for row in game.internal_board), 7)
+
+    async def test_create_game_invalid(self):
+        """Test that invalid parameters are rejected"""
+        for data in ({'width': 'a'}, {'width': -1}, {'width': 2, 'height': 2, 'mines': 4}):
+            response = await async_views.create_game(self._post(data))
+            self.assertEqual(response.status_code, 400)
+
+    async def test_reveal(self):
+        """Test that a reveal is applied and saved"""
+        status, data = await self._reveal({'row': 0, 'col': 0, 'version': 0})
+
+        self.assertEqual(status, 200)
+        self.assertEqual(data['changes'], [[0, 0, '2']])
+        game = await Game.objects.aget(pk=self.game.id)
+        self.assertEqual(game.version, 1)
+        self.assertEqual(game.player_board[0][0], '2')
+
+    async def test_reveal_cascade(self):
+        """Test that a cascade runs off the event loop and returns the full board"""
+        status, data = await self._reveal({'row': 4, 'col': 4})
+
+        self.assertEqual(data['revealed_count'], 15)
+        self.assertEqual(data['board_state'][4][0], '0')
+
+    async def test_reveal_mine_and_finished_game(self):
+        """Test that a mine ends the game and later moves are rejected"""
+        status, data = await self._reveal({'row': 1, 'col': 1})
+        self.assertTrue(data['game_over'])
+
+        status, data = await self._reveal({'row': 0, 'col': 0})
+        self.assertEqual(status, 400)
+
+    async def test_reveal_invalid_cell(self):
+        """Test that missing and out-of-bounds cells are rejected"""
+        for data in ({'row': 0}, {'row': 9, 'col': 0}):
+            status, _ = await self._reveal(data)
+            self.assertEqual(status, 400)
+
+    async def test_reveal_game_not_found(self):
+        """Test that an unknown game returns 404"""
+        status, _ = await self._reveal({'row': 0, 'col': 0}, game_id=uuid.uuid4())
+        self.assertEqual(status, 404)
+
+    async def test_get_game(self):
+        """Test that the current state is returned"""
+        await self._reveal({'row': 0, 'col': 0})
+        response = await async_views.get_game(self.factory.get('/'), self.game.id)
+        data = json.loads(response.content)
+
+        self.assertEqual(data['board_state'][0][0], '2')
+        self.assertEqual(data['version'], 1)
+
+    async def test_get_game_not_modified(self):
+        """Test that a client with the current ETag gets a 304 until the next move"""
+        response = await async_views.get_game(self.factory.get('/'), self.game.id)
+        etag = response['ETag']
+        self.assertEqual(etag, '"0-json"')
+        self.assertEqual(response['Cache-Control'], 'no-cache')
+
+        request = self.factory.get('/', headers={'If-None-Match': etag})
+        response = await async_views.get_game(request, self.game.id)
+        self.assertEqual(response.status_code, 304)
+
+        await self._reveal({'row': 0, 'col': 0})
+        request = self.factory.get('/', headers={'If-None-Match': etag})
+        response = await async_views.get_game(request, self.game.id)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['ETag'], '"1-json"')
+
+    async def test_get_game_not_found(self):
+        """Test that an unknown game returns 404"""
+        response = await async_views.get_game(self.factory.get('/'), uuid.uuid4())
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,96 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase
+
+from minesweeper_backend.benchmarks import CASES, compare_results, run_benchmarks
+
+
+class RunBenchmarksTest(SimpleTestCase):
+    """Test cases for the board engine benchmarks"""
+
+    def test_every_case_runs(self):
+        """Test that every case reports its time and memory for each size and density"""
+        report = run_benchmarks(sizes=[(6, 5)], densities=[0.2, 0.5], engine='python', repeat=2)
+        keys = [result['key'] for result in report['results']]
+
+        self.assertIn('reveal_cascade/python/6x5', keys)
+        self.assertIn('generate/python/6x5/0.5', keys)
+        self.assertEqual({result['case'] for result in report['results']}, set(CASES))
+        for result in report['results']:
+            self.assertGreater(result['min_ms'], 0)
+            self.assertLessEqual(result['min_ms'], result['median_ms'])
+            self.assertGreaterEqual(result['peak_kib'], 0)
+        json.dumps(report)
+
+    def test_density_independent_cases_run_once(self):
+        """Test that the cascade cases run once per size"""
+        report = run_benchmarks(sizes=[(4, 4)], densities=[0.1, 0.2, 0.3], cases=['reveal_cascade'], repeat=1)
+        self.assertEqual(len(report['results']), 1)
+
+
+class CompareResultsTest(SimpleTestCase):
+    """Test cases for comparing benchmark results against a baseline"""
+
+    def _report(self, **results):
+        return {'results': [
+            {'key': key, 'min_ms': min_ms, 'peak_kib': peak_kib}
+            for key, (min_ms, peak_kib) in results.items()
+        ]}
+
+    def test_regressions(self):
+        """Test that slower and bigger tracked cases are reported"""
+        baseline = self._report(a=(1.0, 100), b=(1.0, 100), c=(1.0, 100))
+        report = self._report(a=(1.2, 105), b=(1.5, 100), c=(1.0, 200), d=(9.0, 900))
+
+        regressions = compare_results(report, baseline)
+
+        self.assertEqual([(key, metric) for key, metric, _, _ in regressions], [('b', 'min_ms'), ('c', 'peak_kib')])
+
+    def test_noise_on_tiny_cases(self):
+        """Test that differences below the minimum deltas are ignored"""
+        baseline = self._report(a=(0.001, 0.1))
+        report = self._report(a=(0.004, 0.5))
+        self.assertEqual(compare_results(report, baseline), [])
+
+
+class BenchmarkCommandTest(SimpleTestCase):
+    """Test cases for the benchmark_engine management command"""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.baseline = os.path.join(self.directory.name, 'baseline.json')
+
+    def _run(self, *args):
+        call_command(
+            'benchmark_engine', '--sizes', '5x5', '--densities', '0.2', '--cases', 'generate,count_board',
+            '--repeat', '1', *args, stdout=StringIO()
+        )
+
+    def test_save_and_compare_baseline(self):
+        """Test that a saved baseline is written as JSON and loose tolerances pass"""
+        self._run('--baseline', self.baseline, '--save-baseline')
+        with open(self.baseline) as f:
+            self.assertEqual(len(json.load(f)['results']), 2)
+
+        self._run('--baseline', self.baseline, '--tolerance', '1000', '--memory-tolerance', '1000')
+
+    def test_fails_on_regression(self):
+        """Test that the command fails when a tracked case is slower than its baseline"""
+        with open(self.baseline, 'w') as f:
+            json.dump({'results': [{'key': 'generate/python/5x5/0.2', 'min_ms': 0.0, 'peak_kib': 0.0}]}, f)
+
+        with self.assertRaises(CommandError):
+            self._run('--engine', 'python', '--baseline', self.baseline)
+
+    def test_invalid_arguments(self):
+        """Test that unknown cases and malformed sizes are rejected"""
+        with self.assertRaises(CommandError):
+            self._run('--cases', 'nope')
+        with self.assertRaises(CommandError):
+            call_command('benchmark_engine', '--sizes', '5by5', stdout=StringIO())
@@ -0,0 +1,81 @@
+from django.test import TestCase
+
+from minesweeper_backend.board import Board
+from minesweeper_backend.models import Game
+from minesweeper_backend.utils import (
+    compute_neighbor_counts, count_adjacent_mines, is_valid_cell, reveal_cell
+)
+
+
+class BoardTest(TestCase):
+    """Test cases for the Board class"""
+
+    def setUp(self):
+        """Set up a 3x5 board with mines in two corners"""
+        self.internal_board = [
+            ['M', '', '', '', ''],
+            ['', '', '', '', ''],
+            ['', '', '', '', 'M']
+        ]
+        self.counts = compute_neighbor_counts(self.internal_board)
+        self.board = Board.from_rows(self.internal_board, self.counts)
+
+    def test_dimensions(self):
+        """Test that the board knows its width and height"""
+        self.assertEqual((self.board.width, self.board.height), (5, 3))
+
+    def test_in_bounds(self):
+        """Test bounds checks on every side of the board"""
+        self.assertTrue(self.board.in_bounds(2, 4))
+        for row, col in ((-1, 0), (0, -1), (3, 0), (0, 5)):
+            self.assertFalse(self.board.in_bounds(row, col))
+
+    def test_cells_match_rows(self):
+        """Test that mines and counts read back as given"""
+        for row in range(3):
+            for col in range(5):
+                self.assertEqual(self.board.is_mine(row, col), self.internal_board[row][col] == 'M')
+                self.assertEqual(self.board.count(row, col), self.counts[row][col])
+
+    def test_neighbours(self):
+        """Test that neighbours stop at the edges of the board"""
+        self.assertEqual(sorted(self.board.neighbours(0, 0)), [(0, 1), (1, 0), (1, 1)])
+        self.assertEqual(len(list(self.board.neighbours(1, 2))), 8)
+
+    def test_no_slots_dict(self):
+        """Test that boards carry no per-instance dictionary"""
+        self.assertFalse(hasattr(self.board, '__dict__'))
+
+    def test_utils_accept_boards(self):
+        """Test that the cell helpers answer from a Board"""
+        self.assertTrue(is_valid_cell(self.board, 1, 1))
+        self.assertFalse(is_valid_cell(self.board, 3, 1))
+        self.assertEqual(count_adjacent_mines(self.board, 1, 1), 1)
+
+
+class GameBoardPropertyTest(TestCase):
+    """Test cases for Game.board"""
+
+    def setUp(self):
+        """Set up a game whose second row is all mines"""
+        game = Game.objects.create(width=5, height=5, mines=5)
+        game.internal_board = [['M' if row == 1 else '' for _ in range(5)] for row in range(5)]
+        game.player_board = [['' for _ in range(5)] for _ in range(5)]
+        game.counts = compute_neighbor_counts(game.internal_board)
+        game.save()
+        self.game = Game.objects.get(pk=game.pk)
+
+    def test_board_reads_packed_fields(self):
+        """Test that the board matches the decoded mines and counts"""
+        board = self.game.board
+        self.assertTrue(board.is_mine(1, 3))
+        self.assertEqual(board.count(0, 0), 2)
+
+    def test_numbered_reveal_decodes_nothing(self):
+        """Test that revealing a numbered cell reads only the packed layout"""
+        result = reveal_cell(self.game.player_board, 0, 0, game=self.game)
+
+        self.assertEqual(result, 1)
+        self.assertEqual(self.game.player_board[0][0], '2')
+        self.assertIsNone(self.game._internal_rows)
+        self.assertIsNone(self.game._count_rows)
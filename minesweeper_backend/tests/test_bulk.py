@@ -0,0 +1,120 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from minesweeper_backend.generation import GenerationTimeout, attempt
+from minesweeper_backend.models import Game
+
+
+class BulkCreateTest(TestCase):
+    """Test cases for creating games in bulk"""
+
+    def setUp(self):
+        """Set up the API client"""
+        cache.clear()
+        self.client = APIClient()
+        self.url = reverse('create_games')
+
+    def post(self, data):
+        """Helper method that posts to the bulk endpoint and decodes the streamed lines"""
+        response = self.client.post(self.url, data, format='json')
+        if not response.streaming:
+            return response, None
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        return response, [json.loads(line) for line in lines]
+
+    def test_create_games_in_chunks(self):
+        """Test that games are inserted in chunks, cached and playable"""
+        with self.assertNumQueries(3):
+            chunks = list(Game.objects.create_games(9, 9, 10, count=25, chunk_size=10))
+
+        self.assertEqual([len(games) for games in chunks], [10, 10, 5])
+        self.assertEqual(Game.objects.count(), 25)
+        game = Game.objects.get(pk=chunks[2][0].id)
+        self.assertEqual(sum(row.count('M') for row in game.internal_board), 10)
+        self.assertEqual(cache.get(f"game_{game.id}")['board_state'], game.player_board)
+
+        response = self.client.post(reverse('reveal', args=[game.id]), {'row': 0, 'col': 0}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    @override_settings(MINESWEEPER_BULK_INLINE_GAMES=5)
+    def test_create_games_in_workers(self):
+        """Test that large requests are generated in the generation processes"""
+        chunks = list(Game.objects.create_games(9, 9, 10, 'no_guess', count=12, chunk_size=4))
+
+        self.assertEqual(sum(len(games) for games in chunks), 12)
+        for game in Game.objects.all():
+            self.assertEqual(game.mode, Game.NO_GUESS)
+            self.assertEqual(game.player_board[4][4], '0')
+
+    def test_create_games_invalid(self):
+        """Test that an invalid configuration raises before anything is created"""
+        with self.assertRaises(ValidationError):
+            next(Game.objects.create_games(3, 3, 9, count=2))
+        self.assertFalse(Game.objects.exists())
+
+    @override_settings(MINESWEEPER_BULK_CHUNK_SIZE=4)
+    def test_stream_game_ids(self):
+        """Test that the ids of every chunk are streamed, then the number created"""
+        response, lines = self.post({'count': 10, 'width': 5, 'height': 5, 'mines': 3})
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertEqual([len(line['game_ids']) for line in lines[:-1]], [4, 4, 2])
+        self.assertEqual(lines[-1], {'created': 10})
+        ids = {game_id for line in lines[:-1] for game_id in line['game_ids']}
+        self.assertEqual(ids, {str(game_id) for game_id in Game.objects.values_list('id', flat=True)})
+
+    @override_settings(MINESWEEPER_NO_GUESS_TIME_BUDGET=0)
+    def test_first_chunk_fails(self):
+        """Test that a failure in the first chunk is reported with a status code before streaming"""
+        response, lines = self.post({'count': 2, 'width': 9, 'height': 9, 'mines': 10, 'mode': 'no_guess'})
+
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertIsNone(lines)
+        self.assertFalse(Game.objects.exists())
+
+    def test_stream_error(self):
+        """Test that a failure after the first chunk ends the stream with an error line"""
+        def chunks():
+            yield [Game(width=5, height=5, mines=3)]
+            raise GenerationTimeout
+
+        with patch.object(Game.objects, 'create_games', return_value=chunks()):
+            response, lines = self.post({'count': 2, 'width': 5, 'height': 5, 'mines': 3})
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(lines[-1], {'error': "No no-guess board found in time.", 'created': 1})
+
+    def test_no_guess_in_workers(self):
+        """Test that no-guess games are generated in the workers whatever their count"""
+        with patch('minesweeper_backend.bulk.build_board', side_effect=AssertionError):
+            chunks = list(Game.objects.create_games(9, 9, 10, 'no_guess', count=2))
+
+        self.assertEqual(sum(len(games) for games in chunks), 2)
+
+    @override_settings(MINESWEEPER_SOLVER_ENUMERATION_LIMIT=7)
+    def test_no_guess_settings_passed_to_workers(self):
+        """Test that the workers get the solver's enumeration limit rather than reading the settings"""
+        executor = ThreadPoolExecutor(max_workers=1)
+        self.addCleanup(executor.shutdown)
+
+        with patch('minesweeper_backend.bulk.generation_executor', return_value=executor), \
+                patch('minesweeper_backend.bulk.attempt', wraps=attempt) as wrapped:
+            list(Game.objects.create_games(9, 9, 10, 'no_guess', count=1))
+
+        self.assertEqual(wrapped.call_args.args[4], 7)
+
+    def test_invalid_parameters(self):
+        """Test that invalid counts and configurations are rejected up front"""
+        for data in ({'count': 0}, {'count': 'a'}, {'count': 10001}, {'count': 2, 'mode': 'easy'},
+                     {'count': 2, 'width': 2, 'height': 2, 'mines': 4}):
+            response, _ = self.post(data)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,71 @@
+from django.test import TestCase
+
+from minesweeper_backend import codec
+
+
+class MineCodecTest(TestCase):
+    """Test cases for the mine bitset encoding"""
+
+    def test_round_trip(self):
+        """Test that a mine layout survives encoding and decoding"""
+        board = [
+            ['M', '', '', 'M', ''],
+            ['', '', 'M', '', ''],
+            ['', '', '', '', 'M']
+        ]
+        self.assertEqual(codec.decode_mines(codec.encode_mines(board)), board)
+
+    def test_one_bit_per_cell(self):
+        """Test that the bitset uses one bit per cell after the header"""
+        board = [['' for _ in range(100)] for _ in range(100)]
+        blob = codec.encode_mines(board)
+        self.assertEqual(len(blob), codec.HEADER.size + 100 * 100 // 8)
+
+    def test_none(self):
+        """Test that a missing board stays missing"""
+        self.assertIsNone(codec.encode_mines(None))
+        self.assertIsNone(codec.decode_mines(None))
+
+
+class CellCodecTest(TestCase):
+    """Test cases for the player board nibble encoding"""
+
+    def setUp(self):
+        """Set up a board using every cell state"""
+        self.board = [
+            ['', '0', '1', '2', '3'],
+            ['4', '5', '6', '7', '8'],
+            ['M', 'F', '', '', '']
+        ]
+
+    def test_round_trip(self):
+        """Test that every cell state survives encoding and decoding"""
+        self.assertEqual(codec.decode_cells(codec.encode_cells(self.board)), self.board)
+
+    def test_odd_cell_count(self):
+        """Test that boards with an odd number of cells are padded correctly"""
+        board = [['1', ''], ['', '0'], ['M', '']]
+        board = [row + [''] for row in board]
+        self.assertEqual(codec.decode_cells(codec.encode_cells(board)), board)
+
+    def test_peek_cell(self):
+        """Test reading single cells without decoding the board"""
+        blob = codec.encode_cells(self.board)
+        for row in range(3):
+            for col in range(5):
+                self.assertEqual(codec.peek_cell(blob, row, col), self.board[row][col])
+
+    def test_board_dimensions(self):
+        """Test that the header records the board dimensions"""
+        blob = codec.encode_cells(self.board)
+        self.assertEqual(codec.board_dimensions(blob), (3, 5))
+
+    def test_poke_cell(self):
+        """Test writing single cells without decoding the board"""
+        blob = codec.encode_cells(self.board)
+        blob = codec.poke_cell(blob, 0, 0, 'F')
+        blob = codec.poke_cell(blob, 2, 1, '')
+
+        self.board[0][0] = 'F'
+        self.board[2][1] = ''
+        self.assertEqual(codec.decode_cells(blob), self.board)
@@ -0,0 +1,219 @@
+import copy
+from unittest import mock, skipUnless
+
+from django.test import TestCase, override_settings
+
+from minesweeper_backend import codec
+from minesweeper_backend.engines import get_engine, log_engine, numpy_available
+from minesweeper_backend.engines import python_engine
+from minesweeper_backend.regions import reveal_region
+
+
+class EngineSelectionTest(TestCase):
+    """Test cases for get_engine"""
+
+    def test_explicit_python(self):
+        """Test that the pure-Python engine can always be selected"""
+        self.assertIs(get_engine('python'), python_engine)
+
+    @override_settings(MINESWEEPER_ENGINE='python')
+    def test_setting(self):
+        """Test that the setting picks the default engine"""
+        self.assertIs(get_engine(), python_engine)
+
+    def test_unknown_engine(self):
+        """Test that an unknown engine name is rejected"""
+        with self.assertRaises(ValueError):
+            get_engine('fortran')
+
+    @override_settings(MINESWEEPER_ENGINE='auto')
+    def test_log_auto_fallback(self):
+        """Test that falling back to the pure-Python engine is logged as a warning"""
+        with mock.patch('minesweeper_backend.engines.numpy_available', return_value=False):
+            with self.assertLogs('minesweeper_backend.engines', 'WARNING'):
+                self.assertEqual(log_engine(), 'python')
+
+
+class EngineBehaviourMixin:
+    """Behaviour every engine must share; subclasses set engine_name"""
+
+    engine_name = None
+
+    def setUp(self):
+        """Set up a board with one mine in the bottom-right corner"""
+        self.engine = get_engine(self.engine_name)
+        self.internal_board = [
+            ['', '', '', ''],
+            ['', '', '', ''],
+            ['', '', '', ''],
+            ['', '', '', 'M']
+        ]
+        self.counts = python_engine.compute_counts(self.internal_board)
+        self.board = [['' for _ in range(4)] for _ in range(4)]
+
+    def test_generate_board(self):
+        """Test dimensions, mine count and counts of a generated board"""
+        boards = self.engine.generate_board(7, 5, 12)
+
+        self.assertEqual(len(boards['internal_board']), 5)
+        self.assertEqual(len(boards['internal_board'][0]), 7)
+        self.assertEqual(sum(row.count('M') for row in boards['internal_board']), 12)
+        self.assertEqual(boards['counts'], python_engine.compute_counts(boards['internal_board']))
+        self.assertTrue(all(cell == '' for row in boards['player_board'] for cell in row))
+
+    def test_generate_dense_board(self):
+        """Test that a board with every cell but one mined is generated"""
+        boards = self.engine.generate_board(10, 10, 99)
+        self.assertEqual(sum(row.count('M') for row in boards['internal_board']), 99)
+
+    def test_compute_counts(self):
+        """Test counts against a hand-checked board"""
+        board = [
+            ['', 'M', ''],
+            ['M', '', 'M'],
+            ['', 'M', '']
+        ]
+        self.assertEqual(self.engine.compute_counts(board), [[2, 2, 2], [2, 4, 2], [2, 2, 2]])
+
+    def test_cascade(self):
+        """Test that revealing an empty cell uncovers the whole region"""
+        result = self.engine.flood_reveal(self.board, 0, 0, self.internal_board, self.counts)
+
+        self.assertEqual(result, 15)
+        self.assertEqual(self.board[3][3], '')
+        self.assertEqual(self.board[2][2], '1')
+        self.assertEqual(self.board[0][0], '0')
+
+    def test_numbered_cell(self):
+        """Test that a numbered cell is revealed on its own"""
+        result = self.engine.flood_reveal(self.board, 2, 2, self.internal_board, self.counts)
+
+        self.assertEqual(result, 1)
+        self.assertEqual(sum(cell != '' for row in self.board for cell in row), 1)
+
+    def test_mine(self):
+        """Test that revealing a mine reports game over"""
+        result = self.engine.flood_reveal(self.board, 3, 3, self.internal_board, self.counts)
+
+        self.assertEqual(result, -1)
+        self.assertEqual(self.board[3][3], 'M')
+
+    def test_cascade_skips_revealed_and_flagged_cells(self):
+        """Test that the cascade leaves non-hidden cells untouched"""
+        self.board[0][3] = 'F'
+        self.board[3][0] = '0'
+
+        result = self.engine.flood_reveal(self.board, 0, 0, self.internal_board, self.counts)
+
+        self.assertEqual(result, 13)
+        self.assertEqual(self.board[0][3], 'F')
+
+    def test_reveal_many(self):
+        """Test that several cascades are expanded together"""
+        changes = []
+        result = self.engine.flood_reveal_many(
+            self.board, [(0, 0), (0, 1), (2, 2)], self.internal_board, self.counts, changes)
+
+        self.assertEqual(result, 15)
+        self.assertEqual(len(changes), 15)
+        self.assertEqual(self.board[3][3], '')
+
+    def test_reveal_many_with_mine(self):
+        """Test that a mine among the cells ends the reveal"""
+        result = self.engine.flood_reveal_many(
+            self.board, [(0, 0), (3, 3)], self.internal_board, self.counts)
+
+        self.assertEqual(result, -1)
+        self.assertEqual(self.board[3][3], 'M')
+
+    def test_matches_python_engine(self):
+        """Test that a cascade on a random board matches the reference engine"""
+        boards = python_engine.generate_board(30, 20, 40)
+        expected = copy.deepcopy(boards['player_board'])
+        actual = copy.deepcopy(boards['player_board'])
+
+        for row in range(20):
+            for col in range(30):
+                expected_result = python_engine.flood_reveal(
+                    expected, row, col, boards['internal_board'], boards['counts'])
+                actual_result = self.engine.flood_reveal(
+                    actual, row, col, boards['internal_board'], boards['counts'])
+                self.assertEqual(actual_result, expected_result)
+                if expected_result == -1:
+                    expected[row][col] = actual[row][col] = 'F'
+
+        self.assertEqual(actual, expected)
+
+
+class PythonEngineTest(EngineBehaviourMixin, TestCase):
+    """Test cases for the pure-Python engine"""
+
+    engine_name = 'python'
+
+
+@skipUnless(numpy_available(), "NumPy is not installed")
+class NumpyEngineTest(EngineBehaviourMixin, TestCase):
+    """Test cases for the NumPy engine"""
+
+    engine_name = 'numpy'
+
+
+class ZeroRegionIndexMixin:
+    """Region indexing behaviour every engine must share; subclasses set engine_name"""
+
+    engine_name = None
+
+    def test_regions_match_flood_fill(self):
+        """Test that each region uncovers exactly what the flood fill reveals"""
+        engine = get_engine(self.engine_name)
+        boards = python_engine.generate_board(25, 15, 30)
+        index = engine.index_zero_regions(boards['internal_board'], boards['counts'])
+
+        for row in range(15):
+            for col in range(25):
+                region = index.region_at(row, col)
+                is_empty = boards['counts'][row][col] == 0 and boards['internal_board'][row][col] != 'M'
+                self.assertEqual(region is not None, is_empty)
+                if region is None:
+                    continue
+
+                expected = [['' for _ in range(25)] for _ in range(15)]
+                actual = [['' for _ in range(25)] for _ in range(15)]
+                expected_result = python_engine.flood_reveal(
+                    expected, row, col, boards['internal_board'], boards['counts'])
+                actual_result = reveal_region(actual, boards['counts'], index, region)
+                self.assertEqual(actual_result, expected_result)
+                self.assertEqual(actual, expected)
+
+    def test_index_survives_encoding(self):
+        """Test that a region index round-trips through the codec"""
+        engine = get_engine(self.engine_name)
+        boards = python_engine.generate_board(12, 9, 10)
+        index = engine.index_zero_regions(boards['internal_board'], boards['counts'])
+        decoded = codec.decode_regions(codec.encode_regions(index))
+
+        self.assertEqual(decoded.region_count, index.region_count)
+        self.assertEqual(list(decoded.member_starts), list(index.member_starts))
+        self.assertEqual(list(decoded.region_offsets), list(index.region_offsets))
+
+    def test_board_without_empty_cells(self):
+        """Test indexing a board where every cell touches a mine"""
+        engine = get_engine(self.engine_name)
+        internal_board = [['M', ''], ['', 'M']]
+        index = engine.index_zero_regions(internal_board, python_engine.compute_counts(internal_board))
+
+        self.assertEqual(index.region_count, 0)
+        self.assertIsNone(index.region_at(0, 1))
+
+
+class PythonZeroRegionTest(ZeroRegionIndexMixin, TestCase):
+    """Test cases for region indexing in the pure-Python engine"""
+
+    engine_name = 'python'
+
+
+@skipUnless(numpy_available(), "NumPy is not installed")
+class NumpyZeroRegionTest(ZeroRegionIndexMixin, TestCase):
+    """Test cases for region indexing in the NumPy engine"""
+
+    engine_name = 'numpy'
@@ -0,0 +1,190 @@
+import asyncio
+import json
+
+from django.core.cache import cache
+from django.test import AsyncRequestFactory, SimpleTestCase, TestCase, override_settings
+
+from minesweeper_backend import async_views, events
+from minesweeper_backend.models import Game
+
+
+class FakeGame:
+    """Stand-in for a game after a move"""
+
+    def __init__(self, version, game_over=False, game_won=False):
+        self.id = 'game'
+        self.version = version
+        self.game_over = game_over
+        self.game_won = game_won
+
+
+class GameChannelTest(SimpleTestCase):
+    """Test cases for publishing and resuming game events"""
+
+    def setUp(self):
+        events.reset()
+
+    def _publish(self, version, **kwargs):
+        """Helper method that publishes a move from version - 1 to version"""
+        events.publish(FakeGame(version, **kwargs), 'reveal', version - 1, [(0, 0, '1')])
+
+    def test_publish(self):
+        """Test that a move is kept as an event of its game"""
+        self._publish(1)
+
+        event, = events.get_channel('game').backlog(0)
+        self.assertEqual(event['type'], 'reveal')
+        self.assertEqual((event['base_version'], event['version']), (0, 1))
+        self.assertEqual(event['changes'], [[0, 0, '1']])
+
+    def test_unchanged_game_is_not_published(self):
+        """Test that a move that changed nothing publishes no event"""
+        events.publish(FakeGame(3), 'flag', 3, [])
+        self.assertEqual(events.get_channel('game').backlog(0), [])
+
+    def test_finishing_move_is_end(self):
+        """Test that the move that finishes the game is sent as an end event"""
+        self._publish(1, game_won=True)
+        self.assertEqual(events.get_channel('game').backlog(0)[0]['type'], 'end')
+
+    def test_backlog_since_version(self):
+        """Test that a backlog holds only the events after the client's version"""
+        for version in range(1, 5):
+            self._publish(version)
+
+        backlog = events.get_channel('game').backlog(2)
+        self.assertEqual([event['version'] for event in backlog], [3, 4])
+        self.assertEqual(events.get_channel('game').backlog(4), [])
+
+    @override_settings(MINESWEEPER_EVENT_HISTORY=2)
+    def test_backlog_out_of_history(self):
+        """Test that a version older than the history has no backlog"""
+        for version in range(1, 5):
+            self._publish(version)
+
+        self.assertIsNone(events.get_channel('game').backlog(1))
+        self.assertEqual(len(events.get_channel('game').backlog(2)), 2)
+
+    @override_settings(MINESWEEPER_EVENT_CHANNELS=2)
+    def test_idle_channels_are_evicted(self):
+        """Test that the least recently used channels are dropped"""
+        for game_id in ('a', 'b', 'c'):
+            events.get_channel(game_id)
+
+        self.assertEqual(list(events._channels), ['b', 'c'])
+
+    async def test_subscription(self):
+        """Test that subscribers receive the events published after they subscribed"""
+        subscription = events.Subscription('game')
+        self._publish(1)
+
+        event = await asyncio.wait_for(subscription.get(), 1)
+        self.assertEqual(event['version'], 1)
+
+        subscription.close()
+        self.assertFalse(events.get_channel('game').subscribers)
+
+
+class GameEventsViewTest(TestCase):
+    """Test cases for the game event stream"""
+
+    def setUp(self):
+        """Set up a game whose second row is all mines"""
+        cache.clear()
+        events.reset()
+        self.factory = AsyncRequestFactory()
+        self.game = Game.objects.create(width=5, height=5, mines=5)
+        self.game.internal_board = [['M' if row == 1 else '' for _ in range(5)] for row in range(5)]
+        self.game.player_board = [['' for _ in range(5)] for _ in range(5)]
+        self.game.save()
+
+    async def _reveal(self, row, col):
+        """Helper method that reveals a cell through the async reveal view"""
+        request = self.factory.post('/', json.dumps({'row': row, 'col': col}), content_type='application/json')
+        return await async_views.reveal(request, self.game.id)
+
+    async def _next_event(self, stream):
+        """Helper method that reads and parses the next event of a stream"""
+        message = (await asyncio.wait_for(stream.__anext__(), 1)).decode()
+        fields = dict(line.split(': ', 1) for line in message.strip().split('\n'))
+        return fields['event'], json.loads(fields['data'])
+
+    async def test_snapshot_then_moves(self):
+        """Test that a new client gets the board followed by every move"""
+        response = await async_views.game_events(self.factory.get('/'), self.game.id)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = response.streaming_content
+
+        name, data = await self._next_event(stream)
+        self.assertEqual(name, 'snapshot')
+        self.assertEqual(data['version'], 0)
+        self.assertEqual(data['board_state'][0][0], '')
+
+        await self._reveal(0, 0)
+        name, data = await self._next_event(stream)
+        self.assertEqual(name, 'reveal')
+        self.assertEqual((data['base_version'], data['version']), (0, 1))
+        self.assertEqual(data['changes'], [[0, 0, '2']])
+        await stream.aclose()
+
+    async def test_resume_from_version(self):
+        """Test that a client with a version gets only the moves it missed"""
+        await self._reveal(0, 0)
+        await self._reveal(0, 1)
+
+        response = await async_views.game_events(self.factory.get('/', {'version': 1}), self.game.id)
+        stream = response.streaming_content
+
+        name, data = await self._next_event(stream)
+        self.assertEqual(name, 'reveal')
+        self.assertEqual(data['version'], 2)
+        self.assertEqual(data['changes'], [[0, 1, '3']])
+        await stream.aclose()
+
+    @override_settings(MINESWEEPER_EVENT_HISTORY=1)
+    async def test_resume_out_of_history(self):
+        """Test that a client too far behind gets the whole board"""
+        await self._reveal(0, 0)
+        await self._reveal(0, 1)
+
+        response = await async_views.game_events(
+            self.factory.get('/', HTTP_LAST_EVENT_ID='0'), self.game.id
+        )
+        stream = response.streaming_content
+
+        name, data = await self._next_event(stream)
+        self.assertEqual(name, 'snapshot')
+        self.assertEqual(data['board_state'][0][:2], ['2', '3'])
+        await stream.aclose()
+
+    async def test_stream_ends_with_game(self):
+        """Test that the stream closes after the move that finished the game"""
+        response = await async_views.game_events(self.factory.get('/', {'version': 0}), self.game.id)
+        stream = response.streaming_content
+
+        await self._reveal(1, 0)
+        name, data = await self._next_event(stream)
+        self.assertEqual(name, 'end')
+        self.assertTrue(data['game_over'])
+        with self.assertRaises(StopAsyncIteration):
+            await asyncio.wait_for(stream.__anext__(), 1)
+        self.assertFalse(events.get_channel(self.game.id).subscribers)
+
+    @override_settings(MINESWEEPER_EVENT_KEEPALIVE=0.01)
+    async def test_keepalive(self):
+        """Test that an idle stream sends keep-alive comments"""
+        response = await async_views.game_events(self.factory.get('/', {'version': 0}), self.game.id)
+        stream = response.streaming_content
+
+        self.assertEqual(await asyncio.wait_for(stream.__anext__(), 1), b": keep-alive\n\n")
+        await stream.aclose()
+
+    async def test_invalid_version(self):
+        """Test that a version that isn't an integer is rejected"""
+        response = await async_views.game_events(self.factory.get('/', {'version': 'x'}), self.game.id)
+        self.assertEqual(response.status_code, 400)
+
+    async def test_game_not_found(self):
+        """Test that an unknown game returns 404"""
+        response = await async_views.game_events(self.factory.get('/'), '00000000-0000-0000-0000-000000000000')
+        self.assertEqual(response.status_code, 404)
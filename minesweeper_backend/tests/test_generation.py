@@ -0,0 +1,124 @@
+import json
+import time
+
+from django.core.cache import cache
+from django.test import AsyncRequestFactory, SimpleTestCase, TransactionTestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from minesweeper_backend import async_views
+from minesweeper_backend.generation import (
+    GenerationTimeout, generate_no_guess_board, max_mines, solvable, start_area, start_cell
+)
+from minesweeper_backend.models import Game
+
+
+class NoGuessGenerationTest(SimpleTestCase):
+    """Test cases for generating boards that can be won without guessing"""
+
+    def test_solvable(self):
+        """Test that a board is only solvable if deduction alone wins it"""
+        self.assertTrue(solvable(4, 4, 1, [0]))
+        # The mines at (0, 1) and (2, 0) leave a guess in the corner
+        self.assertFalse(solvable(4, 4, 2, [1, 8]))
+
+    def test_start_area(self):
+        """Test that the start cell and its neighbours are kept free of mines"""
+        self.assertEqual(start_cell(9, 9), (4, 4))
+        self.assertEqual(len(start_area(9, 9)), 9)
+        self.assertEqual(max_mines(9, 9), 72)
+        self.assertEqual(start_area(1, 1), {0})
+
+    def test_generate(self):
+        """Test that a generated board is solvable from its start cell"""
+        boards = generate_no_guess_board(9, 9, 10, time_budget=10)
+        mines = [
+            row * 9 + col for row in range(9) for col in range(9) if boards['internal_board'][row][col] == 'M'
+        ]
+
+        self.assertEqual(len(mines), 10)
+        self.assertEqual(boards['start'], (4, 4))
+        self.assertFalse(start_area(9, 9) & set(mines))
+        self.assertTrue(solvable(9, 9, 10, mines))
+
+    def test_timeout(self):
+        """Test that running out of time raises GenerationTimeout"""
+        self.assertRaises(GenerationTimeout, generate_no_guess_board, 9, 9, 10, 0)
+
+
+class NoGuessViewsTest(TransactionTestCase):
+    """
+    Test cases for creating no-guess games. The sync view saves them from a
+    background thread, on its own connection, so the data is committed.
+    """
+
+    def setUp(self):
+        """Set up the API client"""
+        cache.clear()
+        self.client = APIClient()
+        self.url = reverse('create_game')
+
+    def wait_for_game(self, response):
+        """Helper method that polls the URL of an accepted game until it is no longer pending"""
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        url = response['Location']
+        deadline = time.monotonic() + 10
+        while True:
+            response = self.client.get(url)
+            if response.status_code != status.HTTP_202_ACCEPTED:
+                return response
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.01)
+
+    def test_create_no_guess_game(self):
+        """Test that a no-guess game is accepted, then starts with its opening revealed"""
+        response = self.client.post(self.url, {'width': 9, 'height': 9, 'mines': 10, 'mode': 'no_guess'}, format='json')
+        self.assertEqual(response.data['status'], 'pending')
+        self.assertEqual(response['Retry-After'], '1')
+
+        response = self.wait_for_game(response)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['mode'], 'no_guess')
+        self.assertEqual(response.data['version'], 0)
+        self.assertEqual(response.data['board_state'][4][4], '0')
+
+        game = Game.objects.get(pk=response.data['game_id'])
+        self.assertEqual(game.mode, Game.NO_GUESS)
+        self.assertEqual(game.revealed_cells, sum(cell != '' for row in game.player_board for cell in row))
+
+    def test_random_by_default(self):
+        """Test that games are random unless asked otherwise"""
+        response = self.client.post(self.url, {'width': 9, 'height': 9, 'mines': 10}, format='json')
+
+        self.assertEqual(response.data['mode'], 'random')
+        self.assertTrue(all(cell == '' for row in response.data['board_state'] for cell in row))
+
+    def test_invalid_mode(self):
+        """Test that unknown modes and too many mines for a no-guess board are rejected"""
+        response = self.client.post(self.url, {'mode': 'easy'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.post(self.url, {'width': 3, 'height': 3, 'mines': 1, 'mode': 'no_guess'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_no_board_in_time(self):
+        """Test that failing to find a board in time turns the pending game into a 503"""
+        with self.settings(MINESWEEPER_NO_GUESS_TIME_BUDGET=0):
+            response = self.client.post(self.url, {'width': 9, 'height': 9, 'mines': 10, 'mode': 'no_guess'}, format='json')
+            response = self.wait_for_game(response)
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertFalse(Game.objects.exists())
+
+    async def test_async_create_no_guess_game(self):
+        """Test that the async view awaits the generation workers"""
+        request = AsyncRequestFactory().post(
+            '/', json.dumps({'width': 9, 'height': 9, 'mines': 10, 'mode': 'no_guess'}), content_type='application/json'
+        )
+        response = await async_views.create_game(request)
+        data = json.loads(response.content)
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(data['board_state'][4][4], '0')
+        game = await Game.objects.aget(pk=data['game_id'])
+        self.assertEqual(game.mode, Game.NO_GUESS)
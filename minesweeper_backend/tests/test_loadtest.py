@@ -0,0 +1,70 @@
+import logging
+
+from django.test import LiveServerTestCase, SimpleTestCase
+
+from minesweeper_backend.loadtest import count_contention, percentile, run_load_test, summarize
+from minesweeper_backend.metrics import increment
+from minesweeper_backend.models import Game
+
+
+class SummaryTest(SimpleTestCase):
+    """Test cases for the load test statistics"""
+
+    def test_percentile(self):
+        """Test nearest-rank percentiles"""
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([7], 99), 7)
+        self.assertEqual(percentile([], 50), 0.0)
+
+    def test_summarize(self):
+        """Test that latencies are reported in milliseconds with the status codes"""
+        summary = summarize([0.002, 0.001, 0.004, 0.003], {200: 3, 503: 1})
+
+        self.assertEqual(summary['requests'], 4)
+        self.assertEqual(summary['statuses'], {'200': 3, '503': 1})
+        self.assertAlmostEqual(summary['mean_ms'], 2.5)
+        self.assertAlmostEqual(summary['p50_ms'], 2.0)
+        self.assertAlmostEqual(summary['max_ms'], 4.0)
+
+    def test_count_contention(self):
+        """Test that the moves the store retries during the block are counted"""
+        increment('move_retries')
+        logger = logging.getLogger('minesweeper_backend')
+        handlers = list(logger.handlers)
+        with count_contention() as counter:
+            increment('move_retries')
+
+        self.assertEqual(counter.retries, 1)
+        self.assertEqual(logger.handlers, handlers)
+
+
+class LoadTestTest(LiveServerTestCase):
+    """Test cases for running the simulated players against a live server"""
+
+    def test_players_play_games(self):
+        """Test that every player creates, loads and plays its games"""
+        with count_contention():
+            report = run_load_test(
+                self.live_server_url, players=2, games=2, sizes=((5, 5), (8, 6)), density=0.2, seed=1
+            )
+
+        self.assertEqual(report['games'], 4)
+        self.assertEqual(Game.objects.count(), 4)
+        self.assertEqual(report['endpoints']['create']['statuses'], {'201': 4})
+        self.assertGreaterEqual(report['endpoints']['get']['requests'], 4)
+        self.assertGreater(report['endpoints']['reveal']['requests'], 0)
+        self.assertEqual(report['error_rate'], 0.0)
+        self.assertEqual(report['requests'], sum(summary['requests'] for summary in report['endpoints'].values()))
+        self.assertGreater(report['throughput'], 0)
+
+    def test_shared_games(self):
+        """Test that players of a group play the game their first player created"""
+        with count_contention():
+            report = run_load_test(
+                self.live_server_url, players=2, games=1, players_per_game=2, sizes=((6, 6),), seed=2
+            )
+
+        self.assertEqual(report['endpoints']['create']['requests'], 1)
+        self.assertEqual(report['games'], 2)
@@ -0,0 +1,94 @@
+import logging
+import queue
+from logging.handlers import QueueHandler
+
+from django.test import SimpleTestCase
+
+from minesweeper_backend.logs import (
+    NonBlockingQueueHandler, SamplingFilter, start_queue_logging, stop_queue_logging
+)
+
+
+class ListHandler(logging.Handler):
+    """Handler that keeps the formatted messages it gets"""
+
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(self.format(record))
+
+
+def make_record(msg, *args, sample=None):
+    record = logging.LogRecord('minesweeper_backend.views', logging.INFO, __file__, 1, msg, args, None)
+    if sample:
+        record.sample = sample
+    return record
+
+
+class SamplingFilterTest(SimpleTestCase):
+    """Test cases for sampling high-frequency log messages"""
+
+    def test_keeps_one_in_rate(self):
+        """Test that one in every N tagged records is kept"""
+        sampling = SamplingFilter({'reveal': 3})
+        kept = [sampling.filter(make_record("Revealed %s", n, sample='reveal')) for n in range(7)]
+        self.assertEqual(kept, [True, False, False, True, False, False, True])
+
+    def test_untagged_and_unknown_types_pass(self):
+        """Test that records without a configured sample type are always kept"""
+        sampling = SamplingFilter({'reveal': 100})
+        self.assertTrue(all(sampling.filter(make_record("Created game")) for _ in range(5)))
+        self.assertTrue(all(sampling.filter(make_record("Hit", sample='cache_hit')) for _ in range(5)))
+
+    def test_messages_sampled_separately(self):
+        """Test that each message of a type has its own counter"""
+        sampling = SamplingFilter({'cache_hit': 2})
+        kept = []
+        for _ in range(2):
+            kept.append(sampling.filter(make_record("Cache hit for game %s", 1, sample='cache_hit')))
+            kept.append(sampling.filter(make_record("Retrieved game %s from cache", 1, sample='cache_hit')))
+        self.assertEqual(kept, [True, True, False, False])
+
+    def test_configured_for_views(self):
+        """Test that the views' loggers sample their records"""
+        for name in ('minesweeper_backend.views', 'minesweeper_backend.async_views'):
+            filters = logging.getLogger(name).filters
+            self.assertTrue(any(isinstance(f, SamplingFilter) for f in filters))
+
+
+class QueueLoggingTest(SimpleTestCase):
+    """Test cases for logging through a background thread"""
+
+    def test_records_reach_handlers(self):
+        """Test that records are formatted and written by the listener thread"""
+        logger = logging.getLogger('minesweeper_backend.tests.queued')
+        logger.propagate = False
+        target = ListHandler()
+        logger.handlers = [target]
+        self.addCleanup(setattr, logger, 'handlers', [])
+
+        installed = start_queue_logging([logger.name])
+        self.assertEqual(logger.handlers, installed)
+
+        logger.warning("Game %s lost", 'abc')
+        stop_queue_logging()
+
+        self.assertEqual(target.messages, ["Game abc lost"])
+
+    def test_full_queue_drops_records(self):
+        """Test that a full queue drops records instead of blocking"""
+        handler = NonBlockingQueueHandler(queue.Queue(maxsize=1))
+        handler.handle(make_record("first"))
+        handler.handle(make_record("second"))
+
+        self.assertEqual(handler.dropped, 1)
+        self.assertEqual(handler.queue.get_nowait().getMessage(), "first")
+
+    def test_not_started_by_app(self):
+        """Test that loading the app leaves the project's handlers in place and writes no log file"""
+        for name in ('minesweeper_backend', 'django'):
+            handlers = logging.getLogger(name).handlers
+            self.assertFalse(any(isinstance(h, QueueHandler) for h in handlers))
+            self.assertFalse(any(isinstance(h, logging.FileHandler) for h in handlers))
@@ -0,0 +1,139 @@
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from minesweeper_backend import metrics
+from minesweeper_backend.executors import run_board_work
+from minesweeper_backend.models import Game
+
+
+class PhaseTest(SimpleTestCase):
+    """Test cases for timing the phases of a request"""
+
+    def setUp(self):
+        metrics.reset()
+
+    def test_phases_accumulate(self):
+        """Test that every block of a phase adds to the request's timer"""
+        token = metrics.start_request()
+        with metrics.phase('engine'):
+            pass
+        with metrics.phase('engine'):
+            with metrics.phase('engine'):
+                pass
+        with metrics.phase('save'):
+            pass
+        timer = metrics.end_request(token)
+
+        self.assertEqual(set(timer.phases), {'engine', 'save'})
+        self.assertFalse(timer.active)
+        self.assertIsNone(metrics.current_timer())
+
+    def test_no_request(self):
+        """Test that phases outside a request are not recorded"""
+        with metrics.phase('engine'):
+            pass
+        self.assertIsNone(metrics.current_timer())
+
+    def test_decorator(self):
+        """Test that phase can decorate a function"""
+        @metrics.phase('serialize')
+        def serialize():
+            return 42
+
+        token = metrics.start_request()
+        self.assertEqual(serialize(), 42)
+        self.assertIn('serialize', metrics.end_request(token).phases)
+
+    async def test_board_work_is_timed(self):
+        """Test that work in the board executor is timed as part of the request"""
+        @metrics.phase('engine')
+        def work():
+            return 1
+
+        token = metrics.start_request()
+        await run_board_work(work)
+        self.assertIn('engine', metrics.end_request(token).phases)
+
+    def test_board_size(self):
+        """Test the board size buckets"""
+        self.assertEqual(metrics.board_size(9, 9), 'small')
+        self.assertEqual(metrics.board_size(30, 16), 'medium')
+        self.assertEqual(metrics.board_size(50, 50), 'large')
+        self.assertEqual(metrics.board_size(100, 100), 'huge')
+
+    def test_server_timing(self):
+        """Test the Server-Timing header value"""
+        timer = metrics.RequestTimer()
+        timer.phases['cache'] = 0.0015
+        self.assertEqual(timer.server_timing(0.004), "cache;dur=1.500, total;dur=4.000")
+
+    def test_render_metrics(self):
+        """Test that recorded requests are rendered as cumulative Prometheus histograms"""
+        timer = metrics.RequestTimer()
+        timer.board = 'small'
+        timer.phases['engine'] = 0.002
+        metrics.record('reveal', timer, 0.003, 200)
+        metrics.record('reveal', timer, 0.2, 200)
+
+        text = metrics.render_metrics()
+
+        self.assertIn("# TYPE minesweeper_request_duration_seconds histogram", text)
+        self.assertIn('minesweeper_request_duration_seconds_bucket{endpoint="reveal",board="small",le="0.005"} 1', text)
+        self.assertIn('minesweeper_request_duration_seconds_bucket{endpoint="reveal",board="small",le="+Inf"} 2', text)
+        self.assertIn('minesweeper_request_duration_seconds_count{endpoint="reveal",board="small"} 2', text)
+        self.assertIn(
+            'minesweeper_request_phase_duration_seconds_count{endpoint="reveal",board="small",phase="engine"} 2', text
+        )
+        self.assertIn('minesweeper_responses_total{endpoint="reveal",status="200"} 2', text)
+
+
+class TimingMiddlewareTest(TestCase):
+    """Test cases for the timing middleware and the metrics endpoint"""
+
+    def setUp(self):
+        """Set up a game whose second row is all mines"""
+        cache.clear()
+        metrics.reset()
+        self.client = APIClient()
+        self.game = Game.objects.create(width=5, height=5, mines=5)
+        self.game.internal_board = [['M' if row == 1 else '' for _ in range(5)] for row in range(5)]
+        self.game.player_board = [['' for _ in range(5)] for _ in range(5)]
+        self.game.save()
+
+    def test_server_timing_header(self):
+        """Test that a reveal reports its phases"""
+        response = self.client.post(reverse('reveal', args=[self.game.id]), {'row': 4, 'col': 4}, format='json')
+
+        timing = response['Server-Timing']
+        for name in ('cache', 'engine', 'save', 'serialize', 'total'):
+            self.assertIn(f"{name};dur=", timing)
+
+    def test_lock_phase(self):
+        """Test that moves under a game lock report the wait for it"""
+        response = self.client.post(reverse('flag', args=[self.game.id]), {'row': 0, 'col': 0}, format='json')
+        self.assertIn("lock;dur=", response['Server-Timing'])
+
+    def test_metrics_endpoint(self):
+        """Test that requests are exposed by endpoint and board size"""
+        self.client.post(reverse('reveal', args=[self.game.id]), {'row': 0, 'col': 0}, format='json')
+        self.client.post(reverse('create_game'), {'width': 30, 'height': 16, 'mines': 10}, format='json')
+
+        response = self.client.get(reverse('metrics'))
+        text = response.content.decode()
+
+        self.assertEqual(response['Content-Type'], metrics.PROMETHEUS_CONTENT_TYPE)
+        self.assertIn('minesweeper_request_duration_seconds_count{endpoint="reveal",board="small"} 1', text)
+        self.assertIn('minesweeper_request_duration_seconds_count{endpoint="create_game",board="medium"} 1', text)
+        self.assertIn('phase="engine"', text)
+
+        # The scrape itself is recorded and never cached
+        text = self.client.get(reverse('metrics')).content.decode()
+        self.assertIn('minesweeper_responses_total{endpoint="metrics",status="200"} 1', text)
+
+    @override_settings(MINESWEEPER_METRICS=False)
+    def test_disabled(self):
+        """Test that requests aren't timed when metrics are disabled"""
+        response = self.client.post(reverse('reveal', args=[self.game.id]), {'row': 0, 'col': 0}, format='json')
+        self.assertNotIn('Server-Timing', response)
@@ -2,6 +2,7 @@ from django.test import TestCase
 from django.core.exceptions import ValidationError
 from unittest.mock import patch
 
+from minesweeper_backend import codec
 from minesweeper_backend.models import Game
 
 
@@ -116,4 +117,57 @@ class GameModelTest(TestCase):
         
         for row in game.player_board:
             for cell in row:
-                self.assertEqual(cell, '') 
\ No newline at end of file
+                self.assertEqual(cell, '') 
+
+    def test_boards_stored_packed(self):
+        """Test that boards are persisted in their packed form and decoded on load"""
+        game = Game.objects.create(width=5, height=5, mines=5)
+        game.initialize_board()
+
+        stored = Game.objects.get(pk=game.pk)
+        self.assertEqual(stored.internal_board, game.internal_board)
+        self.assertEqual(stored.player_board, game.player_board)
+        self.assertLess(len(bytes(stored.cell_states)), 25)
+
+    def test_initialize_board_stores_counts(self):
+        """Test that the neighbour count grid is persisted with the board"""
+        game = Game.objects.create(width=6, height=4, mines=5)
+        game.initialize_board()
+
+        stored = Game.objects.get(pk=game.pk)
+        self.assertEqual(len(stored.counts), 4)
+        self.assertEqual(len(stored.counts[0]), 6)
+        self.assertEqual(stored.counts, game.counts)
+
+    def test_save_writes_back_in_place_changes(self):
+        """Test that edits made to the decoded player board are saved"""
+        game = Game.objects.create(width=3, height=3, mines=1)
+        game.initialize_board()
+
+        game.player_board[1][1] = '1'
+        game.save()
+
+        game.refresh_from_db()
+        self.assertEqual(game.player_board[1][1], '1')
+
+    def test_board_hash_follows_board(self):
+        """Test that the board hash is kept in step with the player board"""
+        game = Game.objects.create(width=3, height=3, mines=1)
+        game.initialize_board()
+        first_hash = game.board_hash
+
+        game.player_board[1][1] = '1'
+        game.save()
+
+        game.refresh_from_db()
+        self.assertIsNotNone(first_hash)
+        self.assertNotEqual(game.board_hash, first_hash)
+        self.assertEqual(game.board_hash, codec.board_hash(game.cell_states))
+
+    def test_player_board_carries_game_id(self):
+        """Test that a decoded player board knows its game"""
+        game = Game.objects.create(width=3, height=3, mines=1)
+        game.initialize_board()
+
+        stored = Game.objects.get(pk=game.pk)
+        self.assertEqual(stored.player_board.game_id, game.id)
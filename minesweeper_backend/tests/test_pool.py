@@ -0,0 +1,107 @@
+import time
+
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from minesweeper_backend import pool as pool_module
+from minesweeper_backend.models import Game
+from minesweeper_backend.pool import BoardPool, board_pool, build_board, check_board_pool
+
+
+@override_settings(
+    MINESWEEPER_BOARD_POOL=[(5, 5, 3, 'random'), (9, 9, 10, 'random')],
+    MINESWEEPER_BOARD_POOL_LOW=2,
+    MINESWEEPER_BOARD_POOL_HIGH=3,
+    MINESWEEPER_BOARD_POOL_INTERVAL=0.05
+)
+class BoardPoolTest(TestCase):
+    """Test cases for the pool of pre-generated boards"""
+
+    def setUp(self):
+        """Start every test with an empty pool"""
+        cache.clear()
+        pool_module.reset()
+        self.addCleanup(pool_module.reset)
+        self.client = APIClient()
+
+    def wait_for(self, condition):
+        """Helper method that waits up to 10 seconds for the pool thread to meet a condition"""
+        deadline = time.monotonic() + 10
+        while not condition():
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.01)
+
+    def test_build_board(self):
+        """Test that a pooled board has every packed field of a game"""
+        fields = build_board(9, 9, 10, 'no_guess')
+        game = Game(width=9, height=9, mines=10, mode='no_guess', **fields)
+
+        self.assertEqual(sum(row.count('M') for row in game.internal_board), 10)
+        self.assertEqual(game.player_board[4][4], '0')
+        self.assertEqual(game.revealed_cells, sum(cell != '' for row in game.player_board for cell in row))
+        self.assertIsNotNone(game.region_index)
+
+    def test_take(self):
+        """Test that boards are taken per configuration until they run out"""
+        pool = BoardPool([(5, 5, 3, 'random')], low=1, high=2)
+        pool.fill(pool.boards)
+        self.assertEqual(pool.sizes(), {(5, 5, 3, 'random'): 2})
+
+        self.assertIsNotNone(pool.take((5, 5, 3, 'random')))
+        self.assertIsNotNone(pool.take((5, 5, 3, 'random')))
+        self.assertIsNone(pool.take((5, 5, 3, 'random')))
+        self.assertIsNone(pool.take((6, 6, 3, 'random')))
+
+    def test_no_guess_rejected(self):
+        """Test that no-guess configurations fail the settings check and can't be pooled"""
+        configs = [(5, 5, 3, 'random'), (9, 9, 10, 'no_guess')]
+        with override_settings(MINESWEEPER_BOARD_POOL=configs):
+            errors = check_board_pool()
+        self.assertEqual([error.id for error in errors], ['minesweeper_backend.E001'])
+
+        with self.assertRaises(ImproperlyConfigured):
+            BoardPool(configs, low=1, high=2)
+
+    def test_settings_check_passes(self):
+        """Test that the random configurations of the settings pass the check"""
+        self.assertEqual(check_board_pool(), [])
+
+    def test_warm_and_refill(self):
+        """Test that the pool thread warms every configuration and refills below the low watermark"""
+        pool = board_pool()
+        pool.start()
+        self.wait_for(lambda: all(size == 3 for size in pool.sizes().values()))
+
+        pool.take((5, 5, 3, 'random'))
+        pool.take((5, 5, 3, 'random'))
+        self.wait_for(lambda: pool.sizes()[5, 5, 3, 'random'] == 3)
+
+    def test_create_game_claims_board(self):
+        """Test that a pooled configuration is created with a single insert"""
+        pool = board_pool()
+        pool.fill(pool.boards)
+
+        with self.assertNumQueries(1):
+            response = self.client.post(reverse('create_game'), {'width': 5, 'height': 5, 'mines': 3}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(pool.sizes()[5, 5, 3, 'random'], 2)
+        game = Game.objects.get(pk=response.data['game_id'])
+        self.assertEqual(sum(row.count('M') for row in game.internal_board), 3)
+
+        response = self.client.post(reverse('create_game'), {'width': 9, 'height': 9, 'mines': 10}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(pool.sizes()[9, 9, 10, 'random'], 2)
+
+    def test_unpooled_configuration(self):
+        """Test that other configurations and exhausted ones are generated inline"""
+        response = self.client.post(reverse('create_game'), {'width': 6, 'height': 6, 'mines': 3}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        response = self.client.post(reverse('create_game'), {'width': 5, 'height': 5, 'mines': 3}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Game.objects.count(), 2)
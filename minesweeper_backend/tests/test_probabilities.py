@@ -0,0 +1,185 @@
+import itertools
+import random
+import uuid
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from minesweeper_backend import probabilities as probabilities_module
+from minesweeper_backend import solver as solver_module
+from minesweeper_backend.models import Game
+from minesweeper_backend.probabilities import count_layouts, mine_probabilities
+from minesweeper_backend.solver import OutOfTime, Solver, enumerate_layouts
+
+
+def brute_force(board, mines):
+    """Helper function that finds the probabilities by trying every placement of the mines"""
+    height, width = len(board), len(board[0])
+    hidden = [(r, c) for r in range(height) for c in range(width) if board[r][c] in ('', 'F')]
+    numbers = [(r, c, int(board[r][c])) for r in range(height) for c in range(width) if board[r][c].isdigit()]
+    counts = dict.fromkeys(hidden, 0)
+    layouts = 0
+    for placement in itertools.combinations(hidden, mines):
+        placed = set(placement)
+        if all(
+            sum((r + dr, c + dc) in placed for dr in (-1, 0, 1) for dc in (-1, 0, 1)) == number
+            for r, c, number in numbers
+        ):
+            layouts += 1
+            for cell in placed:
+                counts[cell] += 1
+    return {(r, c): count / layouts for (r, c), count in counts.items()}
+
+
+class ProbabilitiesTest(SimpleTestCase):
+    """Test cases for computing mine probabilities"""
+
+    def setUp(self):
+        """Start every test without memoized components"""
+        probabilities_module.reset()
+
+    def probabilities(self, board, mines):
+        """Helper method that returns the probabilities of a board by (row, col)"""
+        width = len(board[0])
+        result = mine_probabilities(Solver.from_board(board, mines).solve())
+        return {divmod(i, width): probability for i, probability in result.items()}
+
+    def test_count_layouts(self):
+        """Test that the dynamic program counts what trying every layout does"""
+        random.seed(11)
+        for _ in range(200):
+            cells = list(range(random.randint(1, 10)))
+            constraints = []
+            for _ in range(random.randint(1, 6)):
+                constraint_cells = random.sample(cells, random.randint(1, min(len(cells), 4)))
+                constraints.append((constraint_cells, random.randint(0, len(constraint_cells))))
+            expected = {
+                mines: layouts for mines, layouts in enumerate_layouts(cells, constraints).items() if layouts[0]
+            }
+            self.assertEqual(count_layouts(cells, constraints), expected)
+
+    def test_long_chain(self):
+        """Test that a frontier far too long to enumerate is counted"""
+        size = 400
+        constraints = [([i, i + 1], 1) for i in range(size - 1)]
+        layouts = count_layouts(list(range(size)), constraints)
+        self.assertEqual(layouts, {size // 2: (2, [1] * size)})
+
+    def test_interior_weighting(self):
+        """Test that layouts leaving more ways to place the other mines weigh more"""
+        # Either the cell between the 1s is the only mine on the frontier (3
+        # ways to place the other one in the interior) or both outer cells
+        # are (1 way), so the shared cell is a mine 3 times out of 4
+        board = [['', '1', '', '1', '', '', '', '']]
+        result = self.probabilities(board, 2)
+
+        self.assertAlmostEqual(result[0, 2], 3 / 4)
+        self.assertAlmostEqual(result[0, 0], 1 / 4)
+        self.assertAlmostEqual(result[0, 4], 1 / 4)
+        for col in (5, 6, 7):
+            self.assertAlmostEqual(result[0, col], 1 / 4)
+
+    def test_exact_on_random_boards(self):
+        """Test that the probabilities match trying every placement of the mines"""
+        random.seed(13)
+        for _ in range(150):
+            width, height = random.randint(2, 5), random.randint(2, 5)
+            mine_count = random.randint(1, width * height // 3 + 1)
+            mines = set(random.sample(range(width * height), mine_count))
+            board = [[''] * width for _ in range(height)]
+            for i in random.sample(range(width * height), random.randint(0, width * height)):
+                row, col = divmod(i, width)
+                if i not in mines:
+                    board[row][col] = str(sum(
+                        (row + dr) * width + col + dc in mines
+                        for dr in (-1, 0, 1) for dc in (-1, 0, 1)
+                        if 0 <= row + dr < height and 0 <= col + dc < width
+                    ))
+
+            result = self.probabilities(board, mine_count)
+            for cell, probability in brute_force(board, mine_count).items():
+                self.assertAlmostEqual(result[cell], probability, places=9)
+
+    def test_memoized_components(self):
+        """Test that components of the same shape are counted once"""
+        board = [['1', '', '', '', '1'], ['', '', '', '', '']]
+        with mock.patch.object(probabilities_module, 'count_layouts', wraps=count_layouts) as counted:
+            self.probabilities(board, 2)
+            self.probabilities(board, 2)
+        self.assertEqual(counted.call_count, 1)
+
+    def test_deadline(self):
+        """Test that counting out of time gives up"""
+        constraints = [([i, i + 1], 1) for i in range(99)]
+        self.assertRaises(OutOfTime, count_layouts, list(range(100)), constraints, 0)
+
+
+class ProbabilitiesViewTest(TestCase):
+    """Test cases for the probabilities view"""
+
+    def setUp(self):
+        """Set up a game with mines in the top corners, with its bottom revealed"""
+        cache.clear()
+        solver_module.reset()
+        probabilities_module.reset()
+        self.client = APIClient()
+        self.game = Game.objects.create(width=4, height=3, mines=2)
+        self.game.internal_board = [['M', '', '', 'M'], ['', '', '', ''], ['', '', '', '']]
+        self.game.player_board = [['' for _ in range(4)] for _ in range(3)]
+        self.game.save()
+        self.client.post(reverse('reveal', args=[self.game.id]), {'row': 2, 'col': 1}, format='json')
+        self.url = reverse('probabilities', args=[self.game.id])
+
+    def test_probabilities(self):
+        """Test that each hidden cell gets its exact probability and revealed cells null"""
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['version'], 1)
+        grid = response.data['probabilities']
+        self.assertEqual(grid[2], [None] * 4)
+        self.assertEqual(grid[1], [None] * 4)
+        self.assertEqual(grid[0], [1.0, 0.0, 0.0, 1.0])
+
+    def test_cached_per_version(self):
+        """Test that a board is computed once per version"""
+        with mock.patch.object(probabilities_module, 'mine_probabilities', wraps=mine_probabilities) as computed:
+            self.client.get(self.url)
+            self.client.get(self.url)
+            self.assertEqual(computed.call_count, 1)
+
+            self.client.post(reverse('flag', args=[self.game.id]), {'row': 0, 'col': 0}, format='json')
+            response = self.client.get(self.url)
+            self.assertEqual(computed.call_count, 2)
+            self.assertEqual(response.data['version'], 2)
+
+    def test_out_of_time(self):
+        """Test that a board not computed in time gets a 503"""
+        game = Game.objects.create(width=4, height=2, mines=1)
+        game.internal_board = [['M', '', '', ''], ['', '', '', '']]
+        game.player_board = [['', '', '', ''], ['', '1', '', '']]
+        game.save()
+
+        with self.settings(MINESWEEPER_PROBABILITY_TIME_BUDGET=-1):
+            response = self.client.get(reverse('probabilities', args=[game.id]))
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(response['Retry-After'], '1')
+
+        response = self.client.get(reverse('probabilities', args=[game.id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertAlmostEqual(response.data['probabilities'][0][0], 1 / 5)
+
+    def test_probabilities_finished_game(self):
+        """Test that finished games are rejected"""
+        self.client.post(reverse('reveal', args=[self.game.id]), {'row': 0, 'col': 0}, format='json')
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_probabilities_not_found(self):
+        """Test that an unknown game returns 404"""
+        response = self.client.get(reverse('probabilities', args=[uuid.uuid4()]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
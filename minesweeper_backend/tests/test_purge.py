@@ -0,0 +1,127 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from minesweeper_backend import purge
+from minesweeper_backend.models import ArchivedGame, Game
+from minesweeper_backend.purge import count_expired, purge_games, scheduled_purge
+from minesweeper_backend.store import current_game, state_cache, state_key
+
+
+@override_settings(
+    MINESWEEPER_IDLE_GAME_TTL=3600,
+    MINESWEEPER_FINISHED_GAME_TTL=86400,
+    MINESWEEPER_PURGE_PAUSE=0
+)
+class PurgeTest(TestCase):
+    """Test cases for the expiry and purge of games"""
+
+    def setUp(self):
+        """Set up games of every state and age"""
+        cache.clear()
+        state_cache().clear()
+        self.now = timezone.now()
+        self.live = self.create_game(hours=0.5)
+        self.idle = self.create_game(hours=2)
+        self.lost = self.create_game(hours=25, game_over=True)
+        self.won = self.create_game(hours=25, game_won=True, version=7)
+        self.recently_won = self.create_game(hours=2, game_won=True)
+
+    def create_game(self, hours, **fields):
+        """Helper method that creates a game whose last move was hours ago"""
+        game = Game.objects.create(width=5, height=5, mines=3, **fields)
+        game.initialize_board()
+        Game.objects.filter(pk=game.pk).update(last_move_at=self.now - timedelta(hours=hours))
+        return game
+
+    def remaining(self):
+        """Helper method that returns the ids of the games left"""
+        return set(Game.objects.values_list('id', flat=True))
+
+    def test_moves_record_time(self):
+        """Test that a move updates the time of the last move"""
+        game = Game.objects.get(pk=self.idle.pk)
+        game.flag(0, 0)
+        game.save()
+
+        game.refresh_from_db()
+        self.assertGreater(game.last_move_at, self.now - timedelta(seconds=1))
+
+    def test_purge_expired(self):
+        """Test that idle and old finished games are purged and the others kept"""
+        self.assertEqual(count_expired(self.now), 3)
+
+        self.assertEqual(purge_games(self.now), 3)
+        self.assertEqual(self.remaining(), {self.live.id, self.recently_won.id})
+
+    def test_archive(self):
+        """Test that purged games are archived with their outcome"""
+        purge_games(self.now)
+
+        results = {game.id: game.result for game in ArchivedGame.objects.all()}
+        self.assertEqual(results, {
+            self.idle.id: ArchivedGame.ABANDONED,
+            self.lost.id: ArchivedGame.LOST,
+            self.won.id: ArchivedGame.WON,
+        })
+        self.assertEqual(ArchivedGame.objects.get(pk=self.won.id).moves, 7)
+
+    def test_no_archive(self):
+        """Test that games can be purged without archiving them"""
+        purge_games(self.now, archived=False)
+
+        self.assertFalse(ArchivedGame.objects.exists())
+
+    def test_batches(self):
+        """Test that games are purged one bounded transaction at a time"""
+        # Per batch: a savepoint pair, the select, the archive insert and the delete;
+        # the second batch comes back short, so there is no third
+        with self.assertNumQueries(5 + 5):
+            self.assertEqual(purge_games(self.now, batch_size=2), 3)
+
+    def test_limit(self):
+        """Test that a purge stops at its limit"""
+        self.assertEqual(purge_games(self.now, batch_size=2, limit=1), 1)
+        self.assertEqual(count_expired(self.now), 2)
+
+    def test_clears_cache(self):
+        """Test that purged games are dropped from the cache"""
+        current_game(self.idle.id)
+        cache.set(f"game_{self.idle.id}", {'id': str(self.idle.id)})
+
+        purge_games(self.now)
+
+        self.assertIsNone(cache.get(f"game_{self.idle.id}"))
+        self.assertIsNone(state_cache().get(state_key(self.idle.id)))
+
+    @override_settings(MINESWEEPER_WRITE_BEHIND=True)
+    def test_write_behind(self):
+        """Test that unflushed moves keep a game from expiring"""
+        from minesweeper_backend.store import update_game
+
+        update_game(self.idle.id, lambda game, changes: game.flag(0, 0, changes=changes))
+
+        purge_games()
+        self.assertIn(self.idle.id, self.remaining())
+
+    @override_settings(MINESWEEPER_PURGE_INTERVAL=60)
+    def test_scheduled_purge(self):
+        """Test that only one scheduled purge runs per interval"""
+        self.addCleanup(cache.delete, purge.PURGE_KEY)
+
+        self.assertEqual(scheduled_purge(), 3)
+        self.assertIsNone(scheduled_purge())
+
+    def test_command(self):
+        """Test the purge_games management command"""
+        out = StringIO()
+        call_command('purge_games', '--dry-run', stdout=out)
+        self.assertIn("3 games expired", out.getvalue())
+
+        call_command('purge_games', '--no-archive', stdout=out)
+        self.assertIn("Purged 3 games", out.getvalue())
+        self.assertFalse(ArchivedGame.objects.exists())
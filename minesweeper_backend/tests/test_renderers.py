@@ -0,0 +1,175 @@
+import gzip
+import json
+
+from django.core.cache import cache
+from django.test import AsyncRequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from minesweeper_backend import async_views, renderers
+from minesweeper_backend.codec import decode_cells
+from minesweeper_backend.models import Game
+
+BOARD = [
+    ['', '', '1', 'F'],
+    ['0', '0', '1', ''],
+]
+
+
+def decode_binary(body):
+    """Helper function that splits a binary response into its JSON part and board"""
+    (length,) = renderers.JSON_LENGTH.unpack_from(body)
+    start = renderers.JSON_LENGTH.size
+    data = json.loads(body[start:start + length])
+    board = body[start + length:]
+    return data, decode_cells(board) if board else None
+
+
+class EncodingTest(SimpleTestCase):
+    """Test cases for the compact board encodings"""
+
+    def test_rows(self):
+        """Test that each row is one string with hidden cells as dots"""
+        self.assertEqual(renderers.encode_rows(BOARD), ['..1F', '001.'])
+
+    def test_rle(self):
+        """Test that rows are written as alternating cells and run lengths"""
+        self.assertEqual(renderers.encode_rle(BOARD), [['.', 2, '1', 1, 'F', 1], ['0', 2, '1', 1, '.', 1]])
+        self.assertEqual(renderers.encode_rle([[''] * 30]), [['.', 30]])
+
+    def test_sparse(self):
+        """Test that only cells that aren't hidden are listed"""
+        self.assertEqual(
+            renderers.encode_sparse(BOARD),
+            [[0, 2, '1'], [0, 3, 'F'], [1, 0, '0'], [1, 1, '0'], [1, 2, '1']]
+        )
+
+    def test_binary(self):
+        """Test that the binary format holds the other fields and the packed board"""
+        data, board = decode_binary(renderers.encode_binary({'version': 3, 'board_state': BOARD}))
+        self.assertEqual(data, {'version': 3})
+        self.assertEqual(board, BOARD)
+
+        data, board = decode_binary(renderers.encode_binary({'version': 3, 'changes': [[0, 0, '1']]}))
+        self.assertEqual(data['changes'], [[0, 0, '1']])
+        self.assertIsNone(board)
+
+    def test_negotiate(self):
+        """Test picking a format from the Accept header and the format parameter"""
+        self.assertEqual(renderers.negotiate(None), renderers.JSON)
+        self.assertEqual(renderers.negotiate('*/*'), renderers.JSON)
+        self.assertEqual(renderers.negotiate(f'{renderers.RLE}, */*;q=0.1'), renderers.RLE)
+        self.assertEqual(renderers.negotiate(f'{renderers.ROWS};q=0.5, {renderers.SPARSE}'), renderers.SPARSE)
+        self.assertEqual(renderers.negotiate('*/*', 'board'), renderers.BOARD)
+        self.assertIsNone(renderers.negotiate('text/html'))
+        self.assertIsNone(renderers.negotiate('*/*', 'xml'))
+
+
+class WireFormatViewsTest(TestCase):
+    """Test cases for negotiating the format of game responses"""
+
+    def setUp(self):
+        """Set up a game whose second row is all mines"""
+        cache.clear()
+        self.client = APIClient()
+        self.game = Game.objects.create(width=5, height=5, mines=5)
+        self.game.internal_board = [['M' if row == 1 else '' for _ in range(5)] for row in range(5)]
+        self.game.player_board = [['' for _ in range(5)] for _ in range(5)]
+        self.game.save()
+
+    def test_default_is_json(self):
+        """Test that clients that don't ask for a format get the nested lists"""
+        response = self.client.get(reverse('get_game', args=[self.game.id]))
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(response.json()['board_state'][0], [''] * 5)
+
+    def test_get_game_formats(self):
+        """Test that get_game answers in the requested format, and caches each format apart"""
+        url = reverse('get_game', args=[self.game.id])
+
+        response = self.client.get(url, HTTP_ACCEPT=renderers.ROWS)
+        self.assertEqual(response['Content-Type'], renderers.ROWS)
+        self.assertIn('Accept', response['Vary'])
+        self.assertEqual(json.loads(response.content)['board_state'], ['.....'] * 5)
+
+        response = self.client.get(url, HTTP_ACCEPT=renderers.RLE)
+        self.assertEqual(json.loads(response.content)['board_state'], [['.', 5]] * 5)
+
+        response = self.client.get(url, HTTP_ACCEPT=renderers.BOARD)
+        data, board = decode_binary(response.content)
+        self.assertEqual(data['game_id'], str(self.game.id))
+        self.assertEqual(board, self.game.player_board)
+
+        response = self.client.get(url)
+        self.assertEqual(response.json()['board_state'][0], [''] * 5)
+
+    def test_reveal_sparse(self):
+        """Test that a reveal can return the board as a list of revealed cells"""
+        response = self.client.post(
+            reverse('reveal', args=[self.game.id]), {'row': 4, 'col': 4}, format='json', HTTP_ACCEPT=renderers.SPARSE
+        )
+        data = json.loads(response.content)
+
+        self.assertEqual(response['Content-Type'], renderers.SPARSE)
+        self.assertEqual(len(data['board_state']), 15)
+        self.assertIn([4, 4, '0'], data['board_state'])
+
+    def test_create_game_format_parameter(self):
+        """Test that the format query parameter selects a format too"""
+        response = self.client.post(
+            reverse('create_game') + '?format=rows', {'width': 8, 'height': 3, 'mines': 2}, format='json'
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(json.loads(response.content)['board_state'], ['........'] * 3)
+
+    def test_not_acceptable(self):
+        """Test that a request accepting no supported format is refused"""
+        response = self.client.get(reverse('get_game', args=[self.game.id]), HTTP_ACCEPT='text/csv')
+        self.assertEqual(response.status_code, 406)
+
+    @override_settings(MINESWEEPER_COMPRESS_MIN_SIZE=100)
+    def test_compression(self):
+        """Test that large responses are gzipped for clients that accept it"""
+        url = reverse('get_game', args=[self.game.id])
+
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(json.loads(gzip.decompress(response.content))['board_state'][0], [''] * 5)
+
+        response = self.client.get(url)
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_small_responses_not_compressed(self):
+        """Test that responses under the size threshold are sent as they are"""
+        response = self.client.get(reverse('get_game', args=[self.game.id]), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+
+class AsyncWireFormatTest(TestCase):
+    """Test cases for negotiating the format of the async views' responses"""
+
+    def setUp(self):
+        """Set up a game whose second row is all mines"""
+        cache.clear()
+        self.factory = AsyncRequestFactory()
+        self.game = Game.objects.create(width=5, height=5, mines=5)
+        self.game.internal_board = [['M' if row == 1 else '' for _ in range(5)] for row in range(5)]
+        self.game.player_board = [['' for _ in range(5)] for _ in range(5)]
+        self.game.save()
+
+    async def test_get_game(self):
+        """Test that the async get_game answers in the requested format"""
+        request = self.factory.get('/', headers={'Accept': renderers.RLE})
+        response = await async_views.get_game(request, self.game.id)
+
+        self.assertEqual(response['Content-Type'], renderers.RLE)
+        self.assertIn('Accept', response['Vary'])
+        self.assertEqual(json.loads(response.content)['board_state'], [['.', 5]] * 5)
+
+    async def test_not_acceptable(self):
+        """Test that the game isn't created when the response can't be sent"""
+        request = self.factory.post('/', '{}', content_type='application/json', headers={'Accept': 'text/csv'})
+        response = await async_views.create_game(request)
+
+        self.assertEqual(response.status_code, 406)
+        self.assertEqual(await Game.objects.acount(), 1)
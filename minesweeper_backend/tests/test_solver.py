@@ -0,0 +1,207 @@
+import random
+import uuid
+from time import perf_counter
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from minesweeper_backend import solver as solver_module
+from minesweeper_backend.engines import python_engine
+from minesweeper_backend.models import Game
+from minesweeper_backend.solver import OutOfTime, Solver, enumerate_layouts
+
+
+def flood(board, counts, row, col):
+    """Helper function that reveals a cell and the empty region around it"""
+    height, width = len(board), len(board[0])
+    stack = [(row, col)]
+    while stack:
+        r, c = stack.pop()
+        if board[r][c] != '':
+            continue
+        board[r][c] = str(counts[r][c])
+        if counts[r][c] == 0:
+            stack.extend(
+                (r + dr, c + dc) for dr in (-1, 0, 1) for dc in (-1, 0, 1)
+                if 0 <= r + dr < height and 0 <= c + dc < width
+            )
+
+
+class SolverTest(SimpleTestCase):
+    """Test cases for deducing safe cells and mines"""
+
+    def solve(self, board, mines=None, **kwargs):
+        """Helper method that solves a board and returns its safe cells and mines"""
+        solver = Solver.from_board(board, mines, **kwargs).solve()
+        return solver.cells(solver.safe), solver.cells(solver.mines)
+
+    def test_single_point(self):
+        """Test that satisfied and saturated numbers are resolved"""
+        safe, mines = self.solve([['1', ''], ['', '']])
+        self.assertEqual((safe, mines), ([], []))
+
+        safe, mines = self.solve([['1', ''], ['1', '1']])
+        self.assertEqual((safe, mines), ([], [[0, 1]]))
+
+        safe, mines = self.solve([['0', ''], ['', '']])
+        self.assertEqual((safe, mines), ([[0, 1], [1, 0], [1, 1]], []))
+
+    def test_subset_reduction(self):
+        """Test the 1-2-1 pattern, which needs two numbers at once"""
+        safe, mines = self.solve([['', '', ''], ['1', '2', '1']])
+        self.assertEqual(safe, [[0, 1]])
+        self.assertEqual(mines, [[0, 0], [0, 2]])
+
+    def test_enumeration(self):
+        """Test a mine only found by trying the layouts of a frontier group"""
+        board = [['1', '', '', ''], ['', '', '', ''], ['1', '2', '', '2']]
+
+        safe, mines = self.solve(board, enumeration_limit=0)
+        self.assertEqual((safe, mines), ([[0, 1]], []))
+
+        safe, mines = self.solve(board)
+        self.assertEqual((safe, mines), ([[0, 1]], [[1, 3]]))
+
+    def test_mine_count(self):
+        """Test that the total number of mines resolves cells no number touches"""
+        self.assertEqual(self.solve([['', '', '']], mines=0), ([[0, 0], [0, 1], [0, 2]], []))
+        self.assertEqual(self.solve([['', '', '']], mines=3), ([], [[0, 0], [0, 1], [0, 2]]))
+        self.assertEqual(self.solve([['', '', '']], mines=1), ([], []))
+
+    def test_flags_not_trusted(self):
+        """Test that flags are treated as hidden cells"""
+        safe, mines = self.solve([['0', 'F'], ['', '']])
+        self.assertEqual(safe, [[0, 1], [1, 0], [1, 1]])
+
+    def test_enumerate_layouts(self):
+        """Test counting the layouts of a group by number of mines"""
+        self.assertEqual(enumerate_layouts([1, 2], [([1, 2], 1)]), {1: (2, [1, 1])})
+        self.assertEqual(
+            enumerate_layouts([1, 2, 3], [([1, 2], 1), ([2, 3], 1)]),
+            {1: (1, [0, 1, 0]), 2: (1, [1, 0, 1])}
+        )
+
+    def test_sound_on_random_boards(self):
+        """Test that every deduction matches the real board while a game is played out"""
+        random.seed(7)
+        for width, height, mine_count in ((9, 9, 10), (16, 16, 40), (30, 16, 99)):
+            boards = python_engine.generate_board(width, height, mine_count)
+            layout, counts = boards['internal_board'], boards['counts']
+            board = [[''] * width for _ in range(height)]
+            zeros = [(r, c) for r in range(height) for c in range(width) if counts[r][c] == 0 and layout[r][c] != 'M']
+            flood(board, counts, *random.choice(zeros))
+
+            solver = Solver(width, height, mine_count)
+            while True:
+                solver.update(board)
+                solver.solve()
+                self.assertTrue(all(layout[i // width][i % width] != 'M' for i in solver.safe))
+                self.assertTrue(all(layout[i // width][i % width] == 'M' for i in solver.mines))
+                if not solver.safe:
+                    break
+                for i in list(solver.safe)[:5]:
+                    flood(board, counts, i // width, i % width)
+
+    def test_incremental(self):
+        """Test that updating a solver after moves deduces what a new solver does"""
+        random.seed(3)
+        boards = python_engine.generate_board(30, 16, 99)
+        counts = boards['counts']
+        board = [[''] * 30 for _ in range(16)]
+        zeros = [(r, c) for r in range(16) for c in range(30) if counts[r][c] == 0]
+        flood(board, counts, *zeros[0])
+
+        solver = Solver.from_board(board, 99).solve()
+        for i in list(solver.safe)[:10]:
+            flood(board, counts, i // 30, i % 30)
+        solver.update(board)
+        self.assertTrue(len(solver._pending) < sum(cell != '' for row in board for cell in row))
+        solver.solve()
+
+        fresh = Solver.from_board(board, 99).solve()
+        self.assertEqual(solver.safe, fresh.safe)
+        self.assertEqual(solver.mines, fresh.mines)
+
+    def test_deadline(self):
+        """Test that a solve out of time is marked incomplete and carried on later"""
+        self.assertRaises(OutOfTime, enumerate_layouts, list(range(20)), [], perf_counter() - 1)
+
+        random.seed(5)
+        boards = python_engine.generate_board(100, 100, 1500)
+        counts = boards['counts']
+        board = [[''] * 100 for _ in range(100)]
+        for row, col in [(r, c) for r in range(100) for c in range(100) if counts[r][c] == 0][::50]:
+            flood(board, counts, row, col)
+
+        solver = Solver.from_board(board, 1500).solve(deadline=perf_counter() - 1)
+        self.assertFalse(solver.complete)
+
+        solver.solve()
+        fresh = Solver.from_board(board, 1500).solve()
+        self.assertEqual(solver.safe, fresh.safe)
+        self.assertEqual(solver.mines, fresh.mines)
+
+
+class HintViewTest(TestCase):
+    """Test cases for the hint view"""
+
+    def setUp(self):
+        """Set up a game whose second row is all mines, with its bottom rows revealed"""
+        cache.clear()
+        solver_module.reset()
+        self.client = APIClient()
+        self.game = Game.objects.create(width=5, height=5, mines=5)
+        self.game.internal_board = [['M' if row == 1 else '' for _ in range(5)] for row in range(5)]
+        self.game.player_board = [['' for _ in range(5)] for _ in range(5)]
+        self.game.save()
+        self.client.post(reverse('reveal', args=[self.game.id]), {'row': 4, 'col': 4}, format='json')
+        self.url = reverse('hint', args=[self.game.id])
+
+    def test_hint(self):
+        """Test that the mines are found from the numbers and the rest from the mine count"""
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['mines'], [[1, col] for col in range(5)])
+        self.assertEqual(response.data['safe'], [[0, col] for col in range(5)])
+        self.assertEqual(response.data['hint'], [0, 0])
+        self.assertTrue(response.data['complete'])
+        self.assertEqual(response.data['version'], 1)
+
+    def test_hint_after_move(self):
+        """Test that the kept solver is brought up to date after a move"""
+        self.client.get(self.url)
+        self.client.post(reverse('reveal', args=[self.game.id]), {'row': 0, 'col': 0}, format='json')
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.data['version'], 2)
+        self.assertEqual(response.data['safe'], [[0, col] for col in range(1, 5)])
+        self.assertEqual(len(solver_module._solvers), 1)
+
+    def test_hint_skips_flags(self):
+        """Test that flagged cells are never hinted, and wrong flags are reported"""
+        flag_url = reverse('flag', args=[self.game.id])
+        self.client.post(flag_url, {'row': 0, 'col': 0}, format='json')
+        self.client.post(flag_url, {'row': 1, 'col': 0}, format='json')
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.data['hint'], [0, 1])
+        self.assertEqual(response.data['safe'], [[0, col] for col in range(1, 5)])
+        self.assertEqual(response.data['mines'], [[1, col] for col in range(1, 5)])
+        self.assertEqual(response.data['wrong_flags'], [[0, 0]])
+
+    def test_hint_finished_game(self):
+        """Test that finished games get no hints"""
+        self.client.post(reverse('reveal', args=[self.game.id]), {'row': 1, 'col': 0}, format='json')
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_hint_not_found(self):
+        """Test that an unknown game returns 404"""
+        response = self.client.get(reverse('hint', args=[uuid.uuid4()]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,26 @@
+from unittest.mock import Mock, patch
+
+from django.test import SimpleTestCase
+
+from minesweeper_backend import startup
+
+STEPS = (
+    'configure_logging', 'log_engine', 'start_generation_executor', 'start_board_pool',
+    'start_purge_scheduler', 'start_flusher'
+)
+
+
+class StartupTest(SimpleTestCase):
+    """Test cases for the startup of a server process"""
+
+    def test_steps_in_order(self):
+        """Test that logging is configured first and every background task is started once"""
+        calls = Mock()
+        for step in STEPS:
+            patcher = patch.object(startup, step, getattr(calls, step))
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        startup.startup()
+
+        self.assertEqual([name for name, _, _ in calls.mock_calls], list(STEPS))
@@ -0,0 +1,250 @@
+import time
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from minesweeper_backend import metrics, store
+from minesweeper_backend.models import Game
+
+
+@override_settings(MINESWEEPER_WRITE_BEHIND=True, MINESWEEPER_FLUSH_INTERVAL=60)
+class WriteBehindTest(TestCase):
+    """Test cases for the write-behind game state cache"""
+
+    def setUp(self):
+        """Set up a game whose second row is all mines"""
+        cache.clear()
+        self.game = Game.objects.create(width=5, height=5, mines=5)
+        self.game.internal_board = [['M' if row == 1 else '' for _ in range(5)] for row in range(5)]
+        self.game.player_board = [['' for _ in range(5)] for _ in range(5)]
+        self.game.save()
+
+    def _reveal(self, row, col):
+        """Helper method that reveals a cell through the store"""
+        with store.locked_game(self.game.id) as game:
+            game.reveal(row, col)
+            store.save_game(game)
+        return game
+
+    def test_moves_stay_in_cache(self):
+        """Test that a move updates the cache without writing the database"""
+        self._reveal(0, 0)
+
+        self.assertEqual(store.current_game(self.game.id).player_board[0][0], '2')
+        self.game.refresh_from_db()
+        self.assertEqual(self.game.version, 0)
+        self.assertEqual(self.game.player_board[0][0], '')
+
+    def test_flush_dirty_games(self):
+        """Test that a forced flush writes every unflushed game"""
+        self._reveal(0, 0)
+        self._reveal(0, 1)
+
+        self.assertEqual(store.flush_dirty_games(force=True), 1)
+        self.game.refresh_from_db()
+        self.assertEqual(self.game.version, 2)
+        self.assertEqual(self.game.player_board[0][:2], ['2', '3'])
+        self.assertEqual(store.flush_dirty_games(force=True), 0)
+
+    def test_flush_waits_for_interval(self):
+        """Test that a sweep leaves games alone until the flush interval has passed"""
+        self._reveal(0, 0)
+        self.assertEqual(store.flush_dirty_games(), 0)
+
+    @override_settings(MINESWEEPER_FLUSH_INTERVAL=0)
+    def test_flush_on_interval(self):
+        """Test that a move flushes once the flush interval has passed"""
+        self._reveal(0, 0)
+
+        self.game.refresh_from_db()
+        self.assertEqual(self.game.version, 1)
+
+    def test_flush_when_game_ends(self):
+        """Test that a finished game is written straight away"""
+        self._reveal(1, 0)
+
+        self.game.refresh_from_db()
+        self.assertTrue(self.game.game_over)
+
+    def test_recovery_from_last_flush(self):
+        """Test that a game whose cache entry is lost resumes from its last flush"""
+        self._reveal(0, 0)
+        store.flush_dirty_games(force=True)
+        self._reveal(0, 1)
+
+        cache.delete(store.state_key(self.game.id))
+
+        game = store.current_game(self.game.id)
+        self.assertEqual(game.version, 1)
+        self.assertEqual(game.player_board[0][:2], ['2', ''])
+
+    def test_state_cached_before_last_move_at(self):
+        """Test that a state cached before games recorded their last move still plays and flushes"""
+        self._reveal(0, 0)
+        state = cache.get(store.state_key(self.game.id))
+        del state['last_move_at']
+        cache.set(store.state_key(self.game.id), state)
+
+        self._reveal(0, 1)
+        store.flush_dirty_games(force=True)
+
+        self.game.refresh_from_db()
+        self.assertEqual(self.game.version, 2)
+        self.assertIsNotNone(self.game.last_move_at)
+
+    def test_cached_state_keeps_mode(self):
+        """Test that a game read from its cached state keeps its generation mode"""
+        Game.objects.filter(pk=self.game.id).update(mode=Game.NO_GUESS)
+
+        self.assertEqual(store.current_game(self.game.id).mode, Game.NO_GUESS)
+
+    def test_direct_save_replaces_cached_state(self):
+        """Test that saving a game directly drops its cached state"""
+        self._reveal(0, 0)
+
+        game = Game.objects.get(pk=self.game.id)
+        game.game_won = True
+        game.save()
+
+        self.assertTrue(store.current_game(self.game.id).game_won)
+
+    def test_flush_command(self):
+        """Test that the management command flushes unflushed games"""
+        self._reveal(0, 0)
+        call_command('flush_games', '--all', stdout=StringIO())
+
+        self.game.refresh_from_db()
+        self.assertEqual(self.game.version, 1)
+
+    def test_views_use_cached_state(self):
+        """Test that reveals and reads through the API see the cached state"""
+        client = APIClient()
+        client.post(reverse('reveal', args=[self.game.id]), {'row': 0, 'col': 0}, format='json')
+        cache.delete(f"game_{self.game.id}")
+
+        response = client.get(reverse('get_game', args=[self.game.id]))
+
+        self.assertEqual(response.data['board_state'][0][0], '2')
+        self.assertEqual(Game.objects.get(pk=self.game.id).version, 0)
+
+
+class CacheFirstRevealTest(TestCase):
+    """Test cases for the cache-first reveal path and compare-and-swap updates"""
+
+    def setUp(self):
+        """Set up a game whose second row is all mines and load its state into the cache"""
+        cache.clear()
+        self.client = APIClient()
+        self.game = Game.objects.create(width=5, height=5, mines=5)
+        self.game.internal_board = [['M' if row == 1 else '' for _ in range(5)] for row in range(5)]
+        self.game.player_board = [['' for _ in range(5)] for _ in range(5)]
+        self.game.save()
+        self.url = reverse('reveal', args=[self.game.id])
+        store.current_game(self.game.id)
+
+    def test_reveal_only_writes(self):
+        """Test that a reveal with a cached state runs a single UPDATE and no reads"""
+        with self.assertNumQueries(1):
+            response = self.client.post(self.url, {'row': 0, 'col': 0}, format='json')
+
+        self.assertEqual(response.data['version'], 1)
+        self.game.refresh_from_db()
+        self.assertEqual(self.game.player_board[0][0], '2')
+
+    def test_revealed_cell_served_from_cache(self):
+        """Test that revealing a revealed cell doesn't touch the database"""
+        self.client.post(self.url, {'row': 0, 'col': 0}, format='json')
+
+        with self.assertNumQueries(0):
+            response = self.client.post(self.url, {'row': 0, 'col': 0}, format='json')
+        self.assertEqual(response.data['message'], "Cell already revealed")
+
+    def test_finished_game_served_from_cache(self):
+        """Test that moves on a finished game are rejected without touching the database"""
+        self.client.post(self.url, {'row': 1, 'col': 0}, format='json')
+
+        with self.assertNumQueries(0):
+            response = self.client.post(self.url, {'row': 0, 'col': 0}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_stale_cache_is_reloaded(self):
+        """Test that a move on a stale cached state is retried on the database state"""
+        Game.objects.filter(pk=self.game.id).update(version=5)
+
+        response = self.client.post(self.url, {'row': 0, 'col': 0}, format='json')
+
+        self.assertEqual(response.data['version'], 6)
+        self.game.refresh_from_db()
+        self.assertEqual(self.game.version, 6)
+
+    def test_conflicting_move_is_retried(self):
+        """Test that a move that loses the compare-and-swap is applied again"""
+        attempts = []
+
+        def move(game, changes):
+            if not attempts:
+                store.update_game(self.game.id, lambda other, other_changes: other.reveal(0, 4, other_changes))
+            attempts.append(game.version)
+            return game.reveal(0, 0, changes)
+
+        retries = metrics.counter('move_retries')
+        game, base_version, result, changes = store.update_game(self.game.id, move)
+
+        self.assertEqual(attempts, [0, 1])
+        self.assertEqual(metrics.counter('move_retries'), retries + 1)
+        self.assertEqual((base_version, game.version), (1, 2))
+        self.assertEqual(changes, [(0, 0, '2')])
+        board = store.current_game(self.game.id).player_board
+        self.assertEqual((board[0][0], board[0][4]), ('2', '2'))
+
+    @override_settings(MINESWEEPER_WRITE_BEHIND=True)
+    def test_conflicting_move_is_retried_in_cache(self):
+        """Test that the compare-and-swap also holds for write-behind states"""
+        self.test_conflicting_move_is_retried()
+
+    def test_gives_up_after_max_attempts(self):
+        """Test that a move that keeps conflicting reports the game as busy"""
+        def move(game, changes):
+            Game.objects.filter(pk=self.game.id).update(version=game.version + 1)
+            return game.reveal(0, 0, changes)
+
+        with self.assertRaises(store.GameLocked):
+            store.update_game(self.game.id, move)
+
+
+@override_settings(MINESWEEPER_WRITE_BEHIND=True, MINESWEEPER_FLUSH_INTERVAL=0.05)
+class BackgroundFlushTest(TransactionTestCase):
+    """Test cases for the background flusher (committed data, as it runs on its own connection)"""
+
+    def setUp(self):
+        """Set up a game and stop the flusher after the test"""
+        cache.clear()
+        self.game = Game.objects.create(width=5, height=5, mines=5)
+        self.game.initialize_board()
+        self.addCleanup(store.stop_flusher)
+
+    def test_flushes_without_traffic(self):
+        """Test that unflushed moves are written to the database with no further requests"""
+        with store.locked_game(self.game.id) as game:
+            game.flag(0, 0)
+            store.save_game(game)
+        self.game.refresh_from_db()
+        self.assertEqual(self.game.version, 0)
+
+        store.start_flusher()
+
+        deadline = time.monotonic() + 5
+        while self.game.version == 0:
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.01)
+            self.game.refresh_from_db()
+
+    @override_settings(MINESWEEPER_BACKGROUND_FLUSH=False)
+    def test_disabled(self):
+        """Test that the flusher can be turned off"""
+        store.start_flusher()
+        self.assertIsNone(store._flusher)
@@ -1,7 +1,11 @@
 from django.test import TestCase
 from unittest.mock import patch, MagicMock, call
 
-from minesweeper_backend.utils import generate_minesweeper_board, reveal_cell, count_adjacent_mines
+from minesweeper_backend.utils import (
+    generate_minesweeper_board, reveal_cell, count_adjacent_mines,
+    count_adjacent_mines_simple, compute_neighbor_counts, chord_cell,
+    get_game_from_board
+)
 from minesweeper_backend.models import Game
 
 
@@ -36,6 +40,34 @@ class GenerateMinesweeperBoardTest(TestCase):
             for cell in row:
                 self.assertEqual(cell, '')
 
+    def test_counts_match_internal_board(self):
+        """Test that the precomputed counts match a per-cell scan"""
+        width, height, mines = 9, 7, 20
+        boards = generate_minesweeper_board(width, height, mines)
+        
+        for row in range(height):
+            for col in range(width):
+                self.assertEqual(
+                    boards['counts'][row][col],
+                    count_adjacent_mines_simple(boards['internal_board'], row, col)
+                )
+
+
+class ComputeNeighborCountsTest(TestCase):
+    """Test cases for the compute_neighbor_counts function"""
+
+    def test_counts(self):
+        """Test the full count grid of a small board"""
+        board = [
+            ['', 'M', ''],
+            ['M', '', 'M'],
+            ['', 'M', '']
+        ]
+        self.assertEqual(
+            compute_neighbor_counts(board),
+            [[2, 2, 2], [2, 4, 2], [2, 2, 2]]
+        )
+
 
 class CountAdjacentMinesTest(TestCase):
     """Test cases for the count_adjacent_mines function"""
@@ -165,6 +197,41 @@ class RevealCellTest(TestCase):
         result = reveal_cell(self.game.player_board, 0, 3)
         self.assertEqual(result, 0)
 
+    def test_reveal_uses_precomputed_counts(self):
+        """Test that reveal reads counts from the grid instead of scanning neighbours"""
+        self.game.counts = compute_neighbor_counts(self.internal_board)
+        self.game.save()
+        
+        with patch('minesweeper_backend.utils.count_adjacent_mines_simple') as mock_count:
+            result = reveal_cell(self.game.player_board, 1, 1, game=self.game)
+        
+        self.assertEqual(result, 1)
+        self.assertEqual(self.game.player_board[1][1], '4')
+        mock_count.assert_not_called()
+
+    def test_reveal_reports_changes(self):
+        """Test that every revealed cell is reported with its new value"""
+        changes = []
+        result = reveal_cell(self.game.player_board, 1, 1, game=self.game, changes=changes)
+        
+        self.assertEqual(result, 1)
+        self.assertEqual(changes, [(1, 1, '4')])
+
+    def test_cascade_reports_changes(self):
+        """Test that a cascade reports each uncovered cell once"""
+        game = Game.objects.create(width=3, height=3, mines=1)
+        game.internal_board = [['', '', ''], ['', '', ''], ['', '', 'M']]
+        game.player_board = [['', '', ''], ['', '', ''], ['', '', '']]
+        game.save()
+        
+        changes = []
+        result = reveal_cell(game.player_board, 0, 0, game=game, changes=changes)
+        
+        self.assertEqual(result, 8)
+        self.assertEqual(len(set(changes)), 8)
+        for row, col, value in changes:
+            self.assertEqual(game.player_board[row][col], value)
+
     @patch('minesweeper_backend.models.Game.objects.filter')
     def test_game_not_found(self, mock_filter):
         """Test revealing a cell when the game is not found"""
@@ -175,4 +242,85 @@ class RevealCellTest(TestCase):
         result = reveal_cell(board, 0, 0)
         self.assertEqual(result, 0)
         
-        mock_filter.assert_called_once() 
\ No newline at end of file
+        mock_filter.assert_called_once() 
+
+
+class ChordCellTest(TestCase):
+    """Test cases for the chord_cell function"""
+
+    def setUp(self):
+        """Set up a board with one mine in the top-left corner"""
+        self.internal_board = [
+            ['M', '', ''],
+            ['', '', ''],
+            ['', '', '']
+        ]
+        self.counts = compute_neighbor_counts(self.internal_board)
+        self.board = [
+            ['F', '', ''],
+            ['', '1', ''],
+            ['', '', '']
+        ]
+
+    def test_chord_reveals_hidden_neighbours(self):
+        """Test that a satisfied number reveals its hidden neighbours"""
+        changes = []
+        result = chord_cell(self.board, 1, 1, self.internal_board, self.counts, changes)
+
+        self.assertEqual(result, 7)
+        self.assertEqual(len(changes), 7)
+        self.assertEqual(self.board[0][0], 'F')
+        self.assertEqual(self.board[2][2], '0')
+
+    def test_chord_unsatisfied_number(self):
+        """Test that nothing happens when the flags don't match the number"""
+        self.board[0][0] = ''
+        result = chord_cell(self.board, 1, 1, self.internal_board, self.counts)
+
+        self.assertEqual(result, 0)
+        self.assertEqual(self.board[0][1], '')
+
+    def test_chord_wrong_flag(self):
+        """Test that chording around a wrong flag reveals the mine"""
+        self.board[0][0] = ''
+        self.board[0][1] = 'F'
+        result = chord_cell(self.board, 1, 1, self.internal_board, self.counts)
+
+        self.assertEqual(result, -1)
+        self.assertEqual(self.board[0][0], 'M')
+
+    def test_chord_hidden_cell(self):
+        """Test that only revealed numbers can be chorded"""
+        result = chord_cell(self.board, 0, 1, self.internal_board, self.counts)
+        self.assertEqual(result, 0)
+
+
+class GetGameFromBoardTest(TestCase):
+    """Test cases for the get_game_from_board function"""
+
+    def setUp(self):
+        """Set up two games with different boards"""
+        self.game = Game.objects.create(width=3, height=3, mines=1)
+        self.game.initialize_board()
+        self.game.player_board[0][0] = '1'
+        self.game.save()
+
+        self.other = Game.objects.create(width=3, height=3, mines=1)
+        self.other.initialize_board()
+
+    def test_board_handle(self):
+        """Test that a board loaded from a game is resolved by its game id"""
+        board = Game.objects.get(pk=self.game.pk).player_board
+
+        with self.assertNumQueries(1):
+            self.assertEqual(get_game_from_board(board), self.game)
+
+    def test_plain_board(self):
+        """Test that a plain list is resolved through the board hash"""
+        board = [list(row) for row in self.game.player_board]
+        self.assertEqual(get_game_from_board(board), self.game)
+
+    def test_unknown_board(self):
+        """Test that a board matching no game returns None"""
+        board = [['2', '', ''], ['', '', ''], ['', '', '']]
+        self.assertIsNone(get_game_from_board(board))
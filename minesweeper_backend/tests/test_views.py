@@ -6,6 +6,7 @@ import uuid
 from unittest.mock import patch, MagicMock
 
 from minesweeper_backend.models import Game
+from minesweeper_backend.views import cache_game
 
 
 class CreateGameViewTest(TestCase):
@@ -104,6 +105,53 @@ class GetGameViewTest(TestCase):
         
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
 
+    def test_get_game_not_modified(self):
+        """Test that a client sending the ETag of the current board gets a 304"""
+        etag = self.client.get(self.url)['ETag']
+        self.assertEqual(etag, '"0-json"')
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(response.content, b'')
+
+        # Compression makes the tag weak, which still matches
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=f'W/{etag}')
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_get_game_after_move(self):
+        """Test that the board is sent again as soon as a move changes it"""
+        etag = self.client.get(self.url)['ETag']
+        self.client.post(reverse('flag', args=[self.game.id]), {'row': 0, 'col': 0}, format='json')
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['ETag'], '"1-json"')
+        self.assertEqual(response.data['board_state'][0][0], 'F')
+
+    def test_get_game_etag_per_format(self):
+        """Test that every board format has its own ETag"""
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.get(
+            self.url, HTTP_ACCEPT='application/vnd.minesweeper.rows+json', HTTP_IF_NONE_MATCH=etag
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['ETag'], '"0-rows"')
+
+    def test_get_game_cache_control(self):
+        """Test that games in progress are revalidated and finished games cached for good"""
+        response = self.client.get(self.url)
+        self.assertEqual(response['Cache-Control'], 'no-cache')
+
+        finished = Game.objects.create(width=8, height=8, mines=8, game_over=True)
+        finished.initialize_board()
+        response = self.client.get(reverse('get_game', args=[finished.id]))
+        self.assertIn('public', response['Cache-Control'])
+        self.assertIn('max-age=31536000', response['Cache-Control'])
+        self.assertIn('immutable', response['Cache-Control'])
+
 
 class RevealViewTest(TestCase):
     """Test cases for the reveal view"""
@@ -220,6 +268,81 @@ class RevealViewTest(TestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertTrue(game.game_won)
 
+    def test_reveal_bumps_version(self):
+        """Test that every board change increases the game version"""
+        row, col = self._use_fixed_board()
+        
+        response = self.client.post(self.url, {'row': row, 'col': col}, format='json')
+        self.assertEqual(response.data['version'], 1)
+        
+        response = self.client.post(self.url, {'row': row, 'col': col}, format='json')
+        self.assertEqual(response.data['version'], 1)
+
+    def test_reveal_delta_response(self):
+        """Test that a client with a current version receives only the changed cells"""
+        row, col = self._use_fixed_board()
+        
+        data = {'row': row, 'col': col, 'version': 0}
+        response = self.client.post(self.url, data, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('board_state', response.data)
+        self.assertEqual(response.data['version'], 1)
+        self.assertEqual(len(response.data['changes']), response.data['revealed_count'])
+        
+        self.game.refresh_from_db()
+        for changed_row, changed_col, value in response.data['changes']:
+            self.assertEqual(self.game.player_board[changed_row][changed_col], value)
+
+    def test_reveal_stale_version_gets_full_board(self):
+        """Test that a client with an outdated version receives the full board"""
+        row, col = self._use_fixed_board()
+        self.client.post(self.url, {'row': row, 'col': col}, format='json')
+        
+        data = {'row': row, 'col': col, 'version': 0}
+        response = self.client.post(self.url, data, format='json')
+        
+        self.assertEqual(response.data['message'], "Cell already revealed")
+        self.assertIn('board_state', response.data)
+        self.assertNotIn('changes', response.data)
+
+    def test_reveal_already_revealed_delta(self):
+        """Test that an already revealed cell returns an empty delta"""
+        row, col = self._use_fixed_board()
+        response = self.client.post(self.url, {'row': row, 'col': col}, format='json')
+        
+        data = {'row': row, 'col': col, 'version': response.data['version']}
+        response = self.client.post(self.url, data, format='json')
+        
+        self.assertEqual(response.data['changes'], [])
+        self.assertNotIn('board_state', response.data)
+
+    def test_reveal_invalid_version(self):
+        """Test that a non-integer version is rejected"""
+        data = {'row': 0, 'col': 0, 'version': 'abc'}
+        response = self.client.post(self.url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_slower_reveal_keeps_newer_cached_state(self):
+        """Test that a reveal finishing after a newer one doesn't cache its older state"""
+        row, col = self._use_fixed_board()
+        stale = Game.objects.get(pk=self.game.id)
+        self.client.post(self.url, {'row': row, 'col': col}, format='json')
+
+        cache_game(stale)
+
+        response = self.client.get(reverse('get_game', args=[self.game.id]))
+        self.assertEqual(response.data['version'], 1)
+        self.assertEqual(response.data['board_state'][row][col], '2')
+
+    def _use_fixed_board(self):
+        """Helper method that mines the second row and returns a numbered cell"""
+        self.game.internal_board = [['M' if row == 1 else '' for _ in range(5)] for row in range(5)]
+        self.game.counts = None
+        self.game.region_index = None
+        self.game.save()
+        return 0, 0
+
     def _find_safe_cell(self):
         """Helper method to find a cell without a mine"""
         for row in range(self.game.height):
@@ -234,4 +357,223 @@ class RevealViewTest(TestCase):
             for col in range(self.game.width):
                 if self.game.internal_board[row][col] == 'M':
                     return row, col
-        return 0, 0 
\ No newline at end of file
+        return 0, 0 
+
+
+class RevealBatchViewTest(TestCase):
+    """Test cases for the reveal_batch view"""
+
+    def setUp(self):
+        """Set up a game whose second row is all mines"""
+        self.client = APIClient()
+        self.game = Game.objects.create(width=5, height=5, mines=5)
+        self.game.internal_board = [['M' if row == 1 else '' for _ in range(5)] for row in range(5)]
+        self.game.player_board = [['' for _ in range(5)] for _ in range(5)]
+        self.game.save()
+        self.url = reverse('reveal_batch', args=[self.game.id])
+
+    def test_batch_reveal(self):
+        """Test that every move is applied and reported"""
+        data = {'moves': [[0, 0], {'row': 0, 'col': 1}, [0, 0]]}
+        response = self.client.post(self.url, data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['moves_applied'], 3)
+        self.assertEqual(
+            [outcome['result'] for outcome in response.data['outcomes']],
+            ['revealed', 'revealed', 'already_revealed']
+        )
+        self.assertEqual(response.data['revealed_count'], 2)
+
+        self.game.refresh_from_db()
+        self.assertEqual(self.game.player_board[0][:2], ['2', '3'])
+        self.assertEqual(self.game.revealed_cells, 2)
+
+    def test_batch_stops_at_mine(self):
+        """Test that moves after a mine are not applied"""
+        data = {'moves': [[0, 0], [1, 0], [0, 4]]}
+        response = self.client.post(self.url, data, format='json')
+
+        self.assertEqual(response.data['moves_applied'], 2)
+        self.assertEqual(response.data['outcomes'][-1]['result'], 'mine')
+        self.assertTrue(response.data['game_over'])
+
+        self.game.refresh_from_db()
+        self.assertTrue(self.game.game_over)
+        self.assertEqual(self.game.player_board[0][4], '')
+
+    def test_batch_single_write(self):
+        """Test that the game is saved once for the whole batch"""
+        data = {'moves': [[0, 0], [0, 1], [0, 2]]}
+        with patch.object(Game, 'save', autospec=True, side_effect=Game.save) as mock_save:
+            self.client.post(self.url, data, format='json')
+        self.assertEqual(mock_save.call_count, 1)
+
+    def test_batch_cascade(self):
+        """Test that a cascade in a batch reveals the whole empty region"""
+        response = self.client.post(self.url, {'moves': [[4, 4]]}, format='json')
+        self.assertEqual(response.data['revealed_count'], 15)
+
+    def test_batch_delta(self):
+        """Test that a client with the current version gets the combined delta"""
+        data = {'moves': [[0, 0], [0, 1]], 'version': 0}
+        response = self.client.post(self.url, data, format='json')
+
+        self.assertNotIn('board_state', response.data)
+        self.assertEqual(response.data['changes'], [[0, 0, '2'], [0, 1, '3']])
+        self.assertEqual(response.data['version'], 2)
+
+    def test_batch_invalid_moves(self):
+        """Test that malformed and out-of-bounds moves are rejected before any is applied"""
+        for moves in (None, [], [[0]], [['a', 0]], [[0, 0], [5, 0]]):
+            response = self.client.post(self.url, {'moves': moves}, format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        self.game.refresh_from_db()
+        self.assertEqual(self.game.revealed_cells, 0)
+
+    def test_batch_finished_game(self):
+        """Test that a finished game rejects batches"""
+        self.game.game_over = True
+        self.game.save()
+
+        response = self.client.post(self.url, {'moves': [[0, 0]]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_batch_game_not_found(self):
+        """Test that an unknown game returns 404"""
+        url = reverse('reveal_batch', args=[uuid.uuid4()])
+        response = self.client.post(url, {'moves': [[0, 0]]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class FlagViewTest(TestCase):
+    """Test cases for the flag view"""
+
+    def setUp(self):
+        """Set up a game whose second row is all mines"""
+        self.client = APIClient()
+        self.game = Game.objects.create(width=5, height=5, mines=5)
+        self.game.internal_board = [['M' if row == 1 else '' for _ in range(5)] for row in range(5)]
+        self.game.player_board = [['' for _ in range(5)] for _ in range(5)]
+        self.game.save()
+        self.url = reverse('flag', args=[self.game.id])
+
+    def test_toggle_flag(self):
+        """Test that a flag is placed and removed when no value is given"""
+        response = self.client.post(self.url, {'row': 1, 'col': 2}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['message'], "Flag placed")
+        self.assertEqual(response.data['board_state'][1][2], 'F')
+        self.assertEqual(response.data['version'], 1)
+
+        response = self.client.post(self.url, {'row': 1, 'col': 2}, format='json')
+        self.assertEqual(response.data['message'], "Flag removed")
+
+        self.game.refresh_from_db()
+        self.assertEqual(self.game.player_board[1][2], '')
+        self.assertEqual(self.game.version, 2)
+
+    def test_explicit_flag(self):
+        """Test that setting a flag twice leaves the board unchanged"""
+        self.client.post(self.url, {'row': 1, 'col': 2, 'flagged': True}, format='json')
+        response = self.client.post(self.url, {'row': 1, 'col': 2, 'flagged': True}, format='json')
+
+        self.assertEqual(response.data['message'], "Cell unchanged")
+        self.assertEqual(response.data['version'], 1)
+
+    def test_flag_delta(self):
+        """Test that a client with the current version gets the flag as a delta"""
+        response = self.client.post(self.url, {'row': 1, 'col': 2, 'version': 0}, format='json')
+
+        self.assertNotIn('board_state', response.data)
+        self.assertEqual(response.data['changes'], [[1, 2, 'F']])
+
+    def test_flag_revealed_cell(self):
+        """Test that revealed cells cannot be flagged"""
+        self.client.post(reverse('reveal', args=[self.game.id]), {'row': 0, 'col': 0}, format='json')
+        response = self.client.post(self.url, {'row': 0, 'col': 0}, format='json')
+
+        self.assertEqual(response.data['message'], "Cell unchanged")
+        self.game.refresh_from_db()
+        self.assertEqual(self.game.player_board[0][0], '2')
+
+    def test_flagged_cell_cannot_be_revealed(self):
+        """Test that the reveal endpoint leaves flagged cells alone"""
+        self.client.post(self.url, {'row': 1, 'col': 2}, format='json')
+        response = self.client.post(reverse('reveal', args=[self.game.id]), {'row': 1, 'col': 2}, format='json')
+
+        self.assertEqual(response.data['message'], "Cell is flagged")
+        self.assertFalse(response.data['game_over'])
+
+    def test_flag_invalid_input(self):
+        """Test that invalid cells and values are rejected"""
+        for data in ({'row': 1}, {'row': 5, 'col': 0}, {'row': 1, 'col': 2, 'flagged': 'yes'}):
+            response = self.client.post(self.url, data, format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_flag_game_not_found(self):
+        """Test that an unknown game returns 404"""
+        url = reverse('flag', args=[uuid.uuid4()])
+        response = self.client.post(url, {'row': 0, 'col': 0}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class ChordViewTest(TestCase):
+    """Test cases for the chord view"""
+
+    def setUp(self):
+        """Set up a game with a single mine in the top-left corner and its number revealed"""
+        self.client = APIClient()
+        self.game = Game.objects.create(width=5, height=5, mines=1)
+        self.game.internal_board = [['M' if (row, col) == (0, 0) else '' for col in range(5)] for row in range(5)]
+        self.game.player_board = [['' for _ in range(5)] for _ in range(5)]
+        self.game.save()
+        self.game.reveal(1, 1)
+        self.game.save()
+        self.url = reverse('chord', args=[self.game.id])
+
+    def test_chord_wins_game(self):
+        """Test that chording a satisfied number cascades through the board"""
+        self.game.flag(0, 0)
+        self.game.save()
+
+        response = self.client.post(self.url, {'row': 1, 'col': 1}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['revealed_count'], 23)
+        self.assertTrue(response.data['game_won'])
+        self.assertEqual(response.data['board_state'][0][0], 'F')
+
+    def test_chord_without_flags(self):
+        """Test that an unsatisfied number changes nothing"""
+        response = self.client.post(self.url, {'row': 1, 'col': 1, 'version': 1}, format='json')
+
+        self.assertEqual(response.data['message'], "Nothing to chord")
+        self.assertEqual(response.data['changes'], [])
+
+    def test_chord_wrong_flag(self):
+        """Test that a wrong flag makes the chord hit the mine"""
+        self.game.flag(0, 1)
+        self.game.save()
+
+        response = self.client.post(self.url, {'row': 1, 'col': 1}, format='json')
+
+        self.assertTrue(response.data['game_over'])
+        self.game.refresh_from_db()
+        self.assertTrue(self.game.game_over)
+
+    def test_chord_single_write(self):
+        """Test that the game is saved once for the whole chord"""
+        self.game.flag(0, 0)
+        self.game.save()
+
+        with patch.object(Game, 'save', autospec=True, side_effect=Game.save) as mock_save:
+            self.client.post(self.url, {'row': 1, 'col': 1}, format='json')
+        self.assertEqual(mock_save.call_count, 1)
+
+    def test_chord_out_of_bounds(self):
+        """Test that cells outside the board are rejected"""
+        response = self.client.post(self.url, {'row': -1, 'col': 0}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -1,8 +1,23 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import async_views, views
+
+# ASGI deployments can serve the game endpoints with the async views
+if getattr(settings, 'MINESWEEPER_ASYNC_VIEWS', False):
+    game_views = async_views
+else:
+    game_views = views
 
 urlpatterns = [
-    path('games/', views.create_game, name='create_game'),
-    path('games/<uuid:game_id>/', views.get_game, name='get_game'),
-    path('games/<uuid:game_id>/reveal/', views.reveal, name='reveal'),
-]
\ No newline at end of file
+    path('games/', game_views.create_game, name='create_game'),
+    path('games/bulk/', views.create_games, name='create_games'),
+    path('games/<uuid:game_id>/', game_views.get_game, name='get_game'),
+    path('games/<uuid:game_id>/reveal/', game_views.reveal, name='reveal'),
+    path('games/<uuid:game_id>/reveal/batch/', views.reveal_batch, name='reveal_batch'),
+    path('games/<uuid:game_id>/flag/', views.flag, name='flag'),
+    path('games/<uuid:game_id>/chord/', views.chord, name='chord'),
+    path('games/<uuid:game_id>/hint/', views.hint, name='hint'),
+    path('games/<uuid:game_id>/probabilities/', views.probabilities, name='probabilities'),
+    path('games/<uuid:game_id>/events/', async_views.game_events, name='game_events'),
+    path('metrics/', views.metrics, name='metrics'),
+]
@@ -1,12 +1,16 @@
-import random
 import logging
-from functools import lru_cache
 
+from minesweeper_backend import codec
+from minesweeper_backend.board import Board
+from minesweeper_backend.engines import get_engine
 from minesweeper_backend.models import Game
+from minesweeper_backend.regions import reveal_region
 
 logger = logging.getLogger(__name__)
 
-def generate_minesweeper_board(width, height, mines):
+_DIGITS = tuple(str(n) for n in range(9))
+
+def generate_minesweeper_board(width, height, mines, engine=None):
     """
     Generates a new Minesweeper board with randomly placed mines.
     
@@ -14,11 +18,14 @@ def generate_minesweeper_board(width, height, mines):
         width: Width of the board (number of columns)
         height: Height of the board (number of rows)
         mines: Number of mines to place on the board
+        engine: Optional engine name; defaults to settings.MINESWEEPER_ENGINE
         
     Returns:
         Dictionary containing:
         - 'internal_board': 2D list with mine positions (visible only to the system)
         - 'player_board': 2D list with all cells hidden (what the player sees)
+        - 'counts': 2D list with the number of mines adjacent to each cell
+        - 'regions': ZeroRegionIndex of the connected empty regions
         
     Example:
         generate_minesweeper_board(3, 3, 2) might return:
@@ -32,40 +39,63 @@ def generate_minesweeper_board(width, height, mines):
                 ['', '', ''],
                 ['', '', ''],
                 ['', '', '']
-            ]
+            ],
+            'counts': [
+                [0, 1, 0],
+                [1, 2, 1],
+                [0, 1, 0]
+            ],
+            'regions': <ZeroRegionIndex: two regions, around (0, 0) and (2, 2)>
         }
         
         Where 'M' represents a mine and '' represents an empty cell.
         The player_board starts with all cells hidden ('').
     """
-    internal_board = [['' for _ in range(width)] for _ in range(height)]
-    mines_placed = 0
+    return get_engine(engine).generate_board(width, height, mines)
 
-    while mines_placed < mines:
-        x = random.randint(0, height - 1)
-        y = random.randint(0, width - 1)
-        
-        # Only place a mine if the cell doesn't already have one
-        if internal_board[x][y] != 'M':
-            internal_board[x][y] = 'M'
-            mines_placed += 1
+
+def compute_neighbor_counts(internal_board, engine=None):
+    """
+    Computes the number of adjacent mines for every cell of the board.
+    Counts never change once the mines are placed, so this runs once per game
+    and the result is stored with it.
     
-    # Create an empty board with the specified dimensions
-    player_board = [
-        ['' for _ in range(width)]
-        for _ in range(height)
-    ]
+    Args:
+        internal_board: The board containing mine positions
+        engine: Optional engine name; defaults to settings.MINESWEEPER_ENGINE
+        
+    Returns:
+        2D list of integers (0-8), one per cell
+        
+    Example:
+        compute_neighbor_counts([['M', ''], ['', '']]) -> [[0, 1], [1, 1]]
+    """
+    return get_engine(engine).compute_counts(internal_board)
 
-    return {
-        'internal_board': internal_board,
-        'player_board': player_board
-    }
 
+def index_zero_regions(internal_board, counts, engine=None):
+    """
+    Labels the connected regions of empty cells (cells with no adjacent mines)
+    and records, for each region, every cell revealing it uncovers: the empty
+    cells themselves and the numbered cells bordering them.
+    
+    Args:
+        internal_board: The board containing mine positions
+        counts: Adjacent mine counts of the board
+        engine: Optional engine name; defaults to settings.MINESWEEPER_ENGINE
+        
+    Returns:
+        ZeroRegionIndex of the board
+    """
+    return get_engine(engine).index_zero_regions(internal_board, counts)
 
-def reveal_cell(board, row, col, internal_board=None, game=None):
+
+def reveal_cell(board, row, col, internal_board=None, game=None, counts=None, engine=None, regions=None,
+                changes=None):
     """
     Reveals a cell on the game board and automatically reveals adjacent empty cells.
-    Uses an iterative approach with a stack to avoid stack overflow on large boards.
+    The cascade itself is run by the selected board engine, which never recurses,
+    so large boards cannot overflow the stack.
     
     Args:
         board: The player's visible board to update (e.g., [['', '', ''], ['', '', ''], ...])
@@ -73,6 +103,11 @@ def reveal_cell(board, row, col, internal_board=None, game=None):
         col: Column index of the cell to reveal (0-based)
         internal_board: Optional internal board with mine positions to avoid database lookup
         game: Optional game object to avoid database lookup
+        counts: Optional precomputed adjacent mine counts; taken from the game when omitted
+        engine: Optional engine name; defaults to settings.MINESWEEPER_ENGINE
+        regions: Optional ZeroRegionIndex; taken from the game when omitted
+        changes: Optional list; every cell changed by this call is appended to it
+                 as a (row, col, new_value) tuple
         
     Returns:
         -1: If a mine was revealed (game over)
@@ -88,76 +123,102 @@ def reveal_cell(board, row, col, internal_board=None, game=None):
         
         and return 8 (the number of cells revealed)
     """
-    # Track the number of cells revealed in this operation
-    cells_revealed = 0
-    
-    # Use a stack to keep track of cells to process
-    # We start with the initial cell the player clicked
-    stack = [(row, col)]
-    
-    # Keep track of cells we've already considered to avoid duplicates
-    visited = set()
-    
     # Step 1: Validate the initial cell coordinates
     if not is_valid_cell_simple(board, row, col):
-        logger.debug(f"Invalid cell coordinates: ({row}, {col})")
+        logger.debug("Invalid cell coordinates: (%s, %s)", row, col)
         return 0
     
-    # Step 2: Get the game and internal board if not provided
+    # Step 2: Get the game if not provided
     if not game:
         game = get_game_from_board(board)
         if not game:
             logger.debug("Game not found in database")
             return 0
     
+    if board[row][col] != '':
+        return 0
+    
+    # Step 3: A mine or a numbered cell is revealed on its own, read straight
+    # from the game's packed layout without decoding any board
+    if internal_board is None and counts is None:
+        layout = game.board
+        if layout is not None:
+            if layout.is_mine(row, col):
+                _reveal_single(board, row, col, 'M', changes)
+                return -1
+            count = layout.count(row, col)
+            if count:
+                return _reveal_single(board, row, col, _DIGITS[count], changes)
+    
+    if counts is None:
+        counts = game.counts
+    
+    if regions is None:
+        regions = game.region_index
+    
+    # Step 4: An empty cell uncovers its precomputed region in one pass
+    if regions is not None:
+        region = regions.region_at(row, col)
+        if region is not None:
+            return reveal_region(board, counts, regions, region, changes)
+    
+    # Step 5: Otherwise let the engine reveal the cell and cascade through empty neighbours
     if not internal_board:
         internal_board = game.internal_board
+    return get_engine(engine).flood_reveal(board, row, col, internal_board, counts, changes)
+
+
+def _reveal_single(board, row, col, value, changes):
+    board[row][col] = value
+    if changes is not None:
+        changes.append((row, col, value))
+    return 1
+
+
+def chord_cell(board, row, col, internal_board, counts, changes=None, engine=None, layout=None):
+    """
+    Chords a revealed number: when exactly as many of its neighbours are flagged
+    as the number says, every other hidden neighbour is revealed in one engine
+    operation.
     
-    # Step 3: Continue processing cells until the stack is empty
-    while stack:
-        current_row, current_col = stack.pop()
-        
-        if (current_row, current_col) in visited or not is_valid_cell_simple(board, current_row, current_col):
-            continue
-        
-        if board[current_row][current_col] != '':
-            continue
-        
-        visited.add((current_row, current_col))
-        
-        # Step 4: Check if it's a mine
-        if internal_board[current_row][current_col] == 'M':
-            board[current_row][current_col] = 'M'
-            return -1  # Game over!
-        
-        # Step 5: Count adjacent mines and update the cell
-        mine_count = count_adjacent_mines_simple(internal_board, current_row, current_col)
-        
-        # Update the player's board with the count (or '0' for empty cells)
-        board[current_row][current_col] = str(mine_count) if mine_count > 0 else '0'
-        cells_revealed += 1
+    Args:
+        board: The player's visible board to update
+        row: Row index of the numbered cell (0-based)
+        col: Column index of the numbered cell (0-based)
+        internal_board: The board containing mine positions
+        counts: Adjacent mine counts of the board
+        changes: Optional list; every changed cell is appended as (row, col, new_value)
+        engine: Optional engine name; defaults to settings.MINESWEEPER_ENGINE
+        layout: Optional Board of the game, used to find the neighbours
         
-        # Step 6: If the current cell has no adjacent mines, reveal all adjacent cells
-        if mine_count == 0:
-            height = len(board)
-            width = len(board[0]) if height > 0 else 0
-            
-            # Check all 8 adjacent cells (horizontally, vertically, and diagonally)
-            for i in range(max(0, current_row-1), min(height, current_row+2)):
-                for j in range(max(0, current_col-1), min(width, current_col+2)):
-
-                    if i == current_row and j == current_col:
-                        continue
-                    
-                    if board[i][j] != '' or (i, j) in visited:
-                        continue
-                    
-                    stack.append((i, j))
-                    
-    return cells_revealed
+    Returns:
+        -1: If a wrongly flagged neighbour left a mine to be revealed (game over)
+         0: If the cell is not a satisfied number or has no hidden neighbours
+         n: Number of cells revealed (n > 0)
+    
+    Example:
+        With player_board = [['1', ''], ['F', '']] and a mine under the flag,
+        chord_cell(player_board, 0, 0, ...) reveals (0, 1) and (1, 1).
+    """
+    if layout is None:
+        layout = Board.from_rows(internal_board, counts)
+    
+    if not layout.in_bounds(row, col) or not board[row][col].isdigit():
+        return 0
+    
+    neighbours = list(layout.neighbours(row, col))
+    
+    flags = sum(1 for i, j in neighbours if board[i][j] == 'F')
+    if flags != int(board[row][col]):
+        return 0
+    
+    hidden = [(i, j) for i, j in neighbours if board[i][j] == '']
+    if not hidden:
+        return 0
+    
+    return get_engine(engine).flood_reveal_many(board, hidden, internal_board, counts, changes)
 
 
-# Simple version without caching for direct use with lists
 def is_valid_cell_simple(board, row, col):
     """
     Checks if the cell coordinates are within the board boundaries.
@@ -185,48 +246,23 @@ def is_valid_cell_simple(board, row, col):
         return False
 
 
-# Cached version that converts board to a hashable tuple
 def is_valid_cell(board, row, col):
     """
     Checks if the cell coordinates are within the board boundaries.
-    This version converts the board to a hashable type (tuple) for caching.
+    A Board answers from its dimensions; 2D lists are checked in place.
+    Neither copies the board.
     
     Args:
-        board: The game board as a 2D list
+        board: A Board or the game board as a 2D list
         row: Row index to check
         col: Column index to check
         
     Returns:
         True if the coordinates are valid, False otherwise
     """
-    # Convert board to a hashable type (tuple of tuples)
-    try:
-        board_tuple = tuple(tuple(row) for row in board)
-        return _is_valid_cell_cached(board_tuple, row, col)
-    except (TypeError, IndexError):
-        return False
-
-
-@lru_cache(maxsize=128)
-def _is_valid_cell_cached(board_tuple, row, col):
-    """
-    Cached version of is_valid_cell that works with hashable board representation.
-    The @lru_cache decorator memoizes results for better performance.
-    
-    Args:
-        board_tuple: The game board as a tuple of tuples (hashable)
-        row: Row index to check
-        col: Column index to check
-        
-    Returns:
-        True if the coordinates are valid, False otherwise
-    """
-    try:
-        height = len(board_tuple)
-        width = len(board_tuple[0]) if height > 0 else 0
-        return 0 <= row < height and 0 <= col < width
-    except (TypeError, IndexError):
-        return False
+    if isinstance(board, Board):
+        return board.in_bounds(row, col)
+    return is_valid_cell_simple(board, row, col)
 
 
 def get_game_from_board(board):
@@ -234,16 +270,25 @@ def get_game_from_board(board):
     Retrieves the Game object associated with the given player board.
     This is used to find the game in the database when only the board is available.
     
+    A GameBoard handle (as returned by Game.player_board) carries its game id,
+    so the game is fetched by primary key. Any other board is packed and looked
+    up through the indexed board hash, comparing the packed states only for
+    the games with a matching hash.
+    
     Args:
         board: The player's visible board
         
     Returns:
         Game object if found, None otherwise
     """
-    return Game.objects.filter(player_board=board).first()
+    game_id = getattr(board, 'game_id', None)
+    if game_id is not None:
+        return Game.objects.filter(pk=game_id).first()
+    
+    blob = codec.encode_cells(board)
+    return Game.objects.filter(board_hash=codec.board_hash(blob), cell_states=blob).first()
 
 
-# Simple version without caching for direct use with lists
 def count_adjacent_mines_simple(board, row, col):
     """
     Counts the number of mines adjacent to the given cell.
@@ -276,51 +321,23 @@ def count_adjacent_mines_simple(board, row, col):
     return count
 
 
-# Cached version that converts board to a hashable tuple
 def count_adjacent_mines(board, row, col):
     """
     Counts the number of mines adjacent to the given cell.
-    This version converts the board to a hashable type (tuple) for caching.
+    A Board reads the count from its precomputed counts; 2D lists are scanned
+    in place. Neither copies the board.
     
     Args:
-        board: The board containing mine positions (internal board)
+        board: A Board or the board containing mine positions (internal board)
         row: Row index of the cell
         col: Column index of the cell
         
     Returns:
         Number of adjacent mines (0-8)
     """
-    # Convert board to a hashable type (tuple of tuples)
+    if isinstance(board, Board):
+        return board.count(row, col)
     try:
-        board_tuple = tuple(tuple(row) for row in board)
-        return _count_adjacent_mines_cached(board_tuple, row, col)
+        return count_adjacent_mines_simple(board, row, col)
     except (TypeError, IndexError):
         return 0
-
-
-@lru_cache(maxsize=1024)
-def _count_adjacent_mines_cached(board_tuple, row, col):
-    """
-    Cached version of count_adjacent_mines that works with hashable board representation.
-    The @lru_cache decorator memoizes results for better performance.
-    
-    Args:
-        board_tuple: The game board as a tuple of tuples (hashable)
-        row: Row index of the cell
-        col: Column index of the cell
-        
-    Returns:
-        Number of adjacent mines (0-8)
-    """
-    count = 0
-    height = len(board_tuple)
-    width = len(board_tuple[0]) if height > 0 else 0
-    
-    # Check all 8 adjacent cells (horizontally, vertically, and diagonally)
-    for i in range(max(0, row-1), min(height, row+2)):
-        for j in range(max(0, col-1), min(width, col+2)):
-            if i == row and j == col:
-                continue  # Skip the cell itself
-            if board_tuple[i][j] == 'M':
-                count += 1
-    return count
\ No newline at end of file
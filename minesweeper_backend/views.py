@@ -1,225 +1,867 @@
 from django.forms import ValidationError
 
-from django.shortcuts import get_object_or_404
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, renderer_classes
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import AllowAny
 from .models import Game
-from .utils import reveal_cell
-from django.db import transaction
-from django.views.decorators.cache import cache_page
+from .codec import peek_cell
+from .events import publish
+from .executors import creation_executor
+from .generation import GenerationTimeout, generate_no_guess_board
+from .metrics import PROMETHEUS_CONTENT_TYPE, label_board, phase, render_metrics
+from .pool import claim_board
+from .probabilities import game_probabilities
+from .renderers import GAME_RENDERERS
+from .solver import solve_game
+from .store import GameLocked, cache_lock, current_game, locked_game, save_game, update_game
+from django.conf import settings
+from django.views.decorators.cache import never_cache
 from django.core.cache import cache
-import time
+from django.db import connection
+from django.urls import reverse
+import itertools
+import json
 import logging
-from django.http import Http404
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags
+from django.views.decorators.http import require_GET
+from django.views.decorators.vary import vary_on_headers
 
 logger = logging.getLogger(__name__)
 
+NO_GUESS_TIMEOUT_ERROR = "No no-guess board found in time, try again or use fewer mines."
+
+
 def get_game_cache_key(game_id):
     return f"game_{game_id}"
 
+
+def get_probabilities_cache_key(game_id, version):
+    return f"game_{game_id}_probabilities_{version}"
+
+
+def get_pending_game_cache_key(game_id):
+    return f"game_{game_id}_pending"
+
+
+@phase('serialize')
+def serialize_game(game):
+    """Full game state, as returned by create_game and get_game and kept in the cache."""
+    return {
+        'game_id': game.id,
+        'width': game.width,
+        'height': game.height,
+        'mines': game.mines,
+        'mode': game.mode,
+        'board_state': game.player_board,
+        'game_over': game.game_over,
+        'game_won': game.game_won,
+        'version': game.version
+    }
+
+
+def cache_game(game, game_data=None):
+    """
+    Caches the state of a game for get_game, unless the cache already holds
+    the same or a newer version. Moves finish in any order once the game's
+    compare-and-swap has returned, so writes are ordered by version here.
+    """
+    if game_data is None:
+        game_data = serialize_game(game)
+    cache_key = get_game_cache_key(game.id)
+    try:
+        with cache_lock(cache_key):
+            cached = cache.get(cache_key)
+            if cached is None or cached['version'] < game_data['version']:
+                cache.set(cache_key, game_data, timeout=3600)
+    except GameLocked:
+        # Better no cached state than a stale one; get_game reloads it
+        logger.warning("Dropped the cached state of game %s, its cache lock is busy", game.id)
+        cache.delete(cache_key)
+
+
+def parse_game_params(data):
+    """
+    Reads the width, height and mine count of a new game, defaulting each to 10.
+
+    Raises:
+        ValueError: With a message suitable for the client
+    """
+    try:
+        width = int(data.get('width', 10))
+        height = int(data.get('height', 10))
+        mines = int(data.get('mines', 10))
+    except ValueError:
+        raise ValueError("Width, height, and mines must be integers.")
+
+    if not all([width, height, mines]):
+        raise ValueError("Width, height, and mines are required.")
+    if width <= 0 or height <= 0:
+        raise ValueError("Width and height should be > 0.")
+
+    return width, height, mines
+
+
+def parse_mode(data):
+    """
+    Reads the generation mode of a new game, defaulting to random.
+
+    Raises:
+        ValueError: With a message suitable for the client
+    """
+    mode = data.get('mode', Game.RANDOM)
+    modes = [value for value, _ in Game.MODE_CHOICES]
+    if mode not in modes:
+        raise ValueError(f"Mode must be one of: {', '.join(modes)}.")
+    return mode
+
+
+def parse_count(data):
+    """
+    Reads the number of games to create in bulk, at most MINESWEEPER_BULK_MAX_GAMES.
+
+    Raises:
+        ValueError: With a message suitable for the client
+    """
+    limit = getattr(settings, 'MINESWEEPER_BULK_MAX_GAMES', 10000)
+    try:
+        count = int(data.get('count', 1))
+    except (TypeError, ValueError):
+        raise ValueError("Count must be an integer.")
+    if not 0 < count <= limit:
+        raise ValueError(f"Count must be between 1 and {limit}.")
+    return count
+
+
+def parse_cell(data, game):
+    """
+    Reads the row and column of a move and checks they are on the board.
+
+    Raises:
+        ValueError: With a message suitable for the client
+    """
+    row = data.get('row')
+    col = data.get('col')
+
+    if row is None or col is None:
+        raise ValueError("Row and column are required.")
+
+    try:
+        row = int(row)
+        col = int(col)
+    except (TypeError, ValueError):
+        raise ValueError("Invalid row or column values.")
+
+    if not game.board.in_bounds(row, col):
+        raise ValueError("Out of bounds")
+
+    return row, col
+
+
+def parse_version(data):
+    """
+    Reads the optional board version a client sends to receive deltas.
+
+    Raises:
+        ValueError: If the version is not an integer
+    """
+    client_version = data.get('version')
+    if client_version is None:
+        return None
+    try:
+        return int(client_version)
+    except (TypeError, ValueError):
+        raise ValueError("Invalid version.")
+
+
+def game_etag(game_data, format):
+    """
+    Strong ETag of a game's state in one response format. Every move bumps the
+    version, so the tag changes exactly when the board does.
+
+    Example:
+        game_etag({'version': 7, ...}, 'json') -> '"7-json"'
+    """
+    return f'"{game_data["version"]}-{format}"'
+
+
+def etag_matches(request, etag):
+    """
+    Returns True if the request's If-None-Match names the ETag. The comparison
+    is weak, so tags that compression turned into W/ tags still match.
+    """
+    header = request.headers.get('If-None-Match')
+    if not header:
+        return False
+    tags = parse_etags(header)
+    return '*' in tags or any(tag.removeprefix('W/') == etag for tag in tags)
+
+
+def set_game_caching(response, etag, finished):
+    """
+    Sets the ETag and Cache-Control of a game response. A game in progress
+    must be revalidated on every use; a finished game never changes again, so
+    it can be cached for MINESWEEPER_FINISHED_GAME_MAX_AGE seconds.
+    """
+    response['ETag'] = etag
+    if finished:
+        max_age = getattr(settings, 'MINESWEEPER_FINISHED_GAME_MAX_AGE', 60 * 60 * 24 * 365)
+        patch_cache_control(response, public=True, max_age=max_age, immutable=True)
+    else:
+        patch_cache_control(response, no_cache=True)
+    return response
+
+
+@phase('serialize')
+def board_update(game, changes, base_version, client_version):
+    """
+    Returns the board part of a reveal response.
+
+    Clients that send the version their board is at get only the changed cells
+    as [row, col, value] triples, provided that version is the one the changes
+    were applied to. Everyone else, including clients with a stale version,
+    gets the full board.
+    """
+    if client_version is not None and client_version == base_version:
+        return {'changes': [list(change) for change in changes]}
+    return {'board_state': game.player_board}
+
+
+def build_pending_game(game):
+    """
+    Generates the board of a pending no-guess game and saves it, or records
+    why it couldn't be. Runs in the creation executor.
+    """
+    pending_key = get_pending_game_cache_key(game.id)
+    try:
+        boards = generate_no_guess_board(game.width, game.height, game.mines)
+        game.initialize_board(save=False, boards=boards)
+        game.save()
+        cache.set(get_game_cache_key(game.id), serialize_game(game), timeout=3600)
+        cache.delete(pending_key)
+        logger.info("Created game %s", game.id)
+    except GenerationTimeout:
+        logger.warning("No no-guess board found for %sx%s with %s mines", game.width, game.height, game.mines)
+        cache.set(pending_key, {'status': 'failed', 'error': NO_GUESS_TIMEOUT_ERROR}, timeout=pending_timeout())
+    except Exception as e:
+        logger.error("Error creating game %s: %s", game.id, e, exc_info=True)
+        cache.set(pending_key, {'status': 'failed', 'error': f"An error occurred: {str(e)}"}, timeout=pending_timeout())
+    finally:
+        connection.close()
+
+
+def pending_timeout():
+    # Long enough to outlast generation, after which the game exists or has failed
+    return getattr(settings, 'MINESWEEPER_NO_GUESS_TIME_BUDGET', 5.0) + 60
+
+
+def start_pending_game(game):
+    """
+    Accepts a validated no-guess game and generates it in the background, so
+    the request thread doesn't wait on the generation processes. The game's
+    URL answers 202 until it is created.
+    """
+    pending = {
+        'game_id': game.id,
+        'width': game.width,
+        'height': game.height,
+        'mines': game.mines,
+        'mode': game.mode,
+        'status': 'pending'
+    }
+    # Recorded before the work starts, so a fast generation can't be overwritten
+    cache.set(get_pending_game_cache_key(game.id), pending, timeout=pending_timeout())
+    creation_executor().submit(build_pending_game, game)
+    logger.info("Accepted no-guess game %s", game.id)
+
+    response = Response(pending, status=status.HTTP_202_ACCEPTED)
+    response['Location'] = reverse('get_game', args=[game.id])
+    response['Retry-After'] = '1'
+    return response
+
+
+def pending_game_response(pending):
+    """Response for a game still being created (202), or whose creation failed (503)."""
+    if pending['status'] == 'failed':
+        return Response({"error": pending['error']}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+    response = Response(pending, status=status.HTTP_202_ACCEPTED)
+    response['Retry-After'] = '1'
+    return response
+
+
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@renderer_classes(GAME_RENDERERS)
 def create_game(request):
-     start_time = time.time()
-     
      try:
-         width_param = request.data.get('width', 10)
-         height_param = request.data.get('height', 10)
-         mines_param = request.data.get('mines', 10)
-         
          try:
-             width = int(width_param)
-             height = int(height_param)
-             mines = int(mines_param)
-         except ValueError:
-             return Response({"error": "Width, height, and mines must be integers."}, status=status.HTTP_400_BAD_REQUEST)
-
-         if not all([width, height, mines]):
-             return Response({"error": "Width, height, and mines are required."}, status=status.HTTP_400_BAD_REQUEST)
-         if width <= 0 or height <= 0:
-             return Response({"error": "Width and height should be > 0."}, status=status.HTTP_400_BAD_REQUEST)
+             width, height, mines = parse_game_params(request.data)
+             mode = parse_mode(request.data)
+         except ValueError as e:
+             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
+         label_board(width, height)
          try:
-             game = Game(width=width, height=height, mines=mines)
-             game.full_clean()
-             game.initialize_board()
+             game = Game(width=width, height=height, mines=mines, mode=mode)
+             # The id is a fresh uuid4, so there's nothing to check it against
+             game.full_clean(validate_unique=False)
+             if not claim_board(game):
+                 if mode == Game.NO_GUESS:
+                     # Generation takes the process pool; don't hold the request thread
+                     return start_pending_game(game)
+                 game.initialize_board(save=False)
              game.save()
              
              # Cache the new game
              cache_key = get_game_cache_key(game.id)
-             game_data = {
-                 'game_id': game.id,
-                 'width': game.width,
-                 'height': game.height,
-                 'mines': game.mines,
-                 'board_state': game.player_board,
-                 'game_over': game.game_over,
-                 'game_won': game.game_won
-             }
+             game_data = serialize_game(game)
              cache.set(cache_key, game_data, timeout=3600)  # Cache for 1 hour
              
          except ValidationError as e:
              return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-         elapsed_time = time.time() - start_time
-         logger.info(f"Created game {game.id} in {elapsed_time:.4f} seconds")
+         logger.info("Created game %s", game.id)
          
          return Response(game_data, status=status.HTTP_201_CREATED)
      
      except Exception as e:
-         logger.error(f"Error in create_game view: {str(e)}", exc_info=True)
+         logger.error("Error in create_game view: %s", e, exc_info=True)
          return Response({"error": f"An error occurred: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@renderer_classes(GAME_RENDERERS)
 def reveal(request, game_id):
-     start_time = time.time()
-     cache_hit = False
-     
      try:
-         cache_key = get_game_cache_key(game_id)
-         cached_game_data = cache.get(cache_key)
-         
-         if not cached_game_data:
-             logger.debug(f"Cache miss for game {game_id}")
-             game = get_object_or_404(Game, pk=game_id)
-         else:
-             logger.debug(f"Cache hit for game {game_id}")
-             cache_hit = True
-
-             game = get_object_or_404(Game, pk=game_id)
+         # The cached game state holds everything needed to validate the move,
+         # so only a move that changes the board reaches the database
+         game = current_game(game_id)
 
          if game.game_over or game.game_won:
-             elapsed_time = time.time() - start_time
-             logger.info(f"Rejected reveal for finished game {game_id} in {elapsed_time:.4f} seconds")
+             logger.info("Rejected reveal for finished game %s", game_id, extra={'sample': 'reveal'})
              return Response({"error": "Game already finished."}, status=status.HTTP_400_BAD_REQUEST)
 
-         row = request.data.get('row')
-         col = request.data.get('col')
-
-         if row is None or col is None:
-             return Response({"error": "Row and column are required."}, status=status.HTTP_400_BAD_REQUEST)
-
          try:
-             row = int(row)
-             col = int(col)
-         except ValueError:
-             return Response({"error": "Invalid row or column values."}, status=status.HTTP_400_BAD_REQUEST)
-
-         if row < 0 or row >= game.height or col < 0 or col >= game.width:
-              return Response({"error": "Out of bounds"}, status=status.HTTP_400_BAD_REQUEST)
+             row, col = parse_cell(request.data, game)
+             # Clients that keep a local board send its version to receive deltas
+             client_version = parse_version(request.data)
+         except ValueError as e:
+             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-         if game.player_board[row][col] != '':
-             # Return cached data if available
+         # Read the cell from the packed board so the check doesn't decode it
+         cell = peek_cell(game.cell_states, row, col)
+         if cell != '':
              game_data = {
-                 'message': "Cell already revealed", 
+                 'message': "Cell is flagged" if cell == 'F' else "Cell already revealed", 
                  'game_id': game.id,
-                 'board_state': game.player_board, 
                  'game_over': game.game_over, 
-                 'game_won': game.game_won
+                 'game_won': game.game_won,
+                 'version': game.version
              }
-             elapsed_time = time.time() - start_time
-             logger.info(f"Cell already revealed for game {game_id} (cache hit: {cache_hit}) in {elapsed_time:.4f} seconds")
+             game_data.update(board_update(game, [], game.version, client_version))
+             logger.info("Cell already revealed for game %s", game_id, extra={'sample': 'reveal'})
              return Response(game_data, status=status.HTTP_200_OK)
 
-         reveal_start_time = time.time()
-         with transaction.atomic(): 
-             game = Game.objects.select_for_update().get(pk=game_id) 
-
-             revealed_count = reveal_cell(game.player_board, row, col, internal_board=game.internal_board, game=game)
-             reveal_elapsed = time.time() - reveal_start_time
-             logger.debug(f"Revealed {revealed_count} cells in {reveal_elapsed:.4f} seconds")
-
-             if revealed_count == -1:
-                 game.game_over = True
-                 game.save()
-                 
-                 # Update cache
-                 game_data = {
-                     'message': "Game Over! You hit a mine!", 
-                     'game_id': game.id,
-                     'board_state': game.player_board, 
-                     'game_over': game.game_over, 
-                     'game_won': game.game_won 
-                 }
-                 cache.set(cache_key, game_data, timeout=3600) 
-                 
-                 elapsed_time = time.time() - start_time
-                 logger.info(f"Game over for game {game_id} in {elapsed_time:.4f} seconds")
-                 return Response(game_data, status=status.HTTP_200_OK)
-
-             if isinstance(revealed_count, int) and revealed_count > 0:
-                 game.revealed_cells += revealed_count
-             
-             if game.revealed_cells >= game.width * game.height - game.mines:
-                 game.game_won = True
-                 logger.info(f"Game {game_id} won!")
+         def apply_reveal(game, changes):
+             # Another move may have finished the game since it was read
+             if game.game_over or game.game_won:
+                 return None
+             return game.reveal(row, col, changes)
 
-             game.save()
-             
+         game, base_version, revealed_count, changes = update_game(game_id, apply_reveal)
+
+         if revealed_count is None:
+             return Response({"error": "Game already finished."}, status=status.HTTP_400_BAD_REQUEST)
+
+         cache_game(game)
+         publish(game, 'reveal', base_version, changes)
+
+         if revealed_count == -1:
              game_data = {
-                 'message': "Cell revealed", 
+                 'message': "Game Over! You hit a mine!", 
                  'game_id': game.id,
-                 'board_state': game.player_board, 
                  'game_over': game.game_over, 
                  'game_won': game.game_won,
-                 'revealed_count': revealed_count
+                 'version': game.version
              }
-             cache.set(cache_key, game_data, timeout=3600)
+             game_data.update(board_update(game, changes, base_version, client_version))
+             
+             logger.info("Game over for game %s", game_id)
+             return Response(game_data, status=status.HTTP_200_OK)
+
+         if game.game_won:
+             logger.info("Game %s won!", game_id)
+
+         game_data = {
+             'message': "Cell revealed", 
+             'game_id': game.id,
+             'game_over': game.game_over, 
+             'game_won': game.game_won,
+             'revealed_count': revealed_count,
+             'version': game.version
+         }
+         game_data.update(board_update(game, changes, base_version, client_version))
          
-         elapsed_time = time.time() - start_time
-         logger.info(f"Revealed cell ({row}, {col}) for game {game_id} in {elapsed_time:.4f} seconds, revealed {revealed_count} cells")
+         logger.info("Revealed cell (%s, %s) for game %s, revealed %s cells", row, col, game_id, revealed_count, extra={'sample': 'reveal'})
          return Response(game_data, status=status.HTTP_200_OK)
      
+     except GameLocked:
+         return Response({"error": "Game is busy, try again."}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
      except Exception as e:
-         logger.error(f"Error in reveal view: {str(e)}", exc_info=True)
+         logger.error("Error in reveal view: %s", e, exc_info=True)
          return Response({"error": f"An error occurred: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-@api_view(['GET'])
+
+def parse_moves(moves):
+    """
+    Parses a list of moves given as [row, col] pairs or {"row": ..., "col": ...} objects.
+
+    Raises:
+        ValueError: If the list or any move in it is malformed
+    """
+    if not isinstance(moves, list) or not moves:
+        raise ValueError("Moves must be a non-empty list.")
+
+    parsed = []
+    for move in moves:
+        if isinstance(move, dict):
+            move = (move.get('row'), move.get('col'))
+        if not isinstance(move, (list, tuple)) or len(move) != 2:
+            raise ValueError("Each move must have a row and a column.")
+        try:
+            parsed.append((int(move[0]), int(move[1])))
+        except (TypeError, ValueError):
+            raise ValueError("Invalid row or column values.")
+    return parsed
+
+
+def stream_game_ids(chunks):
+    """
+    Newline-delimited JSON for the chunks of games created by create_games:
+    a line with the ids of each chunk, then a line with the number created,
+    or with the error that stopped the creation.
+    """
+    created = 0
+    try:
+        for games in chunks:
+            created += len(games)
+            yield json.dumps({'game_ids': [str(game.id) for game in games]}) + '\n'
+    except GenerationTimeout:
+        logger.warning("Bulk creation stopped after %s games: no no-guess board found in time", created)
+        yield json.dumps({'error': "No no-guess board found in time.", 'created': created}) + '\n'
+        return
+    except Exception as e:
+        logger.error("Error in bulk creation after %s games: %s", created, e, exc_info=True)
+        yield json.dumps({'error': f"An error occurred: {str(e)}", 'created': created}) + '\n'
+        return
+    logger.info("Created %s games in bulk", created)
+    yield json.dumps({'created': created}) + '\n'
+
+
+@api_view(['POST'])
 @permission_classes([AllowAny])
-@cache_page(60 * 5)
-def get_game(request, game_id):
-     start_time = time.time()
-     
+def create_games(request):
+     """
+     Creates count games of one configuration (width, height, mines and mode
+     as for create_game), inserted in chunks with bulk_create.
+
+     The first chunk is generated and inserted before the response starts,
+     so a configuration that can't be generated or saved fails with the
+     usual status codes. The response then streams newline-delimited JSON
+     as chunks are inserted: the ids of each chunk, then the number of games
+     created. A failure after the first chunk ends the stream with an error
+     line instead; the games listed before it exist.
+
+     Example:
+         POST /api/games/bulk/ {"count": 1000, "width": 9, "height": 9, "mines": 10} ->
+         {"game_ids": ["...", ...]}
+         {"game_ids": ["...", ...]}
+         {"created": 1000}
+     """
      try:
-         cache_key = get_game_cache_key(game_id)
-         cached_game_data = cache.get(cache_key)
-         
-         if cached_game_data:
-             logger.debug(f"Cache hit for game {game_id}")
-             elapsed_time = time.time() - start_time
-             logger.info(f"Retrieved game {game_id} from cache in {elapsed_time:.4f} seconds")
-             return Response(cached_game_data, status=status.HTTP_200_OK)
-         
-         logger.debug(f"Cache miss for game {game_id}")
-         
          try:
-             game = get_object_or_404(Game, pk=game_id)
-         except Http404:
-             logger.info(f"Game {game_id} not found")
-             return Response({"error": "Game not found"}, status=status.HTTP_404_NOT_FOUND)
-         
+             width, height, mines = parse_game_params(request.data)
+             mode = parse_mode(request.data)
+             count = parse_count(request.data)
+         except ValueError as e:
+             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+         label_board(width, height)
+         chunks = Game.objects.create_games(width, height, mines, mode, count)
+         try:
+             first = next(chunks)
+         except ValidationError as e:
+             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+         except GenerationTimeout:
+             logger.warning("No no-guess board found for %sx%s with %s mines", width, height, mines)
+             return Response({"error": NO_GUESS_TIMEOUT_ERROR}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+         return StreamingHttpResponse(
+             stream_game_ids(itertools.chain([first], chunks)), content_type='application/x-ndjson',
+             status=status.HTTP_201_CREATED
+         )
+
+     except Exception as e:
+         logger.error("Error in create_games view: %s", e, exc_info=True)
+         return Response({"error": f"An error occurred: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['POST'])
+@permission_classes([AllowAny])
+def reveal_batch(request, game_id):
+     try:
+         try:
+             moves = parse_moves(request.data.get('moves'))
+         except ValueError as e:
+             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+         max_moves = getattr(settings, 'MINESWEEPER_MAX_BATCH_MOVES', 1000)
+         if len(moves) > max_moves:
+             return Response({"error": f"At most {max_moves} moves per batch."}, status=status.HTTP_400_BAD_REQUEST)
+
+         try:
+             client_version = parse_version(request.data)
+         except ValueError as e:
+             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+         # Every move is applied under a single lock and saved with a single write
+         with locked_game(game_id) as game:
+
+             if game.game_over or game.game_won:
+                 return Response({"error": "Game already finished."}, status=status.HTTP_400_BAD_REQUEST)
+
+             board = game.board
+             for row, col in moves:
+                 if not board.in_bounds(row, col):
+                     return Response({"error": f"Out of bounds: ({row}, {col})"}, status=status.HTTP_400_BAD_REQUEST)
+
+             base_version = game.version
+             changes = []
+             outcomes = []
+             total_revealed = 0
+
+             for row, col in moves:
+                 revealed_count = game.reveal(row, col, changes)
+                 if revealed_count == -1:
+                     result = 'mine'
+                 elif revealed_count == 0:
+                     result = 'already_revealed'
+                 else:
+                     result = 'revealed'
+                     total_revealed += revealed_count
+                 outcomes.append({'row': row, 'col': col, 'result': result, 'revealed_count': revealed_count})
+
+                 # Stop at the first mine, or once the last safe cell is uncovered
+                 if game.game_over or game.game_won:
+                     break
+
+             if game.version != base_version:
+                 save_game(game)
+                 cache_game(game)
+
+         publish(game, 'reveal', base_version, changes)
+
+         if game.game_over:
+             message = "Game Over! You hit a mine!"
+         elif game.game_won:
+             message = "You won!"
+         else:
+             message = "Moves applied"
+
          game_data = {
+             'message': message,
              'game_id': game.id,
-             'width': game.width,
-             'height': game.height,
-             'mines': game.mines,
-             'board_state': game.player_board,
+             'outcomes': outcomes,
+             'moves_applied': len(outcomes),
+             'revealed_count': total_revealed,
              'game_over': game.game_over,
-             'game_won': game.game_won
+             'game_won': game.game_won,
+             'version': game.version
          }
-         
-         cache.set(cache_key, game_data, timeout=3600)
-         
-         elapsed_time = time.time() - start_time
-         logger.info(f"Retrieved game {game_id} from database in {elapsed_time:.4f} seconds")
+         game_data.update(board_update(game, changes, base_version, client_version))
+
+         logger.info("Applied %s of %s moves for game %s, revealed %s cells", len(outcomes), len(moves), game_id, total_revealed, extra={'sample': 'move'})
+         return Response(game_data, status=status.HTTP_200_OK)
+
+     except Http404:
+         return Response({"error": "Game not found"}, status=status.HTTP_404_NOT_FOUND)
+     except GameLocked:
+         return Response({"error": "Game is busy, try again."}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+     except Exception as e:
+         logger.error("Error in reveal_batch view: %s", e, exc_info=True)
+         return Response({"error": f"An error occurred: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['POST'])
+@permission_classes([AllowAny])
+def flag(request, game_id):
+     try:
+         with locked_game(game_id) as game:
+
+             if game.game_over or game.game_won:
+                 return Response({"error": "Game already finished."}, status=status.HTTP_400_BAD_REQUEST)
+
+             try:
+                 row, col = parse_cell(request.data, game)
+                 client_version = parse_version(request.data)
+             except ValueError as e:
+                 return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+             # Without an explicit value the flag is toggled
+             flagged = request.data.get('flagged')
+             if flagged is not None and not isinstance(flagged, bool):
+                 return Response({"error": "Flagged must be true or false."}, status=status.HTTP_400_BAD_REQUEST)
+
+             base_version = game.version
+             changes = []
+             changed = game.flag(row, col, flagged, changes)
+             if changed:
+                 save_game(game)
+                 cache_game(game)
+
+         publish(game, 'flag', base_version, changes)
+
+         if changed:
+             message = "Flag placed" if changes[0][2] == 'F' else "Flag removed"
+         else:
+             message = "Cell unchanged"
+
+         game_data = {
+             'message': message,
+             'game_id': game.id,
+             'game_over': game.game_over,
+             'game_won': game.game_won,
+             'version': game.version
+         }
+         game_data.update(board_update(game, changes, base_version, client_version))
+
+         logger.info("Flag at (%s, %s) for game %s: %s", row, col, game_id, message, extra={'sample': 'move'})
+         return Response(game_data, status=status.HTTP_200_OK)
+
+     except Http404:
+         return Response({"error": "Game not found"}, status=status.HTTP_404_NOT_FOUND)
+     except GameLocked:
+         return Response({"error": "Game is busy, try again."}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+     except Exception as e:
+         logger.error("Error in flag view: %s", e, exc_info=True)
+         return Response({"error": f"An error occurred: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['POST'])
+@permission_classes([AllowAny])
+def chord(request, game_id):
+     try:
+         # The whole chord is one engine operation under one lock and one write
+         with locked_game(game_id) as game:
+
+             if game.game_over or game.game_won:
+                 return Response({"error": "Game already finished."}, status=status.HTTP_400_BAD_REQUEST)
+
+             try:
+                 row, col = parse_cell(request.data, game)
+                 client_version = parse_version(request.data)
+             except ValueError as e:
+                 return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+             base_version = game.version
+             changes = []
+             revealed_count = game.chord(row, col, changes)
+             if revealed_count != 0:
+                 save_game(game)
+                 cache_game(game)
+
+         publish(game, 'reveal', base_version, changes)
+
+         if revealed_count == -1:
+             message = "Game Over! You hit a mine!"
+         elif revealed_count == 0:
+             message = "Nothing to chord"
+         else:
+             message = "Cells revealed"
+
+         game_data = {
+             'message': message,
+             'game_id': game.id,
+             'game_over': game.game_over,
+             'game_won': game.game_won,
+             'revealed_count': revealed_count,
+             'version': game.version
+         }
+         game_data.update(board_update(game, changes, base_version, client_version))
+
+         logger.info("Chorded (%s, %s) for game %s, revealed %s cells", row, col, game_id, revealed_count, extra={'sample': 'move'})
          return Response(game_data, status=status.HTTP_200_OK)
+
+     except Http404:
+         return Response({"error": "Game not found"}, status=status.HTTP_404_NOT_FOUND)
+     except GameLocked:
+         return Response({"error": "Game is busy, try again."}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+     except Exception as e:
+         logger.error("Error in chord view: %s", e, exc_info=True)
+         return Response({"error": f"An error occurred: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+@renderer_classes(GAME_RENDERERS)
+@vary_on_headers('Accept')  # the board format depends on the Accept header
+def get_game(request, game_id):
+     """
+     Returns the state of a game, with an ETag of its version. Clients sending
+     the ETag of the board they have in If-None-Match get a 304 until it changes.
+     """
+     try:
+         cache_key = get_game_cache_key(game_id)
+         with phase('cache'):
+             game_data = cache.get(cache_key)
+         
+         if game_data:
+             logger.debug("Cache hit for game %s", game_id, extra={'sample': 'cache_hit'})
+             label_board(game_data['width'], game_data['height'])
+             logger.info("Retrieved game %s from cache", game_id, extra={'sample': 'cache_hit'})
+         else:
+             logger.debug("Cache miss for game %s", game_id)
+             
+             try:
+                 game = current_game(game_id)
+             except Http404:
+                 pending = cache.get(get_pending_game_cache_key(game_id))
+                 if pending is not None:
+                     return pending_game_response(pending)
+                 logger.info("Game %s not found", game_id)
+                 return Response({"error": "Game not found"}, status=status.HTTP_404_NOT_FOUND)
+             
+             game_data = serialize_game(game)
+             
+             cache_game(game, game_data)
+             
+             logger.info("Retrieved game %s from database", game_id)
+
+         etag = game_etag(game_data, request.accepted_renderer.format)
+         finished = game_data['game_over'] or game_data['game_won']
+         if etag_matches(request, etag):
+             return set_game_caching(Response(status=status.HTTP_304_NOT_MODIFIED), etag, finished)
+         return set_game_caching(Response(game_data, status=status.HTTP_200_OK), etag, finished)
      
      except Exception as e:
-         logger.error(f"Error in get_game view: {str(e)}", exc_info=True)
+         logger.error("Error in get_game view: %s", e, exc_info=True)
          if isinstance(e, Http404):
              return Response({"error": "Game not found"}, status=status.HTTP_404_NOT_FOUND)
          return Response({"error": f"An error occurred: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def hint(request, game_id):
+     """
+     Returns the hidden cells the solver can prove safe or mined on the
+     player's board, and one safe cell to play. Flags are not trusted: flagged
+     cells are left out of safe and mines, and the ones proven safe are
+     returned as wrong_flags.
+
+     The solver gives up after MINESWEEPER_HINT_TIME_BUDGET seconds, with
+     complete set to false; asking again carries on where it stopped.
+
+     Example:
+         GET /api/games/<id>/hint/ ->
+         {"hint": [3, 4], "safe": [[3, 4], [3, 5]], "mines": [[2, 5]], "wrong_flags": [], "complete": true, ...}
+     """
+     try:
+         game = current_game(game_id)
+
+         if game.game_over or game.game_won:
+             return Response({"error": "Game already finished."}, status=status.HTTP_400_BAD_REQUEST)
+
+         solver = solve_game(game)
+         safe = solver.cells(solver.safe - solver.flagged)
+         mines = solver.cells(solver.mines - solver.flagged)
+
+         game_data = {
+             'game_id': game.id,
+             'version': game.version,
+             'hint': safe[0] if safe else None,
+             'safe': safe,
+             'mines': mines,
+             'wrong_flags': solver.cells(solver.safe & solver.flagged),
+             'complete': solver.complete
+         }
+
+         logger.info("Hint for game %s: %s safe, %s mines", game_id, len(safe), len(mines))
+         return Response(game_data, status=status.HTTP_200_OK)
+
+     except Http404:
+         return Response({"error": "Game not found"}, status=status.HTTP_404_NOT_FOUND)
+     except Exception as e:
+         logger.error("Error in hint view: %s", e, exc_info=True)
+         return Response({"error": f"An error occurred: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def probabilities(request, game_id):
+     """
+     Returns the exact probability that each hidden cell of the player's
+     board is a mine, given the revealed numbers and the game's mine count,
+     with null for revealed cells. Flags are not trusted.
+
+     Results are cached per board version, so asking again before the next
+     move costs nothing. Boards too complex to count within
+     MINESWEEPER_PROBABILITY_TIME_BUDGET seconds get a 503; the parts
+     already counted are kept, so asking again gets further.
+
+     Example:
+         GET /api/games/<id>/probabilities/ ->
+         {"version": 3, "probabilities": [[null, 0.5, 0.5], [null, null, 0.0]], ...}
+     """
+     try:
+         game = current_game(game_id)
+
+         if game.game_over or game.game_won:
+             return Response({"error": "Game already finished."}, status=status.HTTP_400_BAD_REQUEST)
+
+         cache_key = get_probabilities_cache_key(game_id, game.version)
+         with phase('cache'):
+             game_data = cache.get(cache_key)
+
+         if game_data is None:
+             grid = game_probabilities(game)
+             if grid is None:
+                 logger.warning("Probabilities of game %s not computed in time", game_id)
+                 response = Response(
+                     {"error": "Board too complex to compute in time, try again."},
+                     status=status.HTTP_503_SERVICE_UNAVAILABLE
+                 )
+                 response['Retry-After'] = '1'
+                 return response
+
+             game_data = {
+                 'game_id': game.id,
+                 'version': game.version,
+                 'probabilities': grid
+             }
+             cache.set(cache_key, game_data, timeout=3600)
+
+         return Response(game_data, status=status.HTTP_200_OK)
+
+     except Http404:
+         return Response({"error": "Game not found"}, status=status.HTTP_404_NOT_FOUND)
+     except Exception as e:
+         logger.error("Error in probabilities view: %s", e, exc_info=True)
+         return Response({"error": f"An error occurred: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@require_GET
+@never_cache
+def metrics(request):
+     """
+     Exposes the request latency histograms in the Prometheus text format.
+
+     Example:
+         GET /api/metrics/ ->
+         minesweeper_request_duration_seconds_bucket{endpoint="reveal",board="small",le="0.005"} 12
+         ...
+     """
+     return HttpResponse(render_metrics(), content_type=PROMETHEUS_CONTENT_TYPE)